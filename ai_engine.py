@@ -1,56 +1,1005 @@
+import gc
+import hashlib
+import math
 import os
-from llama_cpp import Llama, LlamaGrammar
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict
 
-class LocalLLMEngine:
-    def __init__(self, model_filename="Llama-3.2-1B-Instruct-Q6_K.gguf"):
-        self.model_path = os.path.join(os.path.expanduser("~"), ".ai_assistant", "models", model_filename)
+from tool_catalog import format_actions, format_examples
+
+MODELS_DIR = os.path.join(os.path.expanduser("~"), ".ai_assistant", "models")
+SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".ai_assistant", "cache", "kv")
+SNAPSHOT_VERSION = 2
+# Snapshots on disk beyond this total are deleted, least recently used first
+SNAPSHOT_MAX_BYTES = 512 * 1024 * 1024
+SYSTEM_HEADER = "<|start_header_id|>system<|end_header_id|>\n\n"
+
+# Enhanced GBNF Grammar: Allows either JSON tools OR plain text conversation
+# Solves the "gagged AI" problem by allowing natural responses
+TOOL_GRAMMAR = r'''
+    root ::= object | chat
+
+    # Tool Call (JSON) - for actions like opening apps
+    object ::= "{" ws "\"tool\"" ":" ws string "," ws "\"parameters\"" ":" ws params "}"
+
+    # Tool Parameters (nested JSON object)
+    params ::= "{" ws (string ":" ws value ("," ws string ":" ws value)*)? "}" | "{" ws "}"
+
+    # Conversational Response (Plain text for chat)
+    chat ::= [^{}]*
+
+    # Standard JSON building blocks
+    string ::= "\"" ([^"\\] | "\\" ["\\/bfnrt] | "\\" "u" [0-9a-fA-F]{4})* "\""
+    value ::= object | array | string | number | ("true" | "false") | "null"
+    array ::= "[" ws (value ("," ws value)*)? ws "]"
+    number ::= ("-"? [0-9]+ ("." [0-9]+)? ([eE] [+-]? [0-9]+)?)
+    ws ::= [ \t\n]*
+'''
+
+# First-stage routing on a small model: one word, nothing else
+ROUTE_GRAMMAR = r'''
+    root ::= "tool" | "chat"
+'''
+
+# Conversations on the chat model stay plain text, like the chat rule above
+CHAT_GRAMMAR = r'''
+    root ::= [^{}]*
+'''
+
+# Built from the same action list as the tool model's system prompt
+ROUTER_SYSTEM_PROMPT = f"""Classify the user's message.
+Answer "tool" if it asks for one of these actions, now, at a later time, repeatedly or as a reminder:
+{format_actions()}
+Answer "chat" for everything else: greetings, questions, explanations and conversation.
+
+EXAMPLES:
+{format_examples(route=True)}"""
+
+# Rough KV-cache and scratch cost per context token, added to the file size
+# when estimating how much memory a loaded model takes
+CONTEXT_BYTES_PER_TOKEN = 128 * 1024
+
+
+def llama_cpp_version():
+    import llama_cpp
+    return getattr(llama_cpp, "__version__", "unknown")
+
+
+def model_fingerprint(model_path):
+    """SHA-256 of the model file, cached next to it by size and mtime"""
+    stat = os.stat(model_path)
+    cache_path = model_path + ".sha256"
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    try:
+        with open(cache_path, "r") as f:
+            cached_stamp, digest = f.read().split()
+        if cached_stamp == stamp:
+            return digest
+    except (OSError, ValueError):
+        pass
+
+    sha = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    try:
+        with open(cache_path, "w") as f:
+            f.write(f"{stamp} {digest}\n")
+    except OSError:
+        pass  # Read-only model directory; hash again next time
+    return digest
+
+
+def read_meminfo():
+    """Parse /proc/meminfo into a dict of kB values"""
+    meminfo = {}
+    with open('/proc/meminfo', 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            fields = value.split()
+            if fields:
+                meminfo[key] = int(fields[0])
+    return meminfo
+
+
+class IdlePolicy:
+    """When to free the model: after an idle period or under memory pressure"""
+
+    def __init__(self, idle_timeout=900, min_available_ratio=0.10, check_interval=30):
+        self.idle_timeout = idle_timeout  # Seconds without a query; 0 disables
+        self.min_available_ratio = min_available_ratio  # MemAvailable / MemTotal
+        self.check_interval = check_interval
+
+    def memory_pressure(self):
+        """True when available memory has dropped below the configured ratio"""
+        try:
+            meminfo = read_meminfo()
+            return meminfo['MemAvailable'] < self.min_available_ratio * meminfo['MemTotal']
+        except (OSError, KeyError):
+            return False
+
+    def unload_reason(self, idle_seconds):
+        """Return why the model should be unloaded now, or None"""
+        if self.memory_pressure():
+            return "memory pressure"
+        if self.idle_timeout and idle_seconds >= self.idle_timeout:
+            return f"idle for {idle_seconds:.0f}s"
+        return None
+
+
+def read_cpu_times():
+    """Per-CPU (busy, total) jiffies from /proc/stat, keyed by CPU number"""
+    times = {}
+    with open('/proc/stat', 'r') as f:
+        for line in f:
+            if not line.startswith('cpu'):
+                break
+            name, *fields = line.split()
+            if name == 'cpu':
+                continue
+            # user nice system idle iowait irq softirq steal; guest time is already in user
+            values = [int(x) for x in fields[:8]]
+            total = sum(values)
+            times[int(name[3:])] = (total - values[3] - values[4], total)
+    return times
+
+
+def read_own_cpu_ticks():
+    """utime + stime of this process, in jiffies"""
+    with open('/proc/self/stat', 'r') as f:
+        fields = f.read().rpartition(')')[2].split()
+    return int(fields[11]) + int(fields[12])
+
+
+class SchedulingPolicy:
+    """How inference shares the CPU with the rest of the desktop.
+
+    Before each background batch the thread count is derived from the load
+    other processes put on the CPUs just now (over the last sample_window
+    seconds at least, or since the previous batch if that was at most
+    max_sample_age ago), leaving reserve_cores free. Background requests run at a lowered priority (nice
+    or SCHED_IDLE) and, with affinity, on the least busy CPUs; the first
+    batch after user input is boosted to full threads at normal priority.
+    """
+
+    PRIORITIES = ("normal", "nice", "idle")
+
+    def __init__(self, priority="nice", nice=10, reserve_cores=1, min_threads=1, max_threads=None,
+                 affinity=False, boost_seconds=10.0, sample_window=0.1, max_sample_age=2.0):
+        if priority not in self.PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority} (use one of {', '.join(self.PRIORITIES)})")
+        self.priority = priority
+        self.nice = nice
+        self.reserve_cores = reserve_cores
+        self.min_threads = min_threads
+        # llama-cpp-python's own default: half the logical CPUs
+        self.max_threads = max_threads or max(1, (os.cpu_count() or 2) // 2)
+        self.affinity = affinity
+        self.boost_seconds = boost_seconds  # How long after user input a request counts as interactive
+        self.sample_window = sample_window  # Shortest window the load is measured over
+        self.max_sample_age = max_sample_age  # An older sample says nothing about the load now
+        self._boost_until = 0.0
+        self._sample = None  # (monotonic time, per-CPU times, own ticks) of the last measurement
+
+    def note_user_input(self):
+        """The user just typed or clicked: boost the next batch"""
+        self._boost_until = time.monotonic() + self.boost_seconds
+
+    def take_boost(self):
+        """Whether the next batch is boosted; the boost is used up by it"""
+        boosted = time.monotonic() < self._boost_until
+        self._boost_until = 0.0
+        return boosted
+
+    @staticmethod
+    def _read_sample():
+        return time.monotonic(), read_cpu_times(), read_own_cpu_ticks()
 
-        print(f"⚡ Loading AI Model into Memory: {self.model_path}")
+    def foreground_load(self):
+        """(busy CPUs used by other processes, per-CPU busy fraction) right now.
+
+        Measured since the previous call if that was recent, else over a
+        fresh sample_window (two reads, sleeping in between).
+        """
+        try:
+            previous = self._sample
+            if previous is None or time.monotonic() - previous[0] > self.max_sample_age:
+                previous = self._read_sample()
+            wait = self.sample_window - (time.monotonic() - previous[0])
+            if wait > 0:
+                time.sleep(wait)
+            self._sample = self._read_sample()
+            _, times, own = self._sample
+        except (OSError, ValueError, IndexError):
+            return 0.0, {}
+
+        per_cpu = {}
+        busy = elapsed = 0
+        for cpu, (cpu_busy, cpu_total) in times.items():
+            old_busy, old_total = previous[1].get(cpu, (cpu_busy, cpu_total))
+            if cpu_total > old_total:
+                per_cpu[cpu] = (cpu_busy - old_busy) / (cpu_total - old_total)
+                busy += cpu_busy - old_busy
+                elapsed += cpu_total - old_total
+        if not per_cpu:
+            return 0.0, per_cpu
+        ticks_per_cpu = elapsed / len(per_cpu)
+        # Our own inference threads are not foreground load
+        other = (busy - (own - previous[2])) / ticks_per_cpu
+        return max(0.0, other), per_cpu
+
+    def plan(self, allow_boost=True):
+        """(threads, boosted, cpus) for the next batch; cpus is None for no pinning"""
+        boosted = self.take_boost() if allow_boost else False
+        allowed = sorted(os.sched_getaffinity(0))
+        if boosted:
+            return min(self.max_threads, len(allowed)), True, None
+
+        busy, per_cpu = self.foreground_load()
+        free = len(allowed) - math.ceil(busy - 0.25) - self.reserve_cores
+        threads = max(self.min_threads, min(self.max_threads, free))
+        cpus = None
+        if self.affinity:
+            cpus = sorted(allowed, key=lambda cpu: per_cpu.get(cpu, 0.0))[:threads]
+        return threads, False, cpus
+
+    def apply_background(self, cpus=None):
+        """Lower the priority of (and pin) the calling thread.
+
+        Threads it starts afterwards, such as llama.cpp's compute threads,
+        inherit both. Without privileges this cannot be undone, so it is only
+        ever applied to short-lived threads.
+        """
+        tid = threading.get_native_id()
+        try:
+            if self.priority == "idle":
+                os.sched_setscheduler(tid, os.SCHED_IDLE, os.sched_param(0))
+            elif self.priority == "nice":
+                # On Linux the nice value is per thread
+                os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+            if cpus:
+                os.sched_setaffinity(tid, cpus)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ Could not lower inference priority: {e}")
+
+
+def default_pool_bytes(ratio=0.5):
+    """Memory cap for loaded models: a share of physical memory"""
+    try:
+        return int(read_meminfo()['MemTotal'] * 1024 * ratio)
+    except (OSError, KeyError):
+        return 4 * 1024 ** 3
+
+
+class ModelPool:
+    """Loaded GGUF models keyed by path, evicted least-recently-used under a memory cap.
+
+    Pinned models (the tool model) are never evicted; the rest are loaded on
+    demand and dropped when a newer model would not fit.
+    """
+
+    def __init__(self, max_bytes=None, n_ctx=4096, loader=None):
+        self.max_bytes = max_bytes if max_bytes is not None else default_pool_bytes()
+        self.n_ctx = n_ctx
+        self.loader = loader or self._load_llama
+        self._models = OrderedDict()  # path -> (llm, estimated bytes)
+        self._pinned = set()
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+
+    def _load_llama(self, path):
+        from llama_cpp import Llama
+
+        print(f"⚡ Loading AI Model into Memory: {path}")
         # n_gpu_layers=-1 offloads EVERYTHING to GPU if available.
-        # n_ctx=4096 is the context window.
-        self.llm = Llama(
-            model_path=self.model_path,
-            n_gpu_layers=-1,
-            n_ctx=4096,
-            verbose=False
-        )
+        return Llama(model_path=path, n_gpu_layers=-1, n_ctx=self.n_ctx, verbose=False)
+
+    def estimate_bytes(self, path):
+        """Approximate resident size of a model: weights plus context"""
+        return os.path.getsize(path) + self.n_ctx * CONTEXT_BYTES_PER_TOKEN
+
+    @property
+    def used_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def get(self, path, pin=False):
+        """Return the loaded model for path, loading (and evicting) as needed"""
+        with self._lock:
+            if path in self._models:
+                self._models.move_to_end(path)
+            else:
+                size = self.estimate_bytes(path)
+                self._evict_for(size)
+                self._models[path] = (self.loader(path), size)
+                self.loads += 1
+            if pin:
+                self._pinned.add(path)
+            return self._models[path][0]
+
+    def _evict_for(self, size):
+        for path in list(self._models):
+            if self.used_bytes + size <= self.max_bytes:
+                return
+            if path not in self._pinned:
+                self.release(path)
+                self.evictions += 1
+        if self.used_bytes + size > self.max_bytes:
+            print(f"⚠️ Model pool over its {self.max_bytes / 1024 ** 2:.0f} MB cap; only pinned models are left")
+
+    def release(self, path):
+        """Free one model; returns whether it was loaded"""
+        with self._lock:
+            entry = self._models.pop(path, None)
+            self._pinned.discard(path)
+        if entry is None:
+            return False
+        llm = entry[0]
+        if hasattr(llm, 'close'):
+            llm.close()
+        return True
+
+    def release_all(self):
+        """Free every loaded model"""
+        with self._lock:
+            for path in list(self._models):
+                self.release(path)
+
+    def models(self):
+        """The loaded models"""
+        with self._lock:
+            return [llm for llm, _ in self._models.values()]
+
+    def __contains__(self, path):
+        return path in self._models
+
+    def __len__(self):
+        return len(self._models)
+
+
+def state_bytes(state):
+    """Memory held by a saved LlamaState: the KV cache plus its token and logits buffers"""
+    size = getattr(state, "llama_state_size", 0)
+    for name in ("input_ids", "scores"):
+        size += getattr(getattr(state, name, None), "nbytes", 0)
+    return size
+
+
+def snapshot_files(snapshot_dir):
+    """(mtime, size, path) of the prompt snapshots on disk, most recently used first"""
+    files = []
+    try:
+        with os.scandir(snapshot_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".kvstate"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        pass
+    return sorted(files, reverse=True)
+
+
+def prune_snapshots(snapshot_dir, keep=None, max_bytes=None):
+    """Delete the least recently used snapshots beyond max_bytes; never the one to keep"""
+    max_bytes = SNAPSHOT_MAX_BYTES if max_bytes is None else max_bytes
+    used = 0
+    for _, size, path in snapshot_files(snapshot_dir):
+        if path != keep and used + size > max_bytes:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        used += size
+
+
+def shared_prefix_length(a, b):
+    """Number of leading tokens two token sequences have in common"""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class _PendingQuery:
+    """A query waiting for the engine worker"""
+    __slots__ = ("user_prompt", "system_prompt", "session_id", "full_prompt",
+                 "done", "text", "usage", "error", "queued_at")
+
+    def __init__(self, user_prompt, system_prompt, session_id):
+        self.user_prompt = user_prompt
+        self.system_prompt = system_prompt
+        self.session_id = session_id
+        self.full_prompt = None
+        self.done = threading.Event()
+        self.text = None
+        self.usage = {}
+        self.error = None
+        self.queued_at = time.perf_counter()
+
 
-        # Enhanced GBNF Grammar: Allows either JSON tools OR plain text conversation
-        # Solves the "gagged AI" problem by allowing natural responses
-        self.tool_grammar = LlamaGrammar.from_string(r'''
-            root ::= object | chat
+class _PendingPrefill:
+    """A draft to prefill speculatively while the user is still typing"""
+    __slots__ = ("user_prompt", "system_prompt", "session_id", "done", "evaluated", "error")
 
-            # Tool Call (JSON) - for actions like opening apps
-            object ::= "{" ws "\"tool\"" ":" ws string "," ws "\"parameters\"" ":" ws params "}"
+    def __init__(self, user_prompt, system_prompt, session_id):
+        self.user_prompt = user_prompt
+        self.system_prompt = system_prompt
+        self.session_id = session_id
+        self.done = threading.Event()
+        self.evaluated = 0  # Tokens evaluated; 0 if superseded or already cached
+        self.error = None
 
-            # Tool Parameters (nested JSON object)
-            params ::= "{" ws (string ":" ws value ("," ws string ":" ws value)*)? "}" | "{" ws "}"
 
-            # Conversational Response (Plain text for chat)
-            chat ::= [^{}]*
+class LocalLLMEngine:
+    def __init__(self, model_filename="Llama-3.2-1B-Instruct-Q6_K.gguf", max_session_bytes=256 * 1024 * 1024,
+                 snapshot_dir=SNAPSHOT_DIR, idle_policy=None, preload=True,
+                 chat_model_filename=None, router_model_filename=None, max_pool_bytes=None,
+                 record_path=None, scheduling_policy=None):
+        self.model_path = self._model_path(model_filename)
+        self.n_ctx = 4096
+        self.snapshot_dir = snapshot_dir
+
+        # Tiered routing: with a chat model configured, a cheap first stage
+        # (the router model, or a one-token decode on the tool model) decides
+        # whether a request is a tool call; only conversations go to the
+        # larger chat model. All models share one memory-capped pool.
+        self.chat_model_path = self._model_path(chat_model_filename) if chat_model_filename else None
+        self.router_model_path = self._model_path(router_model_filename) if router_model_filename else None
+        self.pool = ModelPool(max_pool_bytes, n_ctx=self.n_ctx)
+        self.route_grammar = None
+        self.chat_grammar = None
+
+        self.last_usage = {}
+
+        # The model is freed when idle and reloaded transparently on demand
+        self.llm = None
+        self.idle_policy = idle_policy or IdlePolicy()
+        self.scheduling = scheduling_policy or SchedulingPolicy()
+        self.last_schedule = {}
+        self.last_used = time.monotonic()
+        self.load_count = 0
+        self.last_load_time = 0.0
+        self._static_prompt = None
+        self.last_prime = {}
+        self._idle_monitor = None
+
+        # Compiled on first load, together with the llama_cpp import
+        self.tool_grammar = None
+
+        # All model access happens on one worker thread. Callers from any
+        # number of sessions enqueue queries; whatever has accumulated while
+        # the model was busy is drained and run back to back, grouped by
+        # session and shared prefix (one sequence at a time, not batched
+        # decoding).
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._llm_lock = threading.RLock()
+
+        # Per-session KV-cache slots (LRU), so a session's history does not
+        # have to be prefilled again after another session used the context.
+        # A saved state includes the logits buffer (n_batch x n_vocab floats),
+        # so the slots are capped by their total size rather than their count.
+        self.max_session_bytes = max_session_bytes
+        self._session_slots = OrderedDict()
+        self._active_session = None
+
+        # Record mode: every query is appended to a cassette for ReplayEngine
+        self.recorder = None
+        if record_path:
+            from cassette import CassetteRecorder
+            self.recorder = CassetteRecorder(record_path)
+
+        # Without preload the model is loaded by the first query
+        if preload:
+            self.load()
+
+    @staticmethod
+    def _model_path(model_filename):
+        model_path = os.path.join(MODELS_DIR, model_filename)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model not found: {model_path} (run download_model.py)")
+        return model_path
+
+    @property
+    def is_loaded(self):
+        return self.llm is not None
+
+    @property
+    def routing_enabled(self):
+        return self.chat_model_path is not None
+
+    def load(self):
+        """Load the model if it is not resident; returns True if it was loaded now"""
+        with self._llm_lock:
+            if self.llm is not None:
+                return False
+
+            start = time.perf_counter()
+            from llama_cpp import LlamaGrammar
+
+            # The tool model is pinned; chat and router models come and go
+            self.llm = self.pool.get(self.model_path, pin=True)
+            self.load_count += 1
+            if self.tool_grammar is None:
+                self.tool_grammar = LlamaGrammar.from_string(TOOL_GRAMMAR)
+                self.route_grammar = LlamaGrammar.from_string(ROUTE_GRAMMAR)
+                self.chat_grammar = LlamaGrammar.from_string(CHAT_GRAMMAR)
+
+            # After an unload the prefix comes back from the snapshot on disk
+            if self._static_prompt is not None:
+                self.prime_prefix(self._static_prompt)
+
+            self.last_used = time.monotonic()
+            self.last_load_time = time.perf_counter() - start
+            return True
+
+    def preload_async(self):
+        """Start loading the model in the background, e.g. when the entry gets focus"""
+        if self.llm is None:
+            threading.Thread(target=self.load, name="llm-preload", daemon=True).start()
+
+    def unload(self, reason="requested", release_pages=False):
+        """Free the model, its context and all session KV slots"""
+        with self._llm_lock:
+            if self.llm is None:
+                return False
 
-            # Standard JSON building blocks
-            string ::= "\"" ([^"\\] | "\\" ["\\/bfnrt] | "\\" "u" [0-9a-fA-F]{4})* "\""
-            value ::= object | array | string | number | ("true" | "false") | "null"
-            array ::= "[" ws (value ("," ws value)*)? ws "]"
-            number ::= ("-"? [0-9]+ ("." [0-9]+)? ([eE] [+-]? [0-9]+)?)
-            ws ::= [ \t\n]*
-        ''')
+            print(f"💤 Unloading AI Model ({reason})")
+            self.llm = None
+            self.pool.release_all()
+            self._session_slots.clear()
+            self._active_session = None
+            gc.collect()
 
-    def query(self, user_prompt, system_prompt):
+            if release_pages:
+                self._release_model_pages()
+            return True
+
+    def _release_model_pages(self):
+        """Advise the kernel to drop the model file from the page cache"""
+        try:
+            fd = os.open(self.model_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except (OSError, AttributeError):
+            pass
+
+    def perf_counters(self):
+        """llama.cpp's cumulative timing counters for the tool model's context, or {}"""
+        if self.llm is None:
+            return {}
+        try:
+            import llama_cpp
+
+            ctx = self.llm._ctx.ctx
+            if hasattr(llama_cpp, "llama_perf_context"):
+                data = llama_cpp.llama_perf_context(ctx)
+            else:  # Older bindings
+                data = llama_cpp.llama_get_timings(ctx)
+            return {
+                "load_ms": data.t_load_ms,
+                "prompt_eval_ms": data.t_p_eval_ms,
+                "prompt_tokens": data.n_p_eval,
+                "eval_ms": data.t_eval_ms,
+                "eval_tokens": data.n_eval,
+            }
+        except Exception:
+            return {}
+
+    def check_idle(self):
+        """Apply the idle policy once; returns the unload reason, if any"""
+        # A query in progress is anything but idle
+        if not self._llm_lock.acquire(blocking=False):
+            return None
+        try:
+            if self.llm is None:
+                return None
+            reason = self.idle_policy.unload_reason(time.monotonic() - self.last_used)
+            if reason and self.unload(reason, release_pages=(reason == "memory pressure")):
+                return reason
+            return None
+        finally:
+            self._llm_lock.release()
+
+    def start_idle_monitor(self):
+        """Check the idle policy periodically on a background thread"""
+        if self._idle_monitor is not None:
+            return
+
+        def monitor():
+            while True:
+                time.sleep(self.idle_policy.check_interval)
+                self.check_idle()
+
+        self._idle_monitor = threading.Thread(target=monitor, name="llm-idle-monitor", daemon=True)
+        self._idle_monitor.start()
+
+    @staticmethod
+    def build_prompt_prefix(user_prompt, system_prompt):
+        """The prompt up to the end of the user's text, which is all a draft can prefill"""
+        return f"{SYSTEM_HEADER}{system_prompt}<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{user_prompt}"
+
+    @staticmethod
+    def build_prompt(user_prompt, system_prompt):
+        """Construct Llama-3 specific prompt format (without duplicate begin_of_text)"""
+        return (LocalLLMEngine.build_prompt_prefix(user_prompt, system_prompt)
+                + "<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n")
+
+    def query(self, user_prompt, system_prompt, session_id=None):
         """
         Direct inference call. 10x faster than HTTP.
+        Safe to call from many threads; concurrent calls are queued.
+        """
+        return self.query_with_usage(user_prompt, system_prompt, session_id)[0]
+
+    def query_with_usage(self, user_prompt, system_prompt, session_id=None):
+        """Like query(), but returns (text, usage) of this very request.
+
+        last_usage is shared by all callers; concurrent callers that need
+        their own token counts use this instead.
+        """
+        request = _PendingQuery(user_prompt, system_prompt, session_id)
+        start = time.perf_counter()
+        self._ensure_worker()
+        self._queue.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        # Token counts for the last call, used for throughput reporting
+        self.last_usage = request.usage
+        if self.recorder is not None:
+            self.recorder.record(user_prompt, system_prompt, session_id, request.text, request.usage,
+                                 (time.perf_counter() - start) * 1000)
+        return request.text, request.usage
+
+    def prefill(self, user_draft, system_prompt, session_id=None):
+        """Speculatively evaluate a draft prompt in the background.
+
+        Returns immediately; the worker evaluates the system prompt, history
+        and draft (minus its last token, which may still change) into the
+        session's KV cache, so the query sent on Enter only has to evaluate
+        the last few tokens. Newer drafts supersede queued ones, and a real
+        query always goes first. The returned handle's done event is set when
+        the draft was evaluated or dropped.
+        """
+        request = _PendingPrefill(user_draft, system_prompt, session_id)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._worker_loop, name="llm-worker", daemon=True)
+                self._worker.start()
+
+    def _worker_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain everything that queued up while the previous batch ran
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            queries = [r for r in batch if isinstance(r, _PendingQuery)]
+            prefills = [r for r in batch if isinstance(r, _PendingPrefill)]
+            # A query makes the drafts of its session moot
+            submitted = {r.session_id for r in queries}
+            for request in prefills:
+                if request.session_id in submitted:
+                    request.done.set()
+            prefills = [r for r in prefills if r.session_id not in submitted]
+
+            with self._llm_lock:
+                self.load()
+                if queries:
+                    self._run_scheduled(queries, self.run_batch)
+                if prefills:
+                    # Typing is not a request yet: never takes the interactive boost
+                    self._run_scheduled(prefills, self.run_prefills, allow_boost=False)
+                self.last_used = time.monotonic()
+
+    def note_user_input(self):
+        """Mark the next query as interactive (see SchedulingPolicy)"""
+        self.scheduling.note_user_input()
+
+    def _set_threads(self, n_threads, n_threads_batch):
+        try:
+            import llama_cpp
+
+            for llm in self.pool.models():
+                llama_cpp.llama_set_n_threads(llm._ctx.ctx, n_threads, n_threads_batch)
+        except (ImportError, AttributeError):
+            pass  # Bindings without llama_set_n_threads keep their load-time count
+
+    def _run_scheduled(self, batch, runner, allow_boost=True):
+        threads, boosted, cpus = self.scheduling.plan(allow_boost)
+        # Prompt prefill may use every CPU when boosted; otherwise both
+        # phases stay within the planned count
+        self._set_threads(threads, (os.cpu_count() or threads) if boosted else threads)
+        self.last_schedule = {"threads": threads, "boosted": boosted, "cpus": cpus,
+                              "priority": "normal" if boosted else self.scheduling.priority}
+        if boosted or (self.scheduling.priority == "normal" and not cpus):
+            runner(batch)
+            return
+
+        # A lowered priority cannot be raised again without privileges, so a
+        # background batch runs on a short-lived thread of its own; the
+        # llama.cpp threads it starts inherit its priority and affinity.
+        def background():
+            self.scheduling.apply_background(cpus)
+            try:
+                runner(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+
+        thread = threading.Thread(target=background, name="llm-background", daemon=True)
+        thread.start()
+        thread.join()
+
+    def run_batch(self, batch):
+        """Run the pending queries one after another on the model"""
+        for request in batch:
+            request.full_prompt = self.build_prompt(request.user_prompt, request.system_prompt)
+
+        # Requests from the same session run together, and sorting by prompt
+        # text puts requests sharing the longest prefix next to each other, so
+        # llama.cpp's prefix reuse skips as much prefill as possible.
+        batch = sorted(batch, key=lambda r: (r.session_id != self._active_session,
+                                             str(r.session_id), r.full_prompt))
+        for request in batch:
+            try:
+                self._switch_session(request.session_id)
+                if self.routing_enabled and self.route(request) == "chat":
+                    request.text, request.usage = self._chat(request.full_prompt, request.queued_at)
+                    request.usage = dict(request.usage, route="chat")
+                else:
+                    request.text, request.usage = self._generate(request.full_prompt, request.queued_at)
+                    if self.routing_enabled:
+                        request.usage = dict(request.usage, route="tool")
+            except Exception as e:
+                request.error = e
+            finally:
+                request.done.set()
+
+    def run_prefills(self, prefills):
+        """Evaluate the newest draft of each session into its KV cache"""
+        latest = {}
+        for request in prefills:
+            latest[request.session_id] = request
+        for request in prefills:
+            if latest[request.session_id] is not request:
+                request.done.set()  # Superseded by a newer draft
+
+        for request in latest.values():
+            try:
+                self._switch_session(request.session_id)
+                request.evaluated = self._prefill(request.user_prompt, request.system_prompt)
+            except Exception as e:
+                request.error = e
+            finally:
+                request.done.set()
+
+    def _prefill(self, user_draft, system_prompt):
+        prefix = self.build_prompt_prefix(user_draft, system_prompt)
+        # The last token may merge with whatever is typed next
+        tokens = self.llm.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)[:-1]
+        shared = shared_prefix_length(self.llm._input_ids[:self.llm.n_tokens], tokens)
+        if shared == len(tokens):
+            return 0
+        # Roll an abandoned or edited draft back to the prefix it shares with
+        # this one; eval() drops the KV entries past n_tokens
+        self.llm.n_tokens = shared
+        self.llm.eval(tokens[shared:])
+        return len(tokens) - shared
+
+    def prime_prefix(self, static_system_prompt):
+        """Load the evaluated static prompt prefix from disk, or build and save it.
+
+        Snapshots are keyed by the model file hash and the prompt hash; a
+        snapshot that does not match this model, prompt or llama.cpp build is
+        rebuilt. Only the KV cache is stored, not the logits buffer, and the
+        snapshot directory is capped at SNAPSHOT_MAX_BYTES (least recently
+        used first out). Timings end up in last_prime. Returns True if a
+        snapshot was restored.
         """
-        # Construct Llama-3 specific prompt format (without duplicate begin_of_text)
-        full_prompt = f"<|start_header_id|>system<|end_header_id|>\n\n{system_prompt}<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n{user_prompt}<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+        self._static_prompt = static_system_prompt
+        if self.llm is None:
+            return False  # Primed by load() once the model is needed
+
+        start = time.perf_counter()
+        try:
+            with self._llm_lock:
+                # Drop the last token: it may merge with whatever follows the
+                # static prompt, and prefix matching would stop there anyway
+                tokens = self.llm.tokenize((SYSTEM_HEADER + static_system_prompt).encode("utf-8"),
+                                           add_bos=True, special=True)[:-1]
+                prompt_hash = hashlib.sha256(static_system_prompt.encode("utf-8")).hexdigest()
+                model_hash = model_fingerprint(self.model_path)
+                path = os.path.join(self.snapshot_dir, f"{model_hash[:16]}-{prompt_hash[:16]}.kvstate")
+                header = {
+                    "version": SNAPSHOT_VERSION,
+                    "model_sha256": model_hash,
+                    "prompt_sha256": prompt_hash,
+                    "llama_cpp": llama_cpp_version(),
+                    "n_ctx": self.n_ctx,
+                    "tokens": tokens,
+                }
+
+                if self._restore_snapshot(path, header):
+                    load_ms = (time.perf_counter() - start) * 1000
+                    self.last_prime = {"restored": True, "tokens": len(tokens), "load_ms": load_ms,
+                                       "bytes": os.path.getsize(path)}
+                    print(f"⚡ Restored prompt snapshot ({len(tokens)} tokens) in {load_ms:.0f} ms")
+                    return True
+
+                self.llm.reset()
+                self.llm.eval(tokens)
+                prefill_ms = (time.perf_counter() - start) * 1000
+                self._save_snapshot(path, header, self.llm.save_state())
+                self.last_prime = {"restored": False, "tokens": len(tokens), "prefill_ms": prefill_ms,
+                                   "save_ms": (time.perf_counter() - start) * 1000 - prefill_ms,
+                                   "bytes": os.path.getsize(path)}
+                print(f"⚡ Built prompt snapshot ({len(tokens)} tokens) in "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms")
+                return False
+        except Exception as e:
+            print(f"⚠️ Prompt snapshot unavailable: {e}")
+            return False
+
+    def _restore_snapshot(self, path, header):
+        try:
+            with open(path, "rb") as f:
+                saved_header, saved = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"⚠️ Discarding unreadable prompt snapshot: {e}")
+            return False
+
+        if saved_header != header:
+            print("⚠️ Prompt snapshot is stale, rebuilding")
+            return False
+
+        import numpy as np
+        from llama_cpp import LlamaState
+
+        # The token buffer is rebuilt from the header; the logits are not
+        # needed, since the next decode evaluates at least one token anyway
+        n_tokens = len(header["tokens"])
+        input_ids = np.zeros(self.n_ctx, dtype=np.intc)
+        input_ids[:n_tokens] = header["tokens"]
+        self.llm.load_state(LlamaState(
+            input_ids=input_ids,
+            scores=np.zeros((1, self.llm.n_vocab()), dtype=np.single),
+            n_tokens=n_tokens,
+            llama_state=saved["llama_state"],
+            llama_state_size=saved["llama_state_size"],
+            seed=saved["seed"],
+        ))
+        os.utime(path)  # Most recently used, for eviction
+        return True
+
+    def _save_snapshot(self, path, header, state):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        saved = {
+            "llama_state": state.llama_state,
+            "llama_state_size": state.llama_state_size,
+            "seed": getattr(state, "seed", None),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((header, saved), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        prune_snapshots(self.snapshot_dir, keep=path)
+
+    def _switch_session(self, session_id):
+        """Swap the KV cache to the given session's slot if it has one"""
+        if session_id == self._active_session:
+            return
+
+        if self._active_session is not None:
+            self._session_slots[self._active_session] = self.llm.save_state()
+            self._session_slots.move_to_end(self._active_session)
+            used = sum(state_bytes(state) for state in self._session_slots.values())
+            while self._session_slots and used > self.max_session_bytes:
+                used -= state_bytes(self._session_slots.popitem(last=False)[1])
+
+        state = self._session_slots.pop(session_id, None) if session_id is not None else None
+        if state is not None:
+            self.llm.load_state(state)
+        self._active_session = session_id
+
+    def drop_session(self, session_id):
+        """Free the KV slot of a closed session"""
+        self._session_slots.pop(session_id, None)
+
+    def cache_stats(self):
+        """Saved session KV slots, the tokens in the live context and the snapshots on disk"""
+        slots = tuple(self._session_slots.values())
+        llm = self.llm
+        return {
+            "session_slots": len(slots),
+            "slot_bytes": sum(state_bytes(state) for state in slots),
+            "context_tokens": llm.n_tokens if llm is not None else 0,
+            "snapshot_disk_bytes": sum(size for _, size, _ in snapshot_files(self.snapshot_dir)),
+        }
+
+    def route(self, request):
+        """First stage: decide whether a request is a "tool" call or a "chat" """
+        if self.router_model_path:
+            router = self.pool.get(self.router_model_path)
+            output = router(
+                self.build_prompt(request.user_prompt, ROUTER_SYSTEM_PROMPT),
+                max_tokens=2,
+                grammar=self.route_grammar,
+                temperature=0.0
+            )
+            return "tool" if output['choices'][0]['text'].startswith("tool") else "chat"
+
+        # Without a router model, decode one grammar-constrained token on the
+        # tool model. A tool call must open with "{"; the prompt stays in the
+        # KV cache, so a following tool decode does not prefill it again.
+        output = self.llm(request.full_prompt, max_tokens=1, grammar=self.tool_grammar, temperature=0.0)
+        return "tool" if output['choices'][0]['text'].lstrip().startswith("{") else "chat"
+
+    @staticmethod
+    def _first_token_timer(queued_at, timing):
+        """Logits processor recording when the first token is sampled, after the prompt is evaluated"""
+        from llama_cpp import LogitsProcessorList
+
+        def record(input_ids, scores):
+            if "first_token_ms" not in timing:
+                timing["first_token_ms"] = round((time.perf_counter() - queued_at) * 1000, 3)
+            return scores
+
+        return LogitsProcessorList([record])
+
+    def _chat(self, full_prompt, queued_at=None):
+        chat_llm = self.pool.get(self.chat_model_path)
+        timing = {}
+        output = chat_llm(
+            full_prompt,
+            max_tokens=512,
+            stop=["<|eot_id|>"],
+            grammar=self.chat_grammar,
+            temperature=0.7,
+            logits_processor=self._first_token_timer(queued_at or time.perf_counter(), timing)
+        )
+        return output['choices'][0]['text'], dict(output.get('usage', {}), **timing)
 
+    def _generate(self, full_prompt, queued_at=None):
+        timing = {}
         output = self.llm(
             full_prompt,
             max_tokens=256,
             stop=["<|eot_id|>"],
             grammar=self.tool_grammar,  # <--- UNCOMMENT THIS
-            temperature=0.1  # Low temperature for factual tool use
+            temperature=0.1,  # Low temperature for factual tool use
+            # Enter-to-first-token latency, reported in the usage
+            logits_processor=self._first_token_timer(queued_at or time.perf_counter(), timing)
         )
 
         # The result is GUARANTEED to be JSON due to the grammar
-        return output['choices'][0]['text']
+        return output['choices'][0]['text'], dict(output.get('usage', {}), **timing)
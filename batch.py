@@ -0,0 +1,194 @@
+"""Batch prompt mode for offline throughput and accuracy runs.
+
+Input is JSONL with one request per line:
+
+    {"prompt": "open firefox", "expected_tool": "open_app",
+     "expected_parameters": {"app_name": "firefox"}}
+
+`expected_tool` is optional; use null to label a prompt that should get a
+conversational answer. Results are written as JSONL, one line per input line,
+and both files are streamed so corpora of any size run in constant memory.
+"""
+import json
+import sys
+import time
+
+
+class BatchStats:
+    """Running totals for a batch run"""
+
+    def __init__(self):
+        self.prompts = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.inference_time = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.labelled = 0
+        self.tool_correct = 0
+        self.call_correct = 0
+
+    def add(self, record):
+        """Fold one result record into the totals"""
+        self.prompts += 1
+        self.elapsed += record["elapsed_ms"] / 1000
+        if record.get("error"):
+            self.errors += 1
+
+        if record["completion_tokens"]:
+            self.inference_time += record["elapsed_ms"] / 1000
+            self.prompt_tokens += record["prompt_tokens"]
+            self.completion_tokens += record["completion_tokens"]
+
+        if record["tool_correct"] is not None:
+            self.labelled += 1
+            self.tool_correct += record["tool_correct"]
+            self.call_correct += record["call_correct"]
+
+    def summary(self, wall_time):
+        """Format the aggregate throughput and accuracy report"""
+        lines = [
+            f"Prompts: {self.prompts} ({self.errors} errors) in {wall_time:.2f}s",
+            f"Throughput: {self.prompts / wall_time if wall_time > 0 else 0:.2f} prompts/sec",
+        ]
+        if self.inference_time > 0:
+            lines.append(
+                f"Tokens: {self.prompt_tokens} prompt, {self.completion_tokens} completion, "
+                f"{self.completion_tokens / self.inference_time:.1f} completion tokens/sec"
+            )
+        if self.labelled:
+            lines.append(
+                f"Tool accuracy: {self.tool_correct}/{self.labelled} "
+                f"({100 * self.tool_correct / self.labelled:.1f}%), "
+                f"exact call: {self.call_correct}/{self.labelled} "
+                f"({100 * self.call_correct / self.labelled:.1f}%)"
+            )
+        return "\n".join(lines)
+
+
+def _normalize(value):
+    """Compare labels case-insensitively and ignore surrounding whitespace"""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def score_tool_call(tool_call, item):
+    """Return (tool_correct, call_correct) for a labelled item, or (None, None)"""
+    if "expected_tool" not in item:
+        return None, None
+
+    expected_tool = item["expected_tool"]
+    actual_tool = tool_call["tool"] if tool_call else None
+    tool_correct = _normalize(actual_tool) == _normalize(expected_tool)
+
+    call_correct = tool_correct
+    if tool_correct and "expected_parameters" in item:
+        actual_params = tool_call["parameters"] if tool_call else {}
+        call_correct = _normalize(actual_params) == _normalize(item["expected_parameters"])
+
+    return tool_correct, call_correct
+
+
+def run_one(app, item):
+    """Process a single batch item and return its result record"""
+    engine = app.ai_engine
+    if engine is not None:
+        engine.last_usage = {}
+
+    error = None
+    start = time.perf_counter()
+    try:
+        response = app.process_user_input(item["prompt"])
+    except Exception as e:
+        response = None
+        error = str(e)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    usage = (getattr(engine, "last_usage", None) or {}) if engine is not None else {}
+    tool_call = app.last_tool_call
+    tool_correct, call_correct = score_tool_call(tool_call, item)
+
+    return {
+        "id": item.get("id"),
+        "prompt": item["prompt"],
+        "tool_call": tool_call,
+        "response": response,
+        "error": error,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "route": usage.get("route"),  # "tool" or "chat" with a chat model, else None
+        "tool_correct": tool_correct,
+        "call_correct": call_correct,
+    }
+
+
+def invalid_record(line_number, error):
+    """Result record for an input line that is not a batch item"""
+    return {
+        "id": line_number,
+        "prompt": None,
+        "tool_call": None,
+        "response": None,
+        "error": error,
+        "elapsed_ms": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "route": None,
+        "tool_correct": None,
+        "call_correct": None,
+    }
+
+
+def iter_batch_items(lines):
+    """Yield (item, None) per JSONL line, accepting bare strings as prompts.
+
+    Lines that are not valid items yield (None, error record) instead, so
+    one bad line does not end the run.
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield None, invalid_record(line_number, f"Line {line_number}: invalid JSON: {e}")
+            continue
+        if isinstance(item, str):
+            item = {"prompt": item}
+        if not isinstance(item, dict) or "prompt" not in item:
+            yield None, invalid_record(line_number, f"Line {line_number}: expected an object with a 'prompt' field")
+            continue
+        item.setdefault("id", line_number)
+        yield item, None
+
+
+def run_batch(app, input_path, output_path, progress_every=100):
+    """Stream prompts from input_path through the app and write JSONL results"""
+    stats = BatchStats()
+    wall_start = time.perf_counter()
+
+    infile = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    outfile = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        for item, record in iter_batch_items(infile):
+            if item is not None:
+                record = run_one(app, item)
+            stats.add(record)
+            outfile.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            if progress_every and stats.prompts % progress_every == 0:
+                outfile.flush()
+                print(f"... {stats.prompts} prompts", file=sys.stderr)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    return stats, time.perf_counter() - wall_start
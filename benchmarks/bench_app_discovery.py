@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Application discovery wall time on a synthetic tree of desktop files.
+
+Builds --files desktop entries (default 10,000) spread over XDG, Flatpak and
+Snap style directories. About one in ten is shadowed by a user entry with the
+same ID, and there are translations, [Desktop Action] groups, and Hidden,
+OnlyShowIn and TryExec entries. It then times:
+
+    regex        the old per-file whole-file regex scan (for reference)
+    inline       desktop_entries parser, one process
+    pool         desktop_entries parser on a process pool (--workers)
+
+Runs are warm (page cache hot), which is the common case after login.
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import desktop_entries
+
+LANGUAGES = ["de", "fr", "es", "it", "pt_BR", "ja", "zh_CN", "ru", "pl", "nl", "sv", "cs"]
+
+
+def entry_text(i, name):
+    lines = ["[Desktop Entry]", "Type=Application", f"Name={name}", f"GenericName=Tool number {i}",
+             f"Comment=Does thing {i} with files", f"Keywords=tool;thing{i};utility;",
+             f'Exec=/usr/bin/app{i} --profile "My Profile" %U', "Icon=app", "Categories=Utility;"]
+    lines += [f"Name[{lang}]={name} ({lang})" for lang in LANGUAGES]
+    lines += [f"Comment[{lang}]=Translated comment {i}" for lang in LANGUAGES]
+    if i % 17 == 0:
+        lines.append("OnlyShowIn=KDE;")
+    if i % 23 == 0:
+        lines.append("TryExec=/nonexistent/app")
+    if i % 29 == 0:
+        lines.append("NoDisplay=true")
+    lines += ["Actions=new-window;", "", "[Desktop Action new-window]", "Name=New Window",
+              f"Exec=/usr/bin/app{i} --new-window"]
+    return "\n".join(lines) + "\n"
+
+
+def build_tree(root, count):
+    dirs = [os.path.join(root, "usr/share/applications"),
+            os.path.join(root, "usr/local/share/applications"),
+            os.path.join(root, "flatpak/exports/share/applications"),
+            os.path.join(root, "snap/applications"),
+            os.path.join(root, "home/applications")]
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+    for i in range(count):
+        directory = dirs[i % 4]
+        with open(os.path.join(directory, f"org.example.App{i}.desktop"), "w") as f:
+            f.write(entry_text(i, f"App {i}"))
+        if i % 10 == 0:  # User override of the same ID, sometimes hiding it
+            with open(os.path.join(dirs[4], f"org.example.App{i}.desktop"), "w") as f:
+                f.write("[Desktop Entry]\nHidden=true\n" if i % 20 == 0 else entry_text(i, f"My App {i}"))
+    # Precedence order: the user's directory first
+    return [dirs[4]] + dirs[:4]
+
+
+def regex_scan(dirs):
+    apps = []
+    for directory in dirs:
+        for file in os.listdir(directory):
+            if file.endswith('.desktop'):
+                with open(os.path.join(directory, file), 'r', encoding='utf-8') as f:
+                    content = f.read()
+                name_match = re.search(r'^Name=(.+)$', content, re.MULTILINE)
+                exec_match = re.search(r'^Exec=(.+)$', content, re.MULTILINE)
+                no_display = re.search(r'^NoDisplay=true$', content, re.MULTILINE)
+                generic_match = re.search(r'^GenericName=(.+)$', content, re.MULTILINE)
+                comment_match = re.search(r'^Comment=(.+)$', content, re.MULTILINE)
+                keywords_match = re.search(r'^Keywords=(.+)$', content, re.MULTILINE)
+                if name_match and exec_match and not no_display:
+                    apps.append({'name': name_match.group(1).strip(),
+                                 'exec': exec_match.group(1).strip().split()[0], 'desktop_file': file,
+                                 'generic_name': generic_match.group(1).strip() if generic_match else '',
+                                 'comment': comment_match.group(1).strip() if comment_match else '',
+                                 'keywords': keywords_match.group(1).strip() if keywords_match else ''})
+    return apps
+
+
+def timed(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 8))
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench-apps-")
+    try:
+        dirs = build_tree(root, args.files)
+        files = sum(len(os.listdir(d)) for d in dirs)
+        kwargs = {"locales": desktop_entries.locale_variants("de_DE.UTF-8"), "desktops": ["GNOME"]}
+
+        regex_ms, regex_apps = timed(lambda: regex_scan(dirs), args.runs)
+        inline_ms, (apps, _) = timed(lambda: desktop_entries.discover_applications(dirs, workers=1, **kwargs),
+                                     args.runs)
+        minimum = desktop_entries.PARALLEL_MIN_ENTRIES
+        desktop_entries.PARALLEL_MIN_ENTRIES = 0
+        pool_ms, (pool_apps, _) = timed(
+            lambda: desktop_entries.discover_applications(dirs, workers=args.workers, **kwargs), args.runs)
+        desktop_entries.PARALLEL_MIN_ENTRIES = minimum
+        assert [a.desktop_file for a in pool_apps] == [a.desktop_file for a in apps]
+
+        print(f"{files:,} desktop files in {len(dirs)} directories")
+        print(f"regex (old):        {regex_ms:8.1f} ms  {len(regex_apps):6,} apps (duplicates, hidden and "
+              f"other desktops included)")
+        print(f"parser inline:      {inline_ms:8.1f} ms  {len(apps):6,} apps "
+              f"({sum(a.no_display for a in apps):,} NoDisplay, launchable by name only)")
+        print(f"parser, {args.workers} workers:  {pool_ms:8.1f} ms  {len(pool_apps):6,} apps "
+              f"(pool start-up included)")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compare client-perceived latency of the cold CLI path against the daemon.
+
+Cold path: a new `main.py --test --prompt` process per request.
+Warm path: a new `daemon.py` client process per request against one daemon.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(cmd, runs):
+    """Run a command several times and return the wall times in ms"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<8} mean {statistics.mean(timings):9.1f} ms   "
+          f"p50 {statistics.median(timings):9.1f} ms   max {max(timings):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompt', default='help', help='Prompt to send (default hits the fast path)')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="ai_assistant_bench_"), "daemon.sock")
+
+    cold = time_command([sys.executable, "main.py", "--test", "--prompt", args.prompt], args.runs)
+
+    daemon = subprocess.Popen(
+        [sys.executable, "main.py", "--daemon", "--socket", socket_path],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Wait for the daemon to finish loading the model and bind the socket
+        sys.path.insert(0, REPO_ROOT)
+        from daemon import is_daemon_running
+        start = time.perf_counter()
+        while not is_daemon_running(socket_path):
+            if daemon.poll() is not None:
+                sys.exit("❌ Daemon exited during startup")
+            time.sleep(0.1)
+        print(f"Daemon ready after {time.perf_counter() - start:.1f}s")
+
+        warm = time_command([sys.executable, "daemon.py", "--socket", socket_path, args.prompt], args.runs)
+    finally:
+        subprocess.run([sys.executable, "daemon.py", "--socket", socket_path, "--shutdown"],
+                       cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        daemon.wait(timeout=30)
+
+    print(f"Prompt: {args.prompt!r}, {args.runs} runs each")
+    report("cold", cold)
+    report("daemon", warm)
+    print(f"Speedup: {statistics.mean(cold) / statistics.mean(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
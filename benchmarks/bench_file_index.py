@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Indexing throughput and query latency of the file index on a large tree.
+
+Builds a synthetic tree (default 1M files in 1000 files per directory,
+three levels deep) once, then measures:
+
+- a full crawl into an empty index,
+- a re-crawl with nothing changed (what a restart costs),
+- search latency for exact, multi-word and misspelled queries,
+
+and compares the query latency with walking the tree for a name match.
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_index import FileIndex, FileIndexer
+
+WORDS = ["invoice", "report", "thesis", "holiday", "budget", "photo", "draft", "notes",
+         "contract", "slides", "backup", "recipe", "receipt", "letter", "scan", "summary"]
+QUERIES = ["invoice 2024", "thesis draft", "holiday photo", "budget", "recipt", "contrcat scan",
+           "slides folder", "summary notes"]
+
+
+def build_tree(root, files, per_dir=1000):
+    """Create empty files named from WORDS, per_dir to a directory"""
+    rng = random.Random(42)
+    created = 0
+    while created < files:
+        d = created // per_dir
+        directory = os.path.join(root, f"{rng.choice(WORDS)}-{d // 100}", f"{rng.choice(WORDS)}-{d}")
+        os.makedirs(directory, exist_ok=True)
+        for _ in range(min(per_dir, files - created)):
+            name = f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{2000 + created % 30}-{created}.pdf"
+            os.close(os.open(os.path.join(directory, name), os.O_CREAT | os.O_WRONLY, 0o644))
+            created += 1
+
+
+def walk_search(root, term):
+    return [os.path.join(d, f) for d, _, names in os.walk(root) for f in names if term in f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=1_000_000)
+    parser.add_argument('--dir', type=str, help='Tree location (kept); default: a temporary directory')
+    parser.add_argument('--cpu-share', type=float, default=1.0, help='Indexer throttle (1.0 = unthrottled)')
+    parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+    args = parser.parse_args()
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix="bench_file_index_")
+    root = os.path.join(work_dir, "tree")
+    try:
+        if not os.path.isdir(root):
+            start = time.perf_counter()
+            build_tree(root, args.files)
+            print(f"Built {args.files:,} files in {time.perf_counter() - start:.1f}s")
+
+        db_path = os.path.join(work_dir, "files.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        index = FileIndex(db_path)
+
+        indexer = FileIndexer(index, [root], cpu_share=args.cpu_share, watch=False, include_hidden=True)
+        indexer.crawl()
+        print(f"Full crawl:  {indexer.entries_written:,} entries in {indexer.crawl_time:.1f}s "
+              f"({indexer.entries_written / indexer.crawl_time:,.0f} entries/s, "
+              f"index {os.path.getsize(db_path) / 1024 ** 2:.0f} MB)")
+
+        indexer = FileIndexer(index, [root], watch=False, include_hidden=True)
+        indexer.crawl()
+        print(f"Re-crawl:    {indexer.crawl_time * 1000:.0f} ms "
+              f"({indexer.dirs_skipped:,} unchanged directories skipped)")
+
+        print(f"{'query':<16} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8}")
+        all_times = []
+        for query in QUERIES:
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                results = index.search(query, limit=10)
+                times.append((time.perf_counter() - start) * 1000)
+            all_times.extend(times)
+            times.sort()
+            print(f"{query:<16} {len(results):>5} {statistics.median(times):>8.2f} "
+                  f"{times[int(len(times) * 0.95) - 1]:>8.2f}")
+        print(f"Mean query latency: {statistics.mean(all_times):.2f} ms")
+
+        start = time.perf_counter()
+        walk_search(root, "invoice")
+        print(f"os.walk name search for comparison: {(time.perf_counter() - start) * 1000:.0f} ms")
+        index.close()
+    finally:
+        if not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
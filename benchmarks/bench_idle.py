@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""RSS over a simulated workday with and without idle unloading.
+
+A workday is compressed so that one simulated minute takes --minute
+seconds. Bursts of requests are separated by idle gaps; the idle timeout is
+scaled the same way. RSS is sampled every simulated minute, and the latency
+of every reload (preload on focus, or on the first request) is recorded.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import IdlePolicy, LocalLLMEngine
+
+SYSTEM_PROMPT = "You are a helpful desktop assistant."
+
+# (minutes idle before the burst, requests in the burst)
+WORKDAY = [(0, 3), (25, 2), (90, 1), (5, 4), (60, 1), (180, 2), (10, 1), (120, 3)]
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def simulate(engine, minute, preload):
+    samples, reloads = [], []
+    for idle_minutes, requests in WORKDAY:
+        for _ in range(idle_minutes):
+            time.sleep(minute)
+            engine.check_idle()
+            samples.append(rss_mb())
+
+        if preload and not engine.is_loaded:
+            # The user focuses the entry a few seconds before pressing Enter
+            engine.preload_async()
+
+        for _ in range(requests):
+            was_loaded = engine.is_loaded
+            start = time.perf_counter()
+            engine.query("open firefox", SYSTEM_PROMPT)
+            if not was_loaded:
+                reloads.append((time.perf_counter() - start) * 1000)
+            samples.append(rss_mb())
+    return samples, reloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--minute', type=float, default=0.02, help='Seconds per simulated minute')
+    parser.add_argument('--idle-minutes', type=int, default=15, help='Simulated idle timeout')
+    args = parser.parse_args()
+
+    for label, timeout, preload in (("always resident", 0, False),
+                                    ("idle unload", args.idle_minutes * args.minute, False),
+                                    ("idle unload + preload", args.idle_minutes * args.minute, True)):
+        engine = LocalLLMEngine(idle_policy=IdlePolicy(idle_timeout=timeout))
+        samples, reloads = simulate(engine, args.minute, preload)
+        reload_text = f"{len(reloads)} reloads, mean {statistics.mean(reloads):.0f} ms" if reloads else "no reloads"
+        print(f"{label:<22} RSS mean {statistics.mean(samples):7.1f} MB  peak {max(samples):7.1f} MB  "
+              f"min {min(samples):7.1f} MB  {reload_text} (full load {engine.last_load_time * 1000:.0f} ms)")
+        engine.unload("benchmark finished")
+
+
+if __name__ == "__main__":
+    main()
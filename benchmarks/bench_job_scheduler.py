@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Idle CPU with thousands of pending scheduled jobs.
+
+For each job count, a jobs file is written with that many jobs spread over
+the next 30 days plus one due after --fire-after seconds, as after a
+restart. The scheduler loads it and starts; once the due job has run (and
+the schedule was saved), the process sits idle for --seconds. Reported:
+load time, how late the due job ran, and process CPU time and timer wakeups
+during the idle window.
+
+The baseline is the obvious alternative: a thread polling every
+--poll-interval seconds and scanning all jobs for due ones.
+
+    python3 benchmarks/bench_job_scheduler.py [--jobs 100,1000,10000] [--seconds 10] [--backend thread|glib]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import GLibTimer, Job, JobScheduler, ThreadTimer
+
+
+def write_jobs(path, count, fire_after):
+    now = time.time()
+    rng = random.Random(count)
+    jobs = [Job(i + 1, now + rng.uniform(3600, 30 * 86400), "notify", {"message": f"job {i}"},
+                rng.choice([None, 3600, 86400])).to_dict() for i in range(count)]
+    jobs.append(Job(count + 1, now + fire_after, "notify", {"message": "due"}).to_dict())
+    with open(path, "w") as f:
+        json.dump({"version": 1, "next_id": count + 2, "jobs": jobs}, f)
+
+
+def idle(seconds, backend):
+    if backend == "glib":
+        from gi.repository import GLib
+        loop = GLib.MainLoop()
+        GLib.timeout_add(int(seconds * 1000), loop.quit)
+        loop.run()
+    else:
+        time.sleep(seconds)
+
+
+def run_scheduler(path, seconds, fire_after, backend):
+    lateness = []
+    wakeups = [0]
+
+    class CountingScheduler(JobScheduler):
+        def run_due(self):
+            wakeups[0] += 1
+            return super().run_due()
+
+    start = time.perf_counter()
+    scheduler = CountingScheduler(runner=lambda job: lateness.append(time.time() - job.due), path=path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    scheduler.start(GLibTimer if backend == "glib" else ThreadTimer)
+    idle(fire_after + 0.5, backend)
+    wakeups[0] = 0
+    cpu = time.process_time()
+    idle(seconds, backend)
+    cpu = time.process_time() - cpu
+    scheduler.stop()
+    return {"load_ms": load_ms, "cpu_ms": cpu * 1000, "wakeups": wakeups[0],
+            "late_ms": lateness[0] * 1000 if lateness else float("nan")}
+
+
+def run_poller(path, seconds, fire_after, interval):
+    start = time.perf_counter()
+    with open(path) as f:
+        jobs = [Job.from_dict(item) for item in json.load(f)["jobs"]]
+    load_ms = (time.perf_counter() - start) * 1000
+    lateness = []
+    wakeups = [0]
+    stop = threading.Event()
+
+    def poll():
+        while not stop.wait(interval):
+            wakeups[0] += 1
+            now = time.time()
+            for job in [job for job in jobs if job.due <= now]:
+                lateness.append(now - job.due)
+                if job.interval:
+                    job.due += job.interval
+                else:
+                    jobs.remove(job)
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    time.sleep(fire_after + 0.5)
+    wakeups[0] = 0
+    cpu = time.process_time()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    cpu = time.process_time() - cpu
+    return {"load_ms": load_ms, "cpu_ms": cpu * 1000, "wakeups": wakeups[0],
+            "late_ms": lateness[0] * 1000 if lateness else float("nan")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=str, default="100,1000,10000", help='Comma-separated job counts')
+    parser.add_argument('--seconds', type=float, default=10.0, help='Idle time measured per run')
+    parser.add_argument('--fire-after', type=float, default=2.0, help='Seconds until the one due job')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--backend', choices=['thread', 'glib'], default='thread')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "jobs.json")
+        for count in (int(n) for n in args.jobs.split(",")):
+            for name in (f"scheduler ({args.backend})", f"polling every {args.poll_interval:g}s"):
+                write_jobs(path, count, args.fire_after)
+                if name.startswith("scheduler"):
+                    report = run_scheduler(path, args.seconds, args.fire_after, args.backend)
+                else:
+                    report = run_poller(path, args.seconds, args.fire_after, args.poll_interval)
+                print(f"{count:6d} jobs  {name:22}  load {report['load_ms']:7.1f} ms  "
+                      f"due job ran {report['late_ms']:6.1f} ms late  idle CPU {report['cpu_ms'] / args.seconds:7.2f} ms/s  "
+                      f"{report['wakeups']:3d} wakeups")
+
+
+if __name__ == "__main__":
+    main()
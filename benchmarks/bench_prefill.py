@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Enter-to-first-token latency with and without speculative prefill.
+
+Each prompt is "typed" at --char-ms per character with a pause after every
+word, the way the GUI sees it: when a pause is longer than the debounce
+delay, the draft so far is handed to LocalLLMEngine.prefill. Pressing Enter
+sends the query; the time until the first token is sampled is taken from the
+engine's usage (first_token_ms). One prompt is edited halfway to exercise the
+rollback to the shared prefix. Every query carries the conversation so far,
+so without prefill the history has to be evaluated on Enter as well.
+
+    python3 benchmarks/bench_prefill.py [--rounds 3] [--char-ms 80] [--pause-ms 400]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant import SYSTEM_PROMPT
+
+DEBOUNCE_MS = 250  # As in gui.py
+
+PROMPTS = [
+    "open firefox",
+    "what is the difference between RAM and storage?",
+    "show me the processes using the most memory",
+    "close the terminal window",
+    "where did I put my tax return from last year",
+]
+# (typed, then erased back to, then typed): an edited draft
+EDITED = ("open the file browser in", "open the ", "terminal please")
+
+
+def drafts(text, start=""):
+    """The drafts the debounce would emit: one per word boundary"""
+    words = text.split(" ")
+    typed = start
+    for i, word in enumerate(words):
+        typed += word + (" " if i < len(words) - 1 else "")
+        yield typed
+
+
+def make_typist(engine, system_prompt, speculative, char_ms, pause_ms):
+    """A function typing text at the given speed, returning the final draft"""
+    def pause(draft):
+        if pause_ms >= DEBOUNCE_MS:
+            time.sleep(DEBOUNCE_MS / 1000)
+            if speculative:
+                engine.prefill(draft, system_prompt)
+            time.sleep((pause_ms - DEBOUNCE_MS) / 1000)
+
+    def type_text(text, start=""):
+        previous = start
+        for draft in drafts(text, start):
+            time.sleep(char_ms * (len(draft) - len(previous)) / 1000)
+            previous = draft
+            pause(draft)
+        return previous
+
+    return type_text
+
+
+def run(engine, rounds, speculative, char_ms, pause_ms):
+    history = []
+    latencies = []
+    for _ in range(rounds):
+        for index in range(len(PROMPTS) + 1):
+            system_prompt = SYSTEM_PROMPT
+            if history:
+                lines = ["CONVERSATION HISTORY:"]
+                for i, (user, ai) in enumerate(history[-5:], 1):
+                    lines += [f"Exchange {i}:", f"User: {user}", f"AI: {ai}", ""]
+                system_prompt += "\n" + "\n".join(lines)
+
+            type_text = make_typist(engine, system_prompt, speculative, char_ms, pause_ms)
+            if index < len(PROMPTS):
+                prompt = type_text(PROMPTS[index])
+            else:
+                typed, kept, rest = EDITED
+                type_text(typed)
+                time.sleep(char_ms * (len(typed) - len(kept)) / 1000)  # Backspacing
+                prompt = type_text(rest, kept)
+
+            response = engine.query(prompt.strip(), system_prompt)
+            latencies.append(engine.last_usage.get("first_token_ms", float("nan")))
+            history.append((prompt.strip(), response.strip()[:200]))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--char-ms', type=float, default=80.0, help='Time per typed character')
+    parser.add_argument('--pause-ms', type=float, default=400.0, help='Pause after each word')
+    parser.add_argument('--model', type=str, default="Llama-3.2-1B-Instruct-Q6_K.gguf")
+    args = parser.parse_args()
+
+    from ai_engine import LocalLLMEngine
+
+    engine = LocalLLMEngine(args.model)
+    engine.prime_prefix(SYSTEM_PROMPT)
+
+    for speculative in (False, True):
+        latencies = run(engine, args.rounds, speculative, args.char_ms, args.pause_ms)
+        latencies.sort()
+        print(f"{'speculative prefill' if speculative else 'prefill on Enter':20}  "
+              f"Enter-to-first-token mean {statistics.mean(latencies):7.1f} ms  "
+              f"p50 {statistics.median(latencies):7.1f} ms  "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms  ({len(latencies)} prompts)")
+
+
+if __name__ == "__main__":
+    main()
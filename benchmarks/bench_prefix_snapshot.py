@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""First-query latency after a restart, with and without the prompt snapshot.
+
+Each measurement runs in a fresh process: load the engine, prime the static
+prompt prefix, then answer one query. "cold" starts from an empty snapshot
+directory; "snapshot" reuses the one written by the cold run. Priming is
+split into evaluating the prefix (cold) or loading it from disk (snapshot),
+next to the snapshot file size.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def child(snapshot_dir, prompt):
+    from ai_engine import LocalLLMEngine
+    from assistant import SYSTEM_PROMPT
+
+    start = time.perf_counter()
+    engine = LocalLLMEngine(snapshot_dir=snapshot_dir)
+    loaded = time.perf_counter()
+    engine.prime_prefix(SYSTEM_PROMPT)
+    primed = time.perf_counter()
+    engine.query(prompt, SYSTEM_PROMPT)
+    answered = time.perf_counter()
+
+    prime = engine.last_prime
+    print(json.dumps({
+        "prefill_ms": prime.get("prefill_ms", 0.0),
+        "save_ms": prime.get("save_ms", 0.0),
+        "restore_ms": prime.get("load_ms", 0.0),
+        "snapshot_mb": prime.get("bytes", 0) / (1024 * 1024),
+        "load_ms": (loaded - start) * 1000,
+        "prime_ms": (primed - loaded) * 1000,
+        "first_query_ms": (answered - primed) * 1000,
+        "total_ms": (answered - start) * 1000,
+    }))
+
+
+def measure(snapshot_dir, prompt):
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", "--snapshot-dir", snapshot_dir, "--prompt", prompt],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--prompt', default='open firefox')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--snapshot-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.snapshot_dir, args.prompt)
+        return
+
+    for run in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="ai_assistant_kv_") as snapshot_dir:
+            cold = measure(snapshot_dir, args.prompt)
+            warm = measure(snapshot_dir, args.prompt)
+        for label, result in (("cold", cold), ("snapshot", warm)):
+            print(f"run {run + 1} {label:<9} load {result['load_ms']:7.0f} ms  "
+                  f"prime {result['prime_ms']:7.0f} ms  first query {result['first_query_ms']:7.0f} ms  "
+                  f"total {result['total_ms']:7.0f} ms")
+        print(f"run {run + 1} prefix    prefill {cold['prefill_ms']:7.0f} ms (+ save {cold['save_ms']:.0f} ms)  "
+              f"vs. load {warm['restore_ms']:7.0f} ms  snapshot {cold['snapshot_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Process-table scan cost with thousands of processes.
+
+Forks --spawn idle children (default 3000) so the table is as large as on a
+busy machine, then compares:
+
+- ProcessTable: one /proc/<pid>/stat read per process, CPU deltas against
+  the cached previous snapshot, heap top-N
+- naive: /proc/<pid>/status and statm parsed per process, two scans with a
+  sleep in between for CPU usage, full sort
+"""
+import argparse
+import heapq
+import os
+import signal
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processes import ProcessTable, PAGE_SIZE
+
+
+def spawn_children(count):
+    pids = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            signal.pause()
+            os._exit(0)
+        pids.append(pid)
+    return pids
+
+
+def naive_scan():
+    table = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+            with open(f'/proc/{name}/statm') as f:
+                rss = int(f.read().split()[1]) * PAGE_SIZE
+            with open(f'/proc/{name}/stat') as f:
+                fields = f.read().rpartition(')')[2].split()
+            table[int(name)] = (status['Name'].strip(), rss, int(fields[11]) + int(fields[12]))
+        except (OSError, KeyError, ValueError, IndexError):
+            continue
+    return table
+
+
+def naive_top(n):
+    before = naive_scan()
+    time.sleep(0.1)
+    after = naive_scan()
+    rows = [(pid, name, rss, ticks - before.get(pid, (None, 0, ticks))[2])
+            for pid, (name, rss, ticks) in after.items()]
+    return sorted(rows, key=lambda row: row[3], reverse=True)[:n]
+
+
+def timed(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.mean(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--spawn', type=int, default=3000, help='Idle child processes to create')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    children = spawn_children(args.spawn)
+    try:
+        table = ProcessTable(min_interval=0.0, max_age=0.0)
+        table.scan()
+        count = len(table.snapshot)
+        print(f"{count:,} processes in /proc")
+
+        # A fresh snapshot per call, as when the tool is asked repeatedly
+        scan_mean, scan_p95 = timed(lambda: table.top(args.top, sort_by="cpu"), args.runs)
+        snapshot = table.snapshot
+
+        heap_mean, _ = timed(lambda: heapq.nlargest(args.top, snapshot.processes.values(),
+                                                    key=lambda p: p.rss_bytes), args.runs * 10)
+        sort_mean, _ = timed(lambda: sorted(snapshot.processes.values(),
+                                            key=lambda p: p.rss_bytes, reverse=True)[:args.top], args.runs * 10)
+        naive_mean, naive_p95 = timed(lambda: naive_top(args.top), max(3, args.runs // 4))
+
+        print(f"ProcessTable top-{args.top}:   mean {scan_mean:7.1f} ms  p95 {scan_p95:7.1f} ms  "
+              f"({scan_mean * 1000 / count:.1f} µs per process)")
+        print(f"naive (sleep + sort):  mean {naive_mean:7.1f} ms  p95 {naive_p95:7.1f} ms")
+        print(f"top-{args.top} selection:       heap {heap_mean * 1000:.0f} µs  vs full sort {sort_mean * 1000:.0f} µs")
+    finally:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
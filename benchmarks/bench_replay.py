@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Full-pipeline throughput on a recorded cassette, with no model loaded.
+
+Every recorded user prompt is run --repeat times through the batch pipeline
+(Assistant.process_user_input, tool parsing and dry-run dispatch) with a
+ReplayEngine:
+
+- replay only: measures the assistant's own overhead per request,
+- with simulated latency: reproduces the recorded engine timings, scaled
+  by --speed, to check end-to-end latency budgets.
+
+Record a cassette from a real session with:
+
+    python3 main.py --batch prompts.jsonl --record session.cassette.jsonl.gz
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant import Assistant
+from batch import run_batch
+from cassette import ReplayEngine, read_cassette
+
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "tests", "fixtures", "pipeline.cassette.jsonl")
+
+
+def run(cassette, prompts_path, simulate_latency, speed):
+    engine = ReplayEngine(cassette, simulate_latency=simulate_latency, speed=speed)
+    with redirect_stdout(StringIO()):  # Debug output of the tool code
+        app = Assistant(engine=engine)
+        app.dry_run_tools = True
+        stats, wall_time = run_batch(app, prompts_path, os.devnull, progress_every=0)
+    return stats, wall_time, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cassette', type=str, default=DEFAULT_CASSETTE)
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the recorded prompts')
+    parser.add_argument('--speed', type=float, default=1.0, help='Latency simulation speed-up')
+    args = parser.parse_args()
+
+    calls = [record for record in read_cassette(args.cassette) if record.get("kind") == "call"]
+    recorded_ms = sum(call["latency_ms"] for call in calls) / len(calls)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        for _ in range(args.repeat):
+            for call in calls:
+                f.write(json.dumps({"prompt": call["user"]}) + "\n")
+        prompts_path = f.name
+
+    try:
+        print(f"{len(calls)} recorded calls x {args.repeat} (recorded mean engine latency {recorded_ms:.0f} ms)")
+        stats, wall_time, engine = run(args.cassette, prompts_path, False, args.speed)
+        print(f"replay only:        {stats.prompts / wall_time:9.1f} prompts/s, "
+              f"{wall_time * 1000 / stats.prompts:.3f} ms per request "
+              f"({engine.hits + engine.fallback_hits} hits, {engine.misses} misses)")
+
+        # Simulating latency makes a pass take real time; one pass is enough
+        with open(prompts_path, "w") as f:
+            for call in calls:
+                f.write(json.dumps({"prompt": call["user"]}) + "\n")
+        stats, wall_time, _ = run(args.cassette, prompts_path, True, args.speed)
+        print(f"simulated latency:  {stats.prompts / wall_time:9.1f} prompts/s, "
+              f"{wall_time * 1000 / stats.prompts:.1f} ms per request at speed x{args.speed:g}")
+    finally:
+        os.remove(prompts_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Render time and memory for a large tool result (default: 5,000 rows).
+
+Each variant runs in its own subprocess, so its RSS growth is measured
+alone:
+
+    textview   the old way: the whole list as one string in a Gtk.TextView
+               (set at once; typing it out at 20 ms per character would take
+               far longer, so only the estimate is printed)
+    listview   ResultView: Gtk.StringList behind a virtualized Gtk.ListView
+
+Reported: time to the first painted frame, time until the main loop is idle
+again (layout finished), RSS growth, row widgets created, and for the list
+view, how long filter-as-you-type takes to settle. Needs a display (or run
+it under a headless compositor such as `weston --backend=headless`).
+
+    python3 benchmarks/bench_result_view.py [--rows 5000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_results import ToolResult
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def make_result(rows):
+    names = [f"Application {i:05d} - {'Editor' if i % 3 else 'Viewer'} for {('images', 'text', 'audio')[i % 3]}"
+             for i in range(rows)]
+    return ToolResult.listing("Installed applications", names)
+
+
+def measure(variant, rows):
+    import gi
+    gi.require_version("Gtk", "4.0")
+    from gi.repository import GLib, Gtk
+
+    context = GLib.MainContext.default()
+
+    def run_until(condition, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            context.iteration(True)
+
+    def settle():
+        while context.pending():
+            context.iteration(False)
+
+    def painted_after(start_action):
+        clock = window.get_frame_clock()
+        frames = []
+        handler = clock.connect("after-paint", lambda clock: frames.append(time.perf_counter()))
+        start = time.perf_counter()
+        start_action()
+        window.queue_draw()
+        run_until(lambda: frames)
+        first_frame = frames[0] - start if frames else float("nan")
+        settle()
+        idle = time.perf_counter() - start
+        clock.disconnect(handler)
+        return first_frame * 1000, idle * 1000
+
+    window = Gtk.Window(title="bench")
+    window.set_default_size(500, 600)
+    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+    window.set_child(box)
+    window.present()
+    run_until(window.get_mapped)
+    settle()
+
+    result = make_result(rows)
+    report = {"variant": variant}
+    rss_before = rss_mb()
+
+    if variant == "textview":
+        text = f"{result.title}: {', '.join(result.rows)}"
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_min_content_height(500)
+        view = Gtk.TextView()
+        view.set_wrap_mode(Gtk.WrapMode.WORD)
+        scrolled.set_child(view)
+        box.append(scrolled)
+        report["first_frame_ms"], report["idle_ms"] = painted_after(lambda: view.get_buffer().set_text(text))
+        report["typing_s"] = len(text) * 0.020
+        report["widgets"] = 1
+    else:
+        from result_view import ResultView
+        view = ResultView(min_height=500, max_height=500)
+        box.append(view)
+        report["first_frame_ms"], report["idle_ms"] = painted_after(lambda: view.set_result(result))
+        report["widgets"] = view.rows_created
+
+        start = time.perf_counter()
+        for prefix in ("v", "vi", "vie", "view", "viewe", "viewer"):
+            view.search.set_text(prefix)
+            view.on_search_changed(view.search)  # search-changed is delayed; apply each keystroke now
+            run_until(lambda: view.filtered.get_pending() == 0)
+        report["filter_ms"] = (time.perf_counter() - start) * 1000
+        report["filtered_rows"] = view.visible_rows
+
+    report["rss_mb"] = rss_mb() - rss_before
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--variant', choices=['textview', 'listview'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args.variant, args.rows)))
+        return
+
+    summary = str(make_result(args.rows))
+    print(f"{args.rows:,} rows; the model and history now see {len(summary)} characters instead of "
+          f"{len(', '.join(make_result(args.rows).rows)):,}")
+    for variant in ("textview", "listview"):
+        output = subprocess.run([sys.executable, __file__, "--variant", variant, "--rows", str(args.rows)],
+                                capture_output=True, text=True, check=True).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        line = (f"{variant:9} first frame {report['first_frame_ms']:8.1f} ms  idle after {report['idle_ms']:8.1f} ms  "
+                f"RSS +{report['rss_mb']:6.1f} MB  {report['widgets']:5d} row widgets")
+        if variant == "textview":
+            line += f"  (typed out: {report['typing_s'] / 60:.0f} min)"
+        else:
+            line += f"  filter 6 keystrokes {report['filter_ms']:.1f} ms -> {report['filtered_rows']} rows"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
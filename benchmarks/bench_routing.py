@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Mean latency and peak memory: single model vs. tiered routing.
+
+Every configuration runs the same mixed workload of tool requests and
+conversations in its own subprocess, so peak RSS (VmHWM) is measured per
+configuration:
+
+    single         the default model answers everything
+    single-large   the chat model answers everything (the quality baseline)
+    tiered         one-token routing on the tool model, chats on the chat model
+    tiered-router  like tiered, but a separate router model classifies
+
+    python3 benchmarks/bench_routing.py --chat-model Llama-3.2-3B-Instruct-Q4_K_M.gguf \\
+        [--router-model SmolLM2-135M-Instruct-Q8_0.gguf]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYSTEM_PROMPT = "You are a helpful desktop assistant. Use a JSON tool call for actions, plain text otherwise."
+
+# (prompt, expected route)
+WORKLOAD = [
+    ("open firefox", "tool"),
+    ("tell me a joke about computers", "chat"),
+    ("show system info", "tool"),
+    ("what is the difference between RAM and storage?", "chat"),
+    ("close the terminal window", "tool"),
+    ("list my apps", "tool"),
+    ("how do I stay focused while working?", "chat"),
+    ("open the file browser", "tool"),
+    ("explain what a kernel does", "chat"),
+    ("launch the calculator", "tool"),
+]
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_config(options, rounds):
+    """Run the workload in this process and return its measurements"""
+    from ai_engine import LocalLLMEngine
+
+    engine = LocalLLMEngine(**options)
+    latencies, correct, routed = [], 0, 0
+    for _ in range(rounds):
+        for prompt, expected in WORKLOAD:
+            start = time.perf_counter()
+            engine.query(prompt, SYSTEM_PROMPT)
+            latencies.append((time.perf_counter() - start) * 1000)
+            route = engine.last_usage.get("route")
+            if route:
+                routed += 1
+                correct += route == expected
+
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+        "peak_rss_mb": peak_rss_mb(),
+        "route_accuracy": correct / routed if routed else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chat-model', type=str, required=True, help='Larger GGUF model for conversations')
+    parser.add_argument('--router-model', type=str, help='Small GGUF routing model')
+    parser.add_argument('--rounds', type=int, default=2, help='Passes over the workload')
+    parser.add_argument('--worker', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_config(json.loads(args.worker), args.rounds)))
+        return
+
+    configs = [
+        ("single", {}),
+        ("single-large", {"model_filename": args.chat_model}),
+        ("tiered", {"chat_model_filename": args.chat_model}),
+    ]
+    if args.router_model:
+        configs.append(("tiered-router", {"chat_model_filename": args.chat_model,
+                                          "router_model_filename": args.router_model}))
+
+    print(f"{len(WORKLOAD) * args.rounds} requests per configuration "
+          f"({sum(1 for _, route in WORKLOAD if route == 'tool')}/{len(WORKLOAD)} tool calls)")
+    for label, options in configs:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--chat-model", args.chat_model,
+             "--rounds", str(args.rounds), "--worker", json.dumps(options)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        accuracy = result["route_accuracy"]
+        accuracy_text = f"  routing accuracy {accuracy:.0%}" if accuracy is not None else ""
+        print(f"{label:<14} mean {result['mean_ms']:7.0f} ms  p95 {result['p95_ms']:7.0f} ms  "
+              f"peak RSS {result['peak_rss_mb']:7.1f} MB{accuracy_text}")
+
+
+if __name__ == "__main__":
+    main()
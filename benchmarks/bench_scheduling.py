@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Assistant latency vs. the responsiveness of a foreground workload.
+
+While the assistant answers queries back to back, a synthetic foreground
+workload runs next to it:
+
+- --workers CPU-bound processes (default: all CPUs, like a build in an IDE)
+  whose combined loop throughput is reported relative to running alone,
+- one "frame" process waking every 16 ms, like a GUI main loop, whose
+  lateness (p95) and missed frames (more than one frame late) are reported.
+
+Policies:
+
+    greedy    every CPU at normal priority (what llama.cpp does by default)
+    boosted   the interactive boost on every query
+    nice      load-aware thread count, nice 10 (the default policy)
+    idle      load-aware thread count, SCHED_IDLE
+    idle-pin  like idle, pinned to the least busy CPUs
+
+    python3 benchmarks/bench_scheduling.py [--seconds 20] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYSTEM_PROMPT = "You are a helpful desktop assistant. Use a JSON tool call for actions, plain text otherwise."
+PROMPTS = ["open firefox", "show system info", "what is the difference between RAM and storage?",
+           "close the terminal window", "explain what a kernel does"]
+FRAME = 0.016
+
+
+def cpu_worker(stop, counter):
+    count = 0
+    while not stop.is_set():
+        for _ in range(10000):
+            count += 1
+    with counter.get_lock():
+        counter.value += count
+
+
+def frame_worker(stop, results):
+    lateness = []
+    deadline = time.monotonic() + FRAME
+    while not stop.is_set():
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        late = time.monotonic() - deadline
+        lateness.append(late)
+        # A late frame is not made up for; the next one is a frame from now
+        deadline = max(deadline + FRAME, time.monotonic() + FRAME / 2)
+    results.put(lateness)
+
+
+def run_foreground(workers, seconds, during):
+    """Run the foreground workload for `seconds` while calling during(stop)"""
+    stop = multiprocessing.Event()
+    counter = multiprocessing.Value('q', 0)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=cpu_worker, args=(stop, counter)) for _ in range(workers)]
+    processes.append(multiprocessing.Process(target=frame_worker, args=(stop, results)))
+    for process in processes:
+        process.start()
+
+    start = time.monotonic()
+    latencies = during(lambda: time.monotonic() - start >= seconds)
+    remaining = seconds - (time.monotonic() - start)
+    if remaining > 0:
+        time.sleep(remaining)
+    stop.set()
+    lateness = sorted(results.get())
+    for process in processes:
+        process.join()
+
+    elapsed = time.monotonic() - start
+    return {
+        "ops_per_s": counter.value / elapsed,
+        "late_p95_ms": lateness[int(len(lateness) * 0.95) - 1] * 1000 if lateness else 0.0,
+        "missed_frames": sum(1 for late in lateness if late > FRAME),
+        "frames": len(lateness),
+        "latencies": latencies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=20.0, help='Duration of each policy run')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='CPU-bound foreground processes')
+    parser.add_argument('--model', type=str, default="Llama-3.2-1B-Instruct-Q6_K.gguf")
+    args = parser.parse_args()
+
+    from ai_engine import LocalLLMEngine, SchedulingPolicy
+
+    cpus = os.cpu_count()
+    policies = {
+        "greedy": SchedulingPolicy(priority="normal", reserve_cores=0, min_threads=cpus, max_threads=cpus),
+        "boosted": SchedulingPolicy(max_threads=cpus),
+        "nice": SchedulingPolicy(priority="nice"),
+        "idle": SchedulingPolicy(priority="idle"),
+        "idle-pin": SchedulingPolicy(priority="idle", affinity=True),
+    }
+
+    engine = LocalLLMEngine(args.model)
+    engine.query(PROMPTS[0], SYSTEM_PROMPT)  # Warm up
+
+    baseline = run_foreground(args.workers, args.seconds, lambda done: [])
+    print(f"{args.workers} CPU workers alone: {baseline['ops_per_s'] / 1e6:.1f} M ops/s, "
+          f"frame lateness p95 {baseline['late_p95_ms']:.1f} ms, {baseline['missed_frames']} missed")
+    print(f"{'policy':10} {'queries':>8} {'latency':>10} {'threads':>8} {'throughput':>11} "
+          f"{'late p95':>9} {'missed':>7}")
+
+    for name, policy in policies.items():
+        engine.scheduling = policy
+
+        def assistant(done):
+            latencies, threads = [], []
+            while not done():
+                if name == "boosted":
+                    engine.note_user_input()
+                start = time.perf_counter()
+                engine.query(PROMPTS[len(latencies) % len(PROMPTS)], SYSTEM_PROMPT)
+                latencies.append(time.perf_counter() - start)
+                threads.append(engine.last_schedule["threads"])
+            assistant.threads = threads
+            return latencies
+
+        result = run_foreground(args.workers, args.seconds, assistant)
+        latencies = result["latencies"]
+        print(f"{name:10} {len(latencies):8d} {statistics.mean(latencies) * 1000:8.0f} ms "
+              f"{statistics.mean(assistant.threads):8.1f} "
+              f"{100 * result['ops_per_s'] / baseline['ops_per_s']:10.0f}% "
+              f"{result['late_p95_ms']:6.1f} ms {result['missed_frames']:7d}")
+
+
+if __name__ == "__main__":
+    main()
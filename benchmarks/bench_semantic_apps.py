@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Lookup latency, hit rate and wrong launches of the semantic app resolver.
+
+Runs a labelled set of descriptive phrases, and phrases no app answers,
+against a typical desktop's application entries. A phrase either resolves
+to the right app, is declined (the user gets "not found" and suggestions),
+or resolves to a wrong app; only the last one launches something the user
+did not ask for. MIN_SCORE and MIN_MARGIN in semantic_apps.py are
+calibrated on this set.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_apps import SemanticAppIndex
+
+APPS = [
+    {"name": "Firefox", "generic_name": "Web Browser", "comment": "Browse the World Wide Web",
+     "keywords": "Internet;WWW;Browser;Web;Explorer", "exec": "firefox", "desktop_file": "firefox.desktop"},
+    {"name": "Chromium", "generic_name": "Web Browser", "comment": "Access the Internet",
+     "keywords": "browser", "exec": "chromium", "desktop_file": "chromium.desktop"},
+    {"name": "GNU Image Manipulation Program", "generic_name": "Image Editor",
+     "comment": "Create images and edit photographs", "keywords": "GIMP;graphic;design;illustration;painting",
+     "exec": "gimp-2.10", "desktop_file": "gimp.desktop"},
+    {"name": "Rhythmbox", "generic_name": "Music Player", "comment": "Play and organize your music collection",
+     "keywords": "Audio;Song;MP3;CD;Podcast;MTP;iPod;Playlist;Last.fm;UPnP;DLNA;Radio",
+     "exec": "rhythmbox", "desktop_file": "org.gnome.Rhythmbox3.desktop"},
+    {"name": "Terminal", "generic_name": "Terminal Emulator", "comment": "Use the command line",
+     "keywords": "shell;prompt;command;commandline;cmd", "exec": "gnome-terminal",
+     "desktop_file": "org.gnome.Terminal.desktop"},
+    {"name": "Files", "generic_name": "File Manager", "comment": "Access and organize files",
+     "keywords": "folder;manager;explore;disk;filesystem", "exec": "nautilus",
+     "desktop_file": "org.gnome.Nautilus.desktop"},
+    {"name": "Text Editor", "generic_name": "Text Editor", "comment": "Edit text files",
+     "keywords": "Text;Editor;Plaintext;Write", "exec": "gnome-text-editor",
+     "desktop_file": "org.gnome.TextEditor.desktop"},
+    {"name": "LibreOffice Writer", "generic_name": "Word Processor",
+     "comment": "Create and edit text and graphics in letters, reports, documents and Web pages",
+     "keywords": "Text;Letter;Fax;Document;OpenDocument;Doc;Docx;Rtf", "exec": "libreoffice",
+     "desktop_file": "libreoffice-writer.desktop"},
+    {"name": "LibreOffice Calc", "generic_name": "Spreadsheet",
+     "comment": "Perform calculations, analyze information and manage lists in spreadsheets",
+     "keywords": "Accounting;Stats;OpenDocument Spreadsheet;Chart;Microsoft Excel;CSV", "exec": "libreoffice",
+     "desktop_file": "libreoffice-calc.desktop"},
+    {"name": "Calculator", "generic_name": "Calculator", "comment": "Perform arithmetic, scientific or financial calculations",
+     "keywords": "calculation;arithmetic;scientific;financial", "exec": "gnome-calculator",
+     "desktop_file": "org.gnome.Calculator.desktop"},
+    {"name": "VLC media player", "generic_name": "Media player", "comment": "Read, capture, broadcast your multimedia streams",
+     "keywords": "Player;Capture;DVD;Audio;Video;Server;Broadcast", "exec": "vlc", "desktop_file": "vlc.desktop"},
+    {"name": "Thunderbird", "generic_name": "Mail Client", "comment": "Send and receive mail with Thunderbird",
+     "keywords": "Email;E-mail;Newsgroup;Feed;RSS", "exec": "thunderbird", "desktop_file": "thunderbird.desktop"},
+    {"name": "Settings", "generic_name": "", "comment": "Utilities to configure the GNOME desktop",
+     "keywords": "Preferences;Settings;", "exec": "gnome-control-center", "desktop_file": "gnome-control-center.desktop"},
+    {"name": "System Monitor", "generic_name": "Task Manager", "comment": "View current processes and monitor system state",
+     "keywords": "Monitor;System;Process;CPU;Memory;Network;History;Usage;Performance;Task;Manager;Activity;",
+     "exec": "gnome-system-monitor", "desktop_file": "gnome-system-monitor.desktop"},
+    {"name": "Visual Studio Code", "generic_name": "Text Editor", "comment": "Code Editing. Redefined.",
+     "keywords": "vscode;", "exec": "code", "desktop_file": "code.desktop"},
+]
+
+LABELLED = [
+    ("the browser", {"firefox.desktop", "chromium.desktop"}),
+    ("something to browse the web", {"firefox.desktop", "chromium.desktop"}),
+    ("something to edit photos", {"gimp.desktop"}),
+    ("an image editor", {"gimp.desktop"}),
+    ("my music player", {"org.gnome.Rhythmbox3.desktop"}),
+    ("play some songs", {"org.gnome.Rhythmbox3.desktop"}),
+    ("a shell", {"org.gnome.Terminal.desktop"}),
+    ("the command line", {"org.gnome.Terminal.desktop"}),
+    ("the file manager", {"org.gnome.Nautilus.desktop"}),
+    ("my folders", {"org.gnome.Nautilus.desktop"}),
+    ("write a letter", {"libreoffice-writer.desktop"}),
+    ("a spreadsheet", {"libreoffice-calc.desktop"}),
+    ("do some calculations", {"org.gnome.Calculator.desktop", "libreoffice-calc.desktop"}),
+    ("watch a video", {"vlc.desktop"}),
+    ("check my email", {"thunderbird.desktop"}),
+    ("the mail client", {"thunderbird.desktop"}),
+    ("system preferences", {"gnome-control-center.desktop"}),
+    ("the task manager", {"gnome-system-monitor.desktop"}),
+    ("see running processes", {"gnome-system-monitor.desktop"}),
+    ("the code editor", {"code.desktop"}),
+]
+
+# Requests no installed app answers; these must not resolve
+UNANSWERABLE = [
+    "the pod bay doors", "order a pizza", "book a flight to paris", "what's the weather",
+    "turn off the lights", "call my mom", "the car keys", "a game of chess", "set an alarm",
+    "my bank account", "fix my printer", "install updates", "take a screenshot",
+    "record my screen", "the photos",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=1000, help='Timed lookups per phrase')
+    args = parser.parse_args()
+
+    index = SemanticAppIndex(path=None)
+    start = time.perf_counter()
+    index.update(APPS)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    hits = declined = wrong = 0
+    for phrase, expected in LABELLED + [(phrase, set()) for phrase in UNANSWERABLE]:
+        app = index.resolve(phrase)
+        best = index.search(phrase, top_k=1)[0]
+        if app is None:
+            declined += bool(expected)
+            mark, target = "➖", f"declined, best {best[0]['name']}"
+        elif app['desktop_file'] in expected:
+            hits += 1
+            mark, target = "✅", app['name']
+        else:
+            wrong += 1
+            mark, target = "❌", app['name']
+        print(f"{mark} {phrase!r:<34} -> {target} ({best[1]:.2f})")
+
+    latencies = []
+    for phrase, _ in LABELLED:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index.resolve(phrase)
+        latencies.append((time.perf_counter() - start) / args.repeat * 1e6)
+
+    print("-" * 50)
+    print(f"Index build: {len(APPS)} apps in {build_ms:.1f} ms")
+    print(f"Hit rate: {hits}/{len(LABELLED)} ({100 * hits / len(LABELLED):.0f}%), {declined} declined")
+    print(f"Wrong launches: {wrong} of {len(LABELLED) + len(UNANSWERABLE)} phrases")
+    print(f"Lookup latency: mean {statistics.mean(latencies):.1f} µs, max {max(latencies):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Aggregate tokens/sec for N concurrent sessions vs. sequential execution.
+
+Both runs send the same prompts through one shared LocalLLMEngine. The
+sequential run issues them one at a time from a single session; the
+concurrent run gives every session its own thread, so the engine worker
+drains whatever is pending and runs it grouped by session and prefix, one
+request at a time. Token counts are taken from each request's own usage.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import LocalLLMEngine
+
+SYSTEM_PROMPT = "You are a helpful desktop assistant. Answer briefly."
+PROMPTS = [
+    "open firefox",
+    "tell me a joke",
+    "show system info",
+    "what is the capital of France?",
+    "close the terminal",
+    "list my apps",
+]
+
+
+def run_session(engine, session_id, prompts, totals, lock):
+    for prompt in prompts:
+        _, usage = engine.query_with_usage(prompt, SYSTEM_PROMPT, session_id=session_id)
+        with lock:
+            totals["tokens"] += usage.get("completion_tokens", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3, help='Prompts per session')
+    args = parser.parse_args()
+
+    engine = LocalLLMEngine()
+    workload = [[PROMPTS[(s + r) % len(PROMPTS)] for r in range(args.rounds)] for s in range(args.sessions)]
+
+    # Warm up so neither run pays for the first prefill
+    engine.query(PROMPTS[0], SYSTEM_PROMPT)
+
+    lock = threading.Lock()
+    totals = {"tokens": 0}
+    start = time.perf_counter()
+    for prompts in workload:
+        run_session(engine, None, prompts, totals, lock)
+    sequential_time = time.perf_counter() - start
+    sequential_tokens = totals["tokens"]
+
+    totals = {"tokens": 0}
+    threads = [
+        threading.Thread(target=run_session, args=(engine, f"bench-{i}", prompts, totals, lock))
+        for i, prompts in enumerate(workload)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent_time = time.perf_counter() - start
+    concurrent_tokens = totals["tokens"]
+
+    total = args.sessions * args.rounds
+    print(f"{args.sessions} sessions x {args.rounds} prompts = {total} requests")
+    print(f"sequential  {sequential_time:7.2f}s  {sequential_tokens / sequential_time:7.1f} tokens/sec")
+    print(f"concurrent  {concurrent_time:7.2f}s  {concurrent_tokens / concurrent_time:7.1f} tokens/sec")
+
+
+if __name__ == "__main__":
+    main()
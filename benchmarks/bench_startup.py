@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Import-time and startup cost of the CLI path.
+
+Uses `python -X importtime` to attribute import time to modules and times
+`main.py --test --prompt help` end to end. With --max-import-ms the script
+exits non-zero when importing main gets slower than the budget, so it can
+guard against startup regressions.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """Return [(cumulative_us, self_us, name)] for importing a module"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-import-ms', type=float, default=None,
+                        help='Fail if importing the module takes longer than this')
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        rows = import_times(args.module)
+        totals.append(next(r[0] for r in rows if r[2].strip() == args.module) / 1000)
+
+    print(f"Slowest imports under 'import {args.module}' (last run):")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.2f} ms cumulative  {self_us / 1000:8.2f} ms self  {name.strip()}")
+
+    wall = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--test", "--prompt", "help"], cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall.append((time.perf_counter() - start) * 1000)
+
+    import_ms = statistics.median(totals)
+    print("-" * 50)
+    print(f"import {args.module}: median {import_ms:.1f} ms over {args.runs} runs")
+    print(f"main.py --test --prompt help: median {statistics.median(wall):.1f} ms")
+
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"❌ Import time {import_ms:.1f} ms exceeds budget of {args.max_import_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Soak test: thousands of scripted requests through one long-lived assistant.
+
+Every request goes the way a user's does: in the default "gui" mode the
+prompt is typed into MyApplication's entry (firing the prefill debounce),
+sent with on_send_clicked, and the main loop runs until the response has
+been typed out. After each one, a request from one of --sessions named
+sessions (as daemon clients send them) goes to the same engine; each of
+these sessions is closed and replaced after --session-requests requests.
+
+The engine is the real LocalLLMEngine (worker queue, scheduling, prefill,
+per-session KV slots) on a FakeLlama: byte tokens, a KV cache whose saved
+states are real allocations, and outputs served from a scripted cassette
+(or --replay CASSETTE), so no model or llama_cpp is needed. Tools that
+only read (list_apps, system_info, get_running_processes, ...) really run;
+the others are described instead of executed.
+
+Every --sample-every requests the harness records RSS, the Python heap
+(tracemalloc), threads, open file descriptors, live main-loop sources
+added through GLib.timeout_add/idle_add, and the engine's KV-cache slots.
+After --warmup requests, any growth beyond the limits fails the run (exit
+status 1) and prints the allocation sites that grew the most.
+
+The "assistant" mode drives Assistant.process_user_input without GTK, for
+machines without a display. GUI mode needs one; on a headless machine run
+it under `xvfb-run` or a headless compositor (`weston --backend=headless`).
+The harness points HOME at a temporary directory, so logs, the file index
+and scheduled jobs of the real profile are not touched.
+
+    python3 benchmarks/soak.py [--mode gui|assistant] [--requests 2000] [--sessions 3] [--replay CASSETTE]
+"""
+import argparse
+import array
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import SYSTEM_HEADER, LocalLLMEngine, SchedulingPolicy, shared_prefix_length
+
+LONG_ANSWER = " ".join(["Memory is where programs keep what they are working on right now, while storage "
+                        "keeps files when the power is off."] * 6)
+
+# (prompt, recorded engine output); "hello" takes the assistant's fast path
+SCRIPT = [
+    ("open firefox", '{"tool": "open_app", "parameters": {"app_name": "firefox"}}'),
+    ("hello", None),
+    ("show system info", '{"tool": "system_info", "parameters": {}}'),
+    ("what is the difference between RAM and storage?", LONG_ANSWER),
+    ("list my apps", '{"tool": "list_apps", "parameters": {}}'),
+    ("which processes use the most memory", '{"tool": "get_running_processes", "parameters": {"sort_by": "memory"}}'),
+    ("tell me a joke", "Why don't scientists trust atoms? Because they make up everything!"),
+    ("close the terminal", '{"tool": "close_window", "parameters": {"window_title": "Terminal"}}'),
+    ("what's scheduled", '{"tool": "list_scheduled", "parameters": {}}'),
+    ("thanks", "You're welcome!"),
+]
+
+READ_ONLY_TOOLS = {"list_apps", "system_info", "get_running_processes", "list_scheduled", "chat"}
+
+METRICS = ("rss_mb", "heap_mb", "threads", "fds", "sources", "kv_slots")
+
+
+class ReadOnlyTools:
+    """Mixin running only the tools that change nothing on the desktop"""
+
+    def execute_tool(self, tool_name, **kwargs):
+        if tool_name not in READ_ONLY_TOOLS:
+            return f"[soak] {tool_name}({json.dumps(kwargs, sort_keys=True)})"
+        return super().execute_tool(tool_name, **kwargs)
+
+
+class FakeLlama:
+    """Stands in for llama_cpp.Llama: byte tokens, prefix reuse and saved states, cassette outputs"""
+
+    KV_BYTES_PER_TOKEN = 1024  # Far less than a real model's, but allocated
+    USER_HEADER = "<|eot_id|><|start_header_id|>user<|end_header_id|>\n\n"
+    ASSISTANT_HEADER = "<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+
+    def __init__(self, replay, n_ctx=32768, vocab_size=32000):
+        self.replay = replay
+        self.n_ctx = n_ctx
+        self.vocab_size = vocab_size
+        self.input_ids = array.array("i", [0]) * n_ctx
+        self.n_tokens = 0
+
+    @property
+    def _input_ids(self):
+        return self.input_ids[:self.n_tokens]
+
+    def n_vocab(self):
+        return self.vocab_size
+
+    def tokenize(self, text, add_bos=True, special=True):
+        return ([-1] if add_bos else []) + list(text)
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def eval(self, tokens):
+        tokens = list(tokens)[:self.n_ctx - self.n_tokens]
+        self.input_ids[self.n_tokens:self.n_tokens + len(tokens)] = array.array("i", tokens)
+        self.n_tokens += len(tokens)
+
+    def save_state(self):
+        return SimpleNamespace(llama_state=bytes(self.n_tokens * self.KV_BYTES_PER_TOKEN),
+                               llama_state_size=self.n_tokens * self.KV_BYTES_PER_TOKEN,
+                               input_ids=memoryview(self.input_ids.tobytes()).cast("i"), n_tokens=self.n_tokens,
+                               scores=memoryview(bytes(4 * self.vocab_size)).cast("f"))
+
+    def load_state(self, state):
+        self.input_ids = array.array("i", state.input_ids)
+        self.n_tokens = state.n_tokens
+
+    def __call__(self, prompt, max_tokens=16, logits_processor=None, **kwargs):
+        tokens = self.tokenize(prompt.encode("utf-8"))
+        shared = shared_prefix_length(self._input_ids, tokens)
+        self.n_tokens = shared
+        self.eval(tokens[shared:])
+        for processor in logits_processor or []:
+            processor(self._input_ids, None)
+
+        system_prompt, _, user_prompt = prompt.removesuffix(self.ASSISTANT_HEADER).rpartition(self.USER_HEADER)
+        text = self.replay.lookup(user_prompt, system_prompt.removeprefix(SYSTEM_HEADER))["text"]
+        return {"choices": [{"text": text}],
+                "usage": {"prompt_tokens": len(tokens), "completion_tokens": len(text) // 4}}
+
+
+class SoakEngine(LocalLLMEngine):
+    """The real engine on a FakeLlama, loaded and unloaded like a model"""
+
+    def __init__(self, llm, **kwargs):
+        self.fake_llm = llm
+        super().__init__(preload=False, **kwargs)
+
+    @staticmethod
+    def _model_path(model_filename):
+        return model_filename
+
+    def load(self):
+        with self._llm_lock:
+            if self.llm is not None:
+                return False
+            self.llm = self.fake_llm
+            self.load_count += 1
+            return True
+
+    @staticmethod
+    def _first_token_timer(queued_at, timing):
+        def record(input_ids, scores):
+            timing.setdefault("first_token_ms", round((time.perf_counter() - queued_at) * 1000, 3))
+            return scores
+
+        return [record]
+
+
+class SessionRotation:
+    """Named sessions sending a request each in turn; each is closed and replaced after `turns` requests"""
+
+    def __init__(self, app, count, turns):
+        self.app = app
+        self.count = count
+        self.turns = turns
+        self.requests = 0
+
+    def send(self, prompt):
+        if not self.count:
+            return
+        slot, turn = self.requests % self.count, self.requests // self.count
+        self.requests += 1
+        generation, step = divmod(turn, self.turns)
+        if step == 0 and generation:
+            self.app.close_session(f"soak-{slot}-{generation - 1}")
+        session = self.app.sessions.get(f"soak-{slot}-{generation}")
+        response = self.app.process_user_input(prompt, session)
+        self.app.add_to_history(prompt, response, session)
+
+
+class SourceCounter:
+    """Tracks the main-loop sources added through GLib's Python API that are still attached"""
+
+    def __init__(self, GLib):
+        self.context = GLib.MainContext.default()
+        self._ids = set()
+        self._lock = threading.Lock()
+        for name in ("timeout_add", "timeout_add_seconds", "idle_add"):
+            setattr(GLib, name, self._wrap(getattr(GLib, name)))
+
+    def _wrap(self, add_source):
+        def add(*args, **kwargs):
+            source_id = add_source(*args, **kwargs)
+            with self._lock:
+                self._ids.add(source_id)
+            return source_id
+        return add
+
+    def live(self):
+        with self._lock:
+            self._ids = {source_id for source_id in self._ids
+                         if self.context.find_source_by_id(source_id) is not None}
+            return len(self._ids)
+
+
+class ResourceMonitor:
+    """Samples process resources and checks them for growth after a warmup"""
+
+    def __init__(self, warmup, engine=None, source_counter=None):
+        self.warmup = warmup
+        self.engine = engine
+        self.source_counter = source_counter
+        self.samples = []
+        self.baseline_snapshot = None  # Heap allocations at the first sample after warmup
+
+    def sample(self, requests):
+        # A background batch's thread ends just after it has handed back the response
+        deadline = time.monotonic() + 1.0
+        while (any(thread.name == "llm-background" for thread in threading.enumerate())
+               and time.monotonic() < deadline):
+            time.sleep(0.001)
+        gc.collect()
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        stats = self.engine.cache_stats() if self.engine is not None else {}
+        sample = {
+            "requests": requests,
+            "rss_mb": rss / (1024 * 1024),
+            "heap_mb": tracemalloc.get_traced_memory()[0] / (1024 * 1024),
+            "threads": threading.active_count(),
+            "fds": len(os.listdir("/proc/self/fd")),
+            "sources": self.source_counter.live() if self.source_counter else 0,
+            "kv_slots": stats.get("session_slots", 0),
+        }
+        self.samples.append(sample)
+        if self.baseline_snapshot is None and requests >= self.warmup:
+            self.baseline_snapshot = tracemalloc.take_snapshot()
+        return sample
+
+    def growth(self):
+        """(growth per metric, first and last request) from the first sample after warmup, or None"""
+        settled = [sample for sample in self.samples if sample["requests"] >= self.warmup]
+        if len(settled) < 2:
+            return None
+        first, last = settled[0], settled[-1]
+        return {metric: last[metric] - first[metric] for metric in METRICS}, first["requests"], last["requests"]
+
+    def check(self, limits):
+        """Failure messages for the metrics that grew beyond their limits"""
+        result = self.growth()
+        if result is None:
+            return ["Not enough samples after warmup"]
+        growth = result[0]
+        return [f"{metric} grew by {growth[metric]:.2f} (limit {limits[metric]:g})"
+                for metric in METRICS if growth[metric] > limits[metric]]
+
+    def top_allocations(self, limit=10):
+        """The allocation sites that grew the most since the baseline"""
+        if self.baseline_snapshot is None:
+            return []
+        stats = tracemalloc.take_snapshot().compare_to(self.baseline_snapshot, "lineno")
+        return [str(stat) for stat in stats[:limit]]
+
+
+def write_script_cassette(path):
+    from cassette import CassetteRecorder
+
+    recorder = CassetteRecorder(path)
+    for prompt, text in SCRIPT:
+        if text is not None:
+            recorder.record(prompt, "", "default", text, {"completion_tokens": len(text) // 4}, 50.0)
+
+
+def script_prompts(cassette_path):
+    from cassette import read_cassette
+
+    prompts = [record["user"] for record in read_cassette(cassette_path) if record.get("kind") == "call"]
+    return list(dict.fromkeys(prompts)) + ["hello"]
+
+
+def run_assistant(engine, prompts, args, monitor):
+    from assistant import Assistant
+
+    class SoakAssistant(ReadOnlyTools, Assistant):
+        pass
+
+    app = SoakAssistant(engine=engine)
+    sessions = SessionRotation(app, args.sessions, args.session_requests)
+    for i in range(args.requests):
+        prompt = prompts[i % len(prompts)]
+        app.note_user_input()
+        app.prefill_draft(prompt[:len(prompt) // 2])
+        response = app.process_user_input(prompt)
+        app.add_to_history(prompt, response)
+        sessions.send(prompts[(i + 1) % len(prompts)])
+        if (i + 1) % args.sample_every == 0:
+            report(monitor.sample(i + 1))
+
+
+def run_gui(engine, prompts, args, monitor):
+    import gi
+    gi.require_version("Gtk", "4.0")
+    from gi.repository import GLib
+
+    monitor.source_counter = SourceCounter(GLib)
+    from gui import MyApplication
+
+    class SoakApplication(ReadOnlyTools, MyApplication):
+        responses = 0
+
+        def show_response(self, response, result=None, remember=True):
+            super().show_response(response, result, remember)
+            if remember:
+                self.responses += 1
+
+    app = SoakApplication(engine=engine)
+    app.typing_interval_ms = args.typing_ms
+    app.register(None)
+    app.activate()
+
+    context = GLib.MainContext.default()
+    sessions = SessionRotation(app, args.sessions, args.session_requests)
+
+    def run_until(condition, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            context.iteration(True)
+        if not condition():
+            raise TimeoutError("The application stopped responding")
+
+    def run_for(seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if not context.iteration(False):
+                time.sleep(0.001)
+
+    for i in range(args.requests):
+        prompt = prompts[i % len(prompts)]
+        app.entry.set_text(prompt)
+        run_for(args.pause_ms / 1000)  # Lets the prefill debounce fire
+        app.on_send_clicked(None)
+        run_until(lambda: app.responses > i and app.typing_source is None)
+        sessions.send(prompts[(i + 1) % len(prompts)])
+        if (i + 1) % args.sample_every == 0:
+            run_for(0.15)  # The one-shot resize timeout
+            report(monitor.sample(i + 1))
+
+    app.quit()
+    while context.pending():
+        context.iteration(False)
+
+
+def report(sample):
+    print(f"{sample['requests']:7d} requests  RSS {sample['rss_mb']:7.1f} MB  heap {sample['heap_mb']:6.2f} MB  "
+          f"threads {sample['threads']:3d}  fds {sample['fds']:4d}  sources {sample['sources']:3d}  "
+          f"KV slots {sample['kv_slots']}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['gui', 'assistant'], default='gui')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sample-every', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=200, help='Requests before the baseline sample')
+    parser.add_argument('--sessions', type=int, default=3, help='Named sessions taking turns with the default one')
+    parser.add_argument('--session-requests', type=int, default=50, help='Requests before a named session is replaced')
+    parser.add_argument('--replay', type=str, metavar='CASSETTE', help='Serve a recorded cassette instead of the script')
+    parser.add_argument('--typing-ms', type=int, default=1, help='Typing effect tick in GUI mode')
+    parser.add_argument('--pause-ms', type=float, default=0.0, help='Pause after typing each prompt in GUI mode')
+    parser.add_argument('--max-rss-mb', type=float, default=20.0, help='Allowed RSS growth after warmup')
+    parser.add_argument('--max-heap-mb', type=float, default=2.0, help='Allowed traced Python heap growth')
+    parser.add_argument('--max-threads', type=int, default=0, help='Allowed thread count growth')
+    parser.add_argument('--max-fds', type=int, default=0, help='Allowed open file descriptor growth')
+    parser.add_argument('--max-sources', type=int, default=2, help='Allowed main-loop source growth')
+    parser.add_argument('--max-kv-slots', type=int, default=0, help='Allowed KV-cache slot growth')
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="ai-assistant-soak-")
+    os.environ["HOME"] = home
+    cassette_path = args.replay
+    if cassette_path is None:
+        cassette_path = os.path.join(home, "script.cassette.jsonl")
+        write_script_cassette(cassette_path)
+
+    from cassette import ReplayEngine
+    # Background batches still measure the load, just without sleeping through a window
+    engine = SoakEngine(FakeLlama(ReplayEngine(cassette_path)), snapshot_dir=os.path.join(home, "snapshots"),
+                        scheduling_policy=SchedulingPolicy(sample_window=0.0))
+    prompts = script_prompts(cassette_path)
+    print(f"Soaking {args.mode} mode with {args.requests} requests over {len(prompts)} prompts (HOME={home})")
+
+    tracemalloc.start()
+    monitor = ResourceMonitor(args.warmup, engine)
+    report(monitor.sample(0))
+    start = time.perf_counter()
+    if args.mode == "gui":
+        run_gui(engine, prompts, args, monitor)
+    else:
+        run_assistant(engine, prompts, args, monitor)
+    elapsed = time.perf_counter() - start
+
+    limits = {"rss_mb": args.max_rss_mb, "heap_mb": args.max_heap_mb, "threads": args.max_threads,
+              "fds": args.max_fds, "sources": args.max_sources, "kv_slots": args.max_kv_slots}
+    failures = monitor.check(limits)
+    print(f"{args.requests} requests in {elapsed:.1f} s ({args.requests / elapsed:.0f}/s)")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        allocations = monitor.top_allocations()
+        if allocations:
+            print("Largest allocation growth after warmup:")
+            for line in allocations:
+                print(f"  {line}")
+        sys.exit(1)
+    growth, first, last = monitor.growth()
+    print(f"OK: growth from request {first} to {last}: " +
+          ", ".join(f"{metric} {growth[metric]:+.2f}" for metric in METRICS))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Record/replay cassettes of engine outputs.
+
+A cassette is a JSON-lines file (gzip-compressed if it ends in ``.gz``). Each
+distinct system prompt is stored once, and every call refers to it by hash:
+
+    {"kind": "system", "id": "<sha16>", "text": "..."}
+    {"kind": "call", "key": "<sha16>", "system": "<sha16>", "user": "open firefox",
+     "session": "default", "text": "{...}", "usage": {...}, "latency_ms": 812.4}
+
+LocalLLMEngine(record_path=...) appends every query to a cassette.
+ReplayEngine serves the recorded outputs by prompt, optionally sleeping for
+the recorded latencies, so the whole pipeline can be tested and benchmarked
+without a model.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def call_key(user_prompt, system_prompt):
+    """Cassette key of one query"""
+    return _digest(system_prompt + "\0" + user_prompt)
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class CassetteMiss(LookupError):
+    """Raised by ReplayEngine for a prompt that was never recorded"""
+
+
+class CassetteRecorder:
+    """Append engine calls to a cassette file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._systems = set()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            # Appending: do not store known system prompts again
+            for record in read_cassette(path):
+                if record.get("kind") == "system":
+                    self._systems.add(record["id"])
+
+    def record(self, user_prompt, system_prompt, session_id, text, usage, latency_ms):
+        system_id = _digest(system_prompt)
+        records = []
+        with self._lock:
+            if system_id not in self._systems:
+                self._systems.add(system_id)
+                records.append({"kind": "system", "id": system_id, "text": system_prompt})
+            records.append({
+                "kind": "call",
+                "key": call_key(user_prompt, system_prompt),
+                "system": system_id,
+                "user": user_prompt,
+                "session": session_id,
+                "text": text,
+                "usage": usage,
+                "latency_ms": round(latency_ms, 3),
+            })
+            # One append per call, so an interrupted session keeps what it recorded
+            with _open(self.path, "a") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+
+
+def read_cassette(path):
+    """Yield the records of a cassette"""
+    with _open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class ReplayEngine:
+    """Drop-in replacement for LocalLLMEngine serving recorded outputs.
+
+    Calls are looked up by system prompt and user prompt; when the same
+    query was recorded several times, the recordings are served in order and
+    the last one repeats. Unless strict, a query whose system prompt differs
+    (e.g. other history) falls back to the recordings of the same user prompt.
+    """
+
+    def __init__(self, path, simulate_latency=False, speed=1.0, strict=False):
+        self.path = path
+        self.simulate_latency = simulate_latency
+        self.speed = speed
+        self.strict = strict
+        self.last_usage = {}
+        self.llm = None
+        self.hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+
+        self._by_key = defaultdict(deque)
+        self._by_user = defaultdict(deque)
+        self._lock = threading.Lock()
+        for record in read_cassette(path):
+            if record.get("kind") == "call":
+                self._by_key[record["key"]].append(record)
+                self._by_user[record["user"]].append(record)
+
+    def __len__(self):
+        return sum(len(calls) for calls in self._by_key.values())
+
+    @staticmethod
+    def _next(calls):
+        # Serve recordings in order, repeating the last one
+        return calls.popleft() if len(calls) > 1 else calls[0]
+
+    def lookup(self, user_prompt, system_prompt):
+        """Return the recorded call for a query, or raise CassetteMiss"""
+        with self._lock:
+            calls = self._by_key.get(call_key(user_prompt, system_prompt))
+            if calls:
+                self.hits += 1
+                return self._next(calls)
+            calls = None if self.strict else self._by_user.get(user_prompt)
+            if calls:
+                self.fallback_hits += 1
+                return self._next(calls)
+            self.misses += 1
+        raise CassetteMiss(f"No recording for prompt: {user_prompt[:80]}")
+
+    def query(self, user_prompt, system_prompt, session_id=None):
+        call = self.lookup(user_prompt, system_prompt)
+        if self.simulate_latency and call.get("latency_ms"):
+            time.sleep(call["latency_ms"] / 1000 / self.speed)
+        self.last_usage = dict(call.get("usage") or {})
+        return call["text"]
+
+    # The rest of the LocalLLMEngine interface has nothing to do here
+
+    @property
+    def is_loaded(self):
+        return True
+
+    def load(self):
+        return False
+
+    def unload(self, reason="requested", release_pages=False):
+        return False
+
+    def preload_async(self):
+        pass
+
+    def check_idle(self):
+        return None
+
+    def start_idle_monitor(self):
+        pass
+
+    def prime_prefix(self, static_system_prompt):
+        return False
+
+    def drop_session(self, session_id):
+        pass
+
+    def note_user_input(self):
+        pass
+
+    def prefill(self, user_draft, system_prompt, session_id=None):
+        return None
+
+    def perf_counters(self):
+        return {}
+
+    def cache_stats(self):
+        return {}
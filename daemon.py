@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Resident assistant daemon and thin client.
+
+The daemon keeps one warm engine and application index in memory and serves
+requests over a Unix domain socket using line-delimited JSON:
+
+    -> {"id": 1, "method": "process", "params": {"prompt": "open firefox"}}
+    <- {"id": 1, "result": "✅ Opened Firefox"}
+
+With "structured": true in the params, the result is an object holding the
+response and the full rows of a list or table result (see tool_results.py):
+
+    <- {"id": 2, "result": {"response": "✅ Installed applications (412 total): ...",
+                            "result": {"summary": ..., "rows": [...], ...}}}
+
+This module only imports the standard library so the client starts in
+milliseconds; the heavy assistant modules are imported by main.py --daemon.
+"""
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+
+def default_socket_path():
+    """Get the default daemon socket path"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(os.path.expanduser("~"), ".ai_assistant")
+    return os.path.join(runtime_dir, "ai_assistant.sock")
+
+
+class DaemonError(Exception):
+    """Raised by the client when the daemon reports an error"""
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serve one client connection, one JSON request per line"""
+
+    def handle(self):
+        # Every connection gets its own conversation unless a request names
+        # a session explicitly
+        sessions = self.server.daemon.app.sessions
+        self.session = sessions.get()
+        try:
+            self._serve_requests()
+        finally:
+            self.server.daemon.close_session(self.session.id)
+
+    def _serve_requests(self):
+        for raw_line in self.rfile:
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+            except (ValueError, AttributeError):
+                self._send({"id": None, "error": "Invalid JSON request"})
+                continue
+
+            try:
+                result = self.server.daemon.dispatch(
+                    request.get("method", ""), request.get("params") or {}, self.session
+                )
+                self._send({"id": request_id, "result": result})
+            except Exception as e:
+                self._send({"id": request_id, "error": str(e)})
+
+            if request.get("method") == "shutdown":
+                return
+
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AssistantDaemon:
+    """Serve an assistant instance to many clients over a Unix socket"""
+
+    def __init__(self, app, socket_path=None):
+        self.app = app
+        self.socket_path = socket_path or default_socket_path()
+        self.server = None
+
+    def dispatch(self, method, params, session=None):
+        """Run a single request and return its JSON-serializable result"""
+        if method == "ping":
+            return "pong"
+
+        if params.get("session"):
+            session = self.app.sessions.get(str(params["session"]))
+
+        if method == "process":
+            prompt = str(params.get("prompt", "")).strip()
+            if not prompt:
+                raise ValueError("Prompt cannot be empty")
+
+            # Requests from different clients arrive concurrently; the engine
+            # queues their inference on its own worker thread.
+            if hasattr(self.app, "note_user_input"):
+                self.app.note_user_input()
+            response = self.app.process_user_input(prompt, session)
+            self.app.add_to_history(prompt, response, session)
+            if params.get("structured"):
+                result = getattr(session, "last_tool_result", None)
+                return {"response": response, "result": result.to_dict() if result is not None else None}
+            return response
+
+        if method == "prefill":
+            # Speculative prefill of a draft; returns before it is evaluated
+            if hasattr(self.app, "prefill_draft"):
+                self.app.prefill_draft(str(params.get("prompt", "")), session)
+            return "ok"
+
+        if method == "preload":
+            # A client is about to send a request; reload an idle-unloaded model
+            engine = getattr(self.app, "ai_engine", None)
+            if engine is not None:
+                engine.preload_async()
+            return "ok"
+
+        if method == "close_session":
+            self.close_session(session.id)
+            return "closed"
+
+        if method == "shutdown":
+            # shutdown() blocks until serve_forever() returns, so it must not
+            # run on the handler thread that serve_forever() is waiting for.
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return "shutting down"
+
+        raise ValueError(f"Unknown method: {method}")
+
+    def close_session(self, session_id):
+        """Forget a session and free its engine slot"""
+        self.app.close_session(session_id)
+
+    def _claim_socket_path(self):
+        """Remove a stale socket file, refusing to replace a live daemon"""
+        if not os.path.exists(self.socket_path):
+            os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+            return
+
+        if is_daemon_running(self.socket_path):
+            raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+
+        os.unlink(self.socket_path)
+
+    def serve_forever(self):
+        """Bind the socket and serve requests until shutdown is requested"""
+        self._claim_socket_path()
+
+        self.server = _ThreadingUnixServer(self.socket_path, _RequestHandler)
+        self.server.daemon = self
+        os.chmod(self.socket_path, 0o600)
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+class DaemonClient:
+    """Minimal client for the assistant daemon"""
+
+    def __init__(self, socket_path=None, timeout=None, session=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.session = session
+        self._sock = None
+        self._reader = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Open the connection if it is not already open"""
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._sock = sock
+            self._reader = sock.makefile("rb")
+        return self
+
+    def close(self):
+        """Close the connection"""
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+
+    def call(self, method, **params):
+        """Send a request and wait for its result"""
+        with self._lock:
+            self.connect()
+            self._next_id += 1
+            request = {"id": self._next_id, "method": method, "params": params}
+            self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+            line = self._reader.readline()
+            if not line:
+                self.close()
+                raise ConnectionError("Daemon closed the connection")
+
+        reply = json.loads(line)
+        if "error" in reply:
+            raise DaemonError(reply["error"])
+        return reply.get("result")
+
+    def process(self, prompt, structured=False):
+        """Send a prompt to the assistant and return its response.
+
+        With structured, return {"response": ..., "result": rows dict or None}.
+        """
+        params = {"prompt": prompt}
+        if self.session:
+            params["session"] = self.session
+        if structured:
+            params["structured"] = True
+        return self.call("process", **params)
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_daemon_running(socket_path=None):
+    """Check whether a daemon is accepting connections on the socket"""
+    try:
+        with DaemonClient(socket_path, timeout=1.0) as client:
+            return client.call("ping") == "pong"
+    except (OSError, ValueError, DaemonError):
+        return False
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI Assistant - daemon client')
+    parser.add_argument('prompt', nargs='*', help='Prompt to send to the running daemon')
+    parser.add_argument('--socket', type=str, default=None, help='Daemon socket path')
+    parser.add_argument('--session', type=str, default=None, help='Named session to continue across calls')
+    parser.add_argument('--ping', action='store_true', help='Check whether the daemon is running')
+    parser.add_argument('--shutdown', action='store_true', help='Stop the running daemon')
+    args = parser.parse_args(argv)
+
+    try:
+        with DaemonClient(args.socket, session=args.session) as client:
+            if args.ping:
+                print(client.call("ping"))
+            elif args.shutdown:
+                print(client.call("shutdown"))
+            elif args.prompt:
+                print(client.process(" ".join(args.prompt)))
+            else:
+                parser.print_usage()
+                return 2
+    except (FileNotFoundError, ConnectionRefusedError):
+        print("❌ AI Assistant daemon is not running. Start it with: python3 main.py --daemon",
+              file=sys.stderr)
+        return 1
+    except DaemonError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""Application discovery from desktop entries.
+
+Entries are looked up by desktop file ID in every applications directory of
+the XDG base directory spec ($XDG_DATA_HOME, then $XDG_DATA_DIRS), plus the
+Flatpak and Snap export directories, and the first directory providing an ID
+wins, as in a menu. The parser follows the desktop entry spec where it
+matters for launching:
+
+- only keys of the [Desktop Entry] group are read, so [Desktop Action]
+  groups no longer leak their Name= or Exec= into the app,
+- Name, GenericName, Comment and Keywords are localized from LC_MESSAGES,
+- Hidden, OnlyShowIn/NotShowIn ($XDG_CURRENT_DESKTOP) and TryExec decide
+  whether an app exists at all; NoDisplay apps are kept but flagged, since
+  they are still launched by name,
+- Exec is split with the spec's quoting rules and its field codes dropped,
+  so the whole command line is kept.
+
+Large trees are parsed on a process pool; each app is stored as a compact
+slotted AppRecord that still reads like the old dicts (``app['name']``).
+"""
+import functools
+import os
+import re
+import shutil
+
+DESKTOP_GROUP = "[Desktop Entry]"
+USED_KEYS = ("Type", "Name", "GenericName", "Comment", "Keywords", "Exec", "TryExec",
+             "Hidden", "NoDisplay", "OnlyShowIn", "NotShowIn")
+
+# Below this many entries a pool costs more to start than it saves
+PARALLEL_MIN_ENTRIES = 2000
+
+FIELD_CODE_RE = re.compile(r"%(.)")
+EXEC_ARG_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+QUOTE_ESCAPE_RE = re.compile(r"\\(.)")
+# Flatpak wraps its file-forwarding arguments in these markers
+FLATPAK_MARKERS = {"@@", "@@u", "@@f"}
+ESCAPES = {"s": " ", "n": "\n", "t": "\t", "r": "\r", "\\": "\\", ";": "\\;"}
+
+
+class AppRecord:
+    """One launchable application; supports app['name'] and app.get() like a dict"""
+
+    __slots__ = ("name", "exec", "argv", "desktop_file", "generic_name", "comment", "keywords", "path",
+                 "no_display")
+
+    def __init__(self, name, argv, desktop_file, generic_name="", comment="", keywords="", path="",
+                 no_display=False):
+        self.name = name
+        self.argv = tuple(argv)
+        self.exec = self.argv[0]
+        self.desktop_file = desktop_file
+        self.generic_name = generic_name
+        self.comment = comment
+        self.keywords = keywords
+        self.path = path
+        self.no_display = no_display  # Launchable, but not shown in menus or app lists
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if isinstance(key, str) else default
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def __repr__(self):
+        return f"AppRecord({self.name!r}, {self.desktop_file!r})"
+
+    def __reduce__(self):
+        return (AppRecord, (self.name, self.argv, self.desktop_file, self.generic_name,
+                            self.comment, self.keywords, self.path, self.no_display))
+
+
+def application_dirs():
+    """applications/ directories in precedence order, most important first"""
+    home = os.path.expanduser("~")
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    bases = [data_home] + [d for d in data_dirs if d] + [
+        os.path.join(data_home, "flatpak", "exports", "share"),
+        "/var/lib/flatpak/exports/share",
+    ]
+
+    dirs = []
+    for base in bases:
+        path = os.path.join(base, "applications")
+        if path not in dirs:
+            dirs.append(path)
+    # Snap exports its entries without the applications/ level
+    dirs.append("/var/lib/snapd/desktop/applications")
+    return dirs
+
+
+def locale_variants(value=None):
+    """Locale suffixes to try for localized keys, most specific first.
+
+    "de_DE.UTF-8@euro" gives de_DE@euro, de_DE, de@euro and de.
+    """
+    if value is None:
+        value = os.environ.get("LC_ALL") or os.environ.get("LC_MESSAGES") or os.environ.get("LANG") or ""
+    value, _, modifier = value.partition("@")
+    value = value.partition(".")[0]
+    lang, _, country = value.partition("_")
+    if not lang or lang in ("C", "POSIX"):
+        return ()
+
+    variants = []
+    if country and modifier:
+        variants.append(f"{lang}_{country}@{modifier}")
+    if country:
+        variants.append(f"{lang}_{country}")
+    if modifier:
+        variants.append(f"{lang}@{modifier}")
+    variants.append(lang)
+    return tuple(variants)
+
+
+def current_desktops():
+    """Names in $XDG_CURRENT_DESKTOP, e.g. ("ubuntu", "gnome")"""
+    return tuple(name.lower() for name in os.environ.get("XDG_CURRENT_DESKTOP", "").split(":") if name)
+
+
+def unescape(value):
+    """Apply the spec's string escapes (\\s, \\n, \\t, \\r, \\\\); list separators stay escaped"""
+    if "\\" not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append(ESCAPES.get(nxt, "\\" + nxt))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def split_list(value):
+    """Split a ;-separated list value, honoring \\; escapes"""
+    return [item.replace("\\;", ";") for item in re.split(r"(?<!\\);", value) if item]
+
+
+def split_exec(command):
+    """Split an Exec value into argv with the spec's quoting rules, dropping field codes"""
+    if '"' in command:
+        # Quoted arguments are quoted as a whole; inside, \" \` \$ and \\ are escapes
+        args = [plain or QUOTE_ESCAPE_RE.sub(r"\1", quoted) for quoted, plain in EXEC_ARG_RE.findall(command)]
+    else:
+        args = command.split()
+
+    argv = []
+    for arg in args:
+        if arg in FLATPAK_MARKERS:
+            continue
+        if "%" in arg:
+            # %f, %U, %i, ... are only filled in when opening files; %% is a literal %
+            expanded = FIELD_CODE_RE.sub(lambda m: "%" if m.group(1) == "%" else "", arg)
+            if not expanded:
+                continue
+            arg = expanded
+        argv.append(arg)
+    return argv
+
+
+_executables = {}  # TryExec command -> found, per process
+
+
+def _executable(command):
+    if command not in _executables:
+        if os.path.isabs(command):
+            _executables[command] = os.access(command, os.X_OK)
+        else:
+            _executables[command] = shutil.which(command) is not None
+    return _executables[command]
+
+
+@functools.lru_cache(maxsize=8)
+def _wanted_keys(locales):
+    # The keys used here and their translations for the wanted locales; the
+    # dozens of other translations are skipped
+    return frozenset(USED_KEYS) | {f"{key}[{locale}]" for key in USED_KEYS for locale in locales}
+
+
+def read_desktop_group(path, locales=()):
+    """Used keys of the [Desktop Entry] group; localized keys only for the given locales"""
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8", "replace")
+
+    if text.startswith(DESKTOP_GROUP):
+        start = 0
+    else:
+        start = text.find("\n" + DESKTOP_GROUP)
+        if start < 0:
+            return {}
+    # The group ends where the next one ([Desktop Action ...] etc.) begins
+    end = text.find("\n[", start + 1)
+    group = text[start:end] if end >= 0 else text[start:]
+
+    wanted = _wanted_keys(tuple(locales))
+    fields = {}
+    for line in group.split("\n"):
+        key, sep, value = line.partition("=")
+        if sep:
+            key = key.rstrip()
+            if key in wanted:
+                fields[key] = value.strip()
+    return fields
+
+
+def localized(fields, key, locales):
+    for locale in locales:
+        value = fields.get(f"{key}[{locale}]")
+        if value is not None:
+            return value
+    return fields.get(key, "")
+
+
+def parse_desktop_entry(path, desktop_id=None, locales=(), desktops=(), check_try_exec=True):
+    """Parse one desktop file into an AppRecord, or None if it is not an available application"""
+    fields = read_desktop_group(path, locales)
+
+    if fields.get("Type", "Application") != "Application":
+        return None
+    if fields.get("Hidden") == "true":
+        return None
+
+    only_show_in = fields.get("OnlyShowIn")
+    if only_show_in is not None and not any(d.lower() in desktops for d in split_list(only_show_in)):
+        return None
+    not_show_in = fields.get("NotShowIn")
+    if not_show_in is not None and any(d.lower() in desktops for d in split_list(not_show_in)):
+        return None
+
+    try_exec = fields.get("TryExec")
+    if check_try_exec and try_exec and not _executable(unescape(try_exec)):
+        return None
+
+    name = unescape(localized(fields, "Name", locales))
+    argv = split_exec(unescape(fields.get("Exec", "")))
+    if not name or not argv:
+        return None
+
+    return AppRecord(
+        name=name,
+        argv=argv,
+        desktop_file=desktop_id or os.path.basename(path),
+        generic_name=unescape(localized(fields, "GenericName", locales)),
+        comment=unescape(localized(fields, "Comment", locales)),
+        keywords=unescape(localized(fields, "Keywords", locales)),
+        path=path,
+        no_display=fields.get("NoDisplay") == "true",
+    )
+
+
+def find_desktop_files(dirs=None):
+    """{desktop file ID: path}, the first directory providing an ID winning"""
+    entries = {}
+    for root in application_dirs() if dirs is None else dirs:
+        stack = [(root, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.endswith(".desktop"):
+                            entries.setdefault(prefix + entry.name, entry.path)
+                        elif entry.is_dir(follow_symlinks=False):
+                            # Subdirectories become part of the ID: kde/foo.desktop is kde-foo.desktop
+                            stack.append((entry.path, f"{prefix}{entry.name}-"))
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+    return entries
+
+
+def _parse_chunk(chunk, locales, desktops):
+    apps = []
+    errors = []
+    for desktop_id, path in chunk:
+        try:
+            app = parse_desktop_entry(path, desktop_id, locales, desktops)
+        except (OSError, ValueError) as e:
+            errors.append(f"{path}: {e}")
+            continue
+        if app is not None:
+            apps.append(app)
+    return apps, errors
+
+
+def discover_applications(dirs=None, workers=None, locales=None, desktops=None):
+    """All available applications, sorted by name, and the errors met on the way.
+
+    NoDisplay apps are included with no_display set.
+    """
+    locales = locale_variants() if locales is None else tuple(locales)
+    desktops = current_desktops() if desktops is None else tuple(d.lower() for d in desktops)
+    items = sorted(find_desktop_files(dirs).items())
+
+    workers = workers if workers is not None else min(os.cpu_count() or 1, 8)
+    if workers <= 1 or len(items) < PARALLEL_MIN_ENTRIES:
+        apps, errors = _parse_chunk(items, locales, desktops)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        # A few chunks per worker evens out slow files; forkserver because
+        # the caller may already run threads (GTK, the engine, the indexer)
+        size = max(1, len(items) // (workers * 4))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        apps, errors = [], []
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            for chunk_apps, chunk_errors in pool.map(_parse_chunk, chunks, [locales] * len(chunks),
+                                                     [desktops] * len(chunks)):
+                apps.extend(chunk_apps)
+                errors.extend(chunk_errors)
+
+    apps.sort(key=lambda app: app.name.lower())
+    return apps, errors
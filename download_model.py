@@ -1,46 +1,322 @@
 #!/usr/bin/env python3
-"""Script to download the Llama-3.2-1B-Instruct GGUF model for local inference."""
+"""Script to download the Llama-3.2-1B-Instruct GGUF model for local inference.
 
-from huggingface_hub import hf_hub_download
+Downloads are fetched as parallel byte ranges into a `.part` file whose
+progress is tracked in a `.part.json` sidecar, so an interrupted download
+resumes where it stopped. The file is verified against its SHA-256 before it
+is atomically moved into ~/.ai_assistant/models.
+
+Set AI_ASSISTANT_MODEL_MIRROR (or pass --mirror) to an HTTP mirror, a
+file:// URL or a local directory to fetch from somewhere other than the
+Hugging Face Hub.
+"""
+
+import hashlib
+import http.client
+import json
 import os
+import re
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+MODEL_REPO = "bartowski/Llama-3.2-1B-Instruct-GGUF"
+MODEL_FILE = "Llama-3.2-1B-Instruct-Q6_K.gguf"  # Q6 for better accuracy while still tiny
+MODELS_DIR = os.path.join(os.path.expanduser("~"), ".ai_assistant", "models")
+MIRROR_ENV = "AI_ASSISTANT_MODEL_MIRROR"
+
+CHUNK_SIZE = 16 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or verified"""
+
+
+def model_url(repo_id=MODEL_REPO, filename=MODEL_FILE, mirror=None):
+    """Build the source URL (or local path) for a model file"""
+    mirror = mirror or os.environ.get(MIRROR_ENV)
+    if mirror:
+        return mirror.rstrip("/") + "/" + filename
+    return f"https://huggingface.co/{repo_id}/resolve/main/{filename}"
+
+
+def sha256_file(path):
+    """Compute the SHA-256 of a file without reading it all into memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class ModelDownloader:
+    """Resumable, verified, parallel-range download of one file"""
+
+    def __init__(self, url, dest_path, sha256=None, workers=4, chunk_size=CHUNK_SIZE,
+                 timeout=30, retries=3):
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = dest_path + ".part"
+        self.state_path = dest_path + ".part.json"
+        self.sha256 = sha256.lower() if sha256 else None
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.retries = retries
+
+        # Reported after download()
+        self.size = None
+        self.bytes_downloaded = 0
+        self.bytes_resumed = 0
+        self.elapsed = 0.0
+
+        self._state = None
+        self._state_lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+
+    @property
+    def is_local(self):
+        return urllib.parse.urlparse(self.url).scheme in ("", "file")
+
+    def download(self):
+        """Download, verify and install the file; return its final path"""
+        os.makedirs(os.path.dirname(self.dest_path) or ".", exist_ok=True)
+
+        if os.path.exists(self.dest_path):
+            if self.sha256 is None or sha256_file(self.dest_path) == self.sha256:
+                self.size = os.path.getsize(self.dest_path)
+                return self.dest_path
+            print(f"⚠️ Existing {os.path.basename(self.dest_path)} failed verification, downloading again")
+
+        start = time.perf_counter()
+        if self.is_local:
+            self._copy_local()
+        else:
+            self._download_remote()
+        self.elapsed = time.perf_counter() - start
+
+        self._verify_and_install()
+        return self.dest_path
+
+    def throughput(self):
+        """Download throughput in MB/s for the bytes fetched in this run"""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_downloaded / (1024 * 1024) / self.elapsed
+
+    def _copy_local(self):
+        """Fetch from a file:// URL or a local cache directory"""
+        parsed = urllib.parse.urlparse(self.url)
+        source = urllib.request.url2pathname(parsed.path) if parsed.scheme == "file" else self.url
+        if not os.path.exists(source):
+            raise DownloadError(f"Mirror file not found: {source}")
+
+        shutil.copyfile(source, self.part_path)
+        self.size = os.path.getsize(self.part_path)
+        self.bytes_downloaded = self.size
 
-def download_model():
-    """Download the Llama-3.2-1B-Instruct-GGUF model."""
-    # Model configuration
-    model_name = "bartowski/Llama-3.2-1B-Instruct-GGUF"
-    model_file = "Llama-3.2-1B-Instruct-Q6_K.gguf"  # Q6 for better accuracy while still tiny
+    def _probe(self):
+        """Resolve redirects and return (url, size, accepts_ranges, sha256)"""
+        opener = urllib.request.build_opener(_NoRedirect)
+        url = self.url
+        sha256 = None
 
-    # Download directory
-    download_path = os.path.join(os.path.expanduser("~"), ".ai_assistant", "models")
-    os.makedirs(download_path, exist_ok=True)
+        for _ in range(10):
+            request = urllib.request.Request(url, method="HEAD")
+            try:
+                response = opener.open(request, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                if e.code not in (301, 302, 303, 307, 308):
+                    raise DownloadError(f"HTTP {e.code} for {url}")
+                # The Hub reports the LFS object's SHA-256 on the redirect
+                sha256 = sha256 or self._header_sha256(e.headers)
+                url = urllib.parse.urljoin(url, e.headers["Location"])
+                continue
 
-    print(f"📥 Downloading {model_file} from {model_name}...")
-    print(f"💾 Target directory: {download_path}")
+            with response:
+                sha256 = sha256 or self._header_sha256(response.headers)
+                length = response.headers.get("Content-Length")
+                accepts_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                return url, int(length) if length else None, accepts_ranges, sha256
+
+        raise DownloadError(f"Too many redirects for {self.url}")
+
+    @staticmethod
+    def _header_sha256(headers):
+        for name in ("X-Linked-Etag", "ETag"):
+            value = (headers.get(name) or "").strip('W/"').lower()
+            if SHA256_RE.match(value):
+                return value
+        return None
+
+    def _download_remote(self):
+        url, size, accepts_ranges, remote_sha256 = self._probe()
+        if self.sha256 is None:
+            self.sha256 = remote_sha256
+        self.size = size
+
+        if not size or not accepts_ranges:
+            # Without ranges nothing can be resumed or split
+            self._download_stream(url)
+            return
+
+        self._load_state(size)
+        chunks = [
+            (index, offset, min(offset + self.chunk_size, size) - 1)
+            for index, offset in enumerate(range(0, size, self.chunk_size))
+            if index not in self._state["done"]
+        ]
+        self.bytes_resumed = size - sum(end - start + 1 for _, start, end in chunks)
+        if self.bytes_resumed:
+            print(f"↩️ Resuming download, {self.bytes_resumed / (1024 * 1024):.1f} MB already present")
+
+        fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for future in [pool.submit(self._fetch_chunk, fd, url, *chunk) for chunk in chunks]:
+                    future.result()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _load_state(self, size):
+        """Load resume state, discarding it if it belongs to another download"""
+        state = None
+        if os.path.exists(self.part_path) and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = None
+
+        expected = {"size": size, "chunk_size": self.chunk_size, "sha256": self.sha256}
+        if not state or any(state.get(key) != value for key, value in expected.items()):
+            state = dict(expected, done=[])
+            for path in (self.part_path, self.state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        state["done"] = set(state["done"])
+        self._state = state
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(self._state, done=sorted(self._state["done"])), f)
+        os.replace(tmp_path, self.state_path)
+
+    def _fetch_chunk(self, fd, url, index, start, end):
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    if response.status != 206:
+                        raise DownloadError(f"Server ignored range request (HTTP {response.status})")
+                    offset = start
+                    while True:
+                        block = response.read(READ_SIZE)
+                        if not block:
+                            break
+                        os.pwrite(fd, block, offset)
+                        offset += len(block)
+                if offset != end + 1:
+                    raise DownloadError(f"Short read for bytes {start}-{end}")
+
+                # Only a complete chunk counts, so retried bytes are not counted twice
+                with self._progress_lock:
+                    self.bytes_downloaded += offset - start
+                with self._state_lock:
+                    self._state["done"].add(index)
+                    self._save_state()
+                return
+            except (OSError, http.client.HTTPException, DownloadError) as e:
+                last_error = e
+                time.sleep(min(2 ** attempt, 10) * 0.1)
+
+        raise DownloadError(f"Failed to fetch bytes {start}-{end}: {last_error}")
+
+    def _download_stream(self, url):
+        with urllib.request.urlopen(url, timeout=self.timeout) as response, \
+                open(self.part_path, "wb") as f:
+            for block in iter(lambda: response.read(READ_SIZE), b""):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        self.size = os.path.getsize(self.part_path)
+        self.bytes_downloaded = self.size
+
+    def _verify_and_install(self):
+        if self.size is not None and os.path.getsize(self.part_path) != self.size:
+            raise DownloadError("Downloaded file has the wrong size")
+
+        if self.sha256:
+            actual = sha256_file(self.part_path)
+            if actual != self.sha256:
+                for path in (self.part_path, self.state_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise DownloadError(f"SHA-256 mismatch: expected {self.sha256}, got {actual}")
+        else:
+            print("⚠️ No SHA-256 available, skipping integrity check")
+
+        os.replace(self.part_path, self.dest_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+
+def download_model(mirror=None, sha256=None, workers=4, models_dir=MODELS_DIR,
+                   repo_id=MODEL_REPO, filename=MODEL_FILE):
+    """Download the Llama-3.2-1B-Instruct-GGUF model (or another GGUF, e.g. a chat model)."""
+    url = model_url(repo_id, filename, mirror)
+    dest_path = os.path.join(models_dir, filename)
+
+    print(f"📥 Downloading {filename} from {url}...")
+    print(f"💾 Target directory: {models_dir}")
 
     try:
-        # Download the model
-        model_path = hf_hub_download(
-            repo_id=model_name,
-            filename=model_file,
-            local_dir=download_path,
-            local_dir_use_symlinks=False  # Download actual file, not symlink
-        )
-
-        print(f"✅ Model downloaded successfully!")
+        downloader = ModelDownloader(url, dest_path, sha256=sha256, workers=workers)
+        model_path = downloader.download()
+
+        print("✅ Model downloaded successfully!")
         print(f"📁 Model saved to: {model_path}")
 
-        # Verify the file exists and get its size
-        if os.path.exists(model_path):
-            file_size = os.path.getsize(model_path) / (1024 * 1024)  # Size in MB
-            print(".1f")
-        else:
-            print("❌ Downloaded file not found!")
+        file_size = os.path.getsize(model_path) / (1024 * 1024)  # Size in MB
+        print(f"📦 File size: {file_size:.1f} MB")
+        if downloader.bytes_downloaded:
+            print(f"⚡ Fetched {downloader.bytes_downloaded / (1024 * 1024):.1f} MB in "
+                  f"{downloader.elapsed:.1f}s ({downloader.throughput():.1f} MB/s), "
+                  f"resumed {downloader.bytes_resumed / (1024 * 1024):.1f} MB")
 
         return model_path
 
-    except Exception as e:
+    except (DownloadError, OSError) as e:
         print(f"❌ Error downloading model: {e}")
         return None
 
+
 if __name__ == "__main__":
-    download_model()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Download the AI Assistant model')
+    parser.add_argument('--mirror', type=str, help=f'HTTP mirror, file:// URL or directory (default: ${MIRROR_ENV} or the Hugging Face Hub)')
+    parser.add_argument('--sha256', type=str, help='Expected SHA-256 (default: reported by the Hub)')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel range requests')
+    parser.add_argument('--models-dir', type=str, default=MODELS_DIR, help='Install directory')
+    parser.add_argument('--repo', type=str, default=MODEL_REPO, help='Hugging Face repository')
+    parser.add_argument('--file', type=str, default=MODEL_FILE, help='GGUF file in the repository')
+    args = parser.parse_args()
+
+    download_model(args.mirror, args.sha256, args.workers, args.models_dir, args.repo, args.file)
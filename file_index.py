@@ -0,0 +1,511 @@
+"""Background file index for search_files and fuzzy open_file_browser paths.
+
+File and folder names under the configured roots are stored in SQLite with
+an FTS5 trigram index, so "my thesis folder" or "downloads with the
+invoices" resolve with one indexed query instead of a filesystem walk.
+
+The indexer crawls the roots on a low-priority background thread, writing
+in batched transactions and pausing between batches to stay within its CPU
+share. Directories whose mtime has not changed since the last crawl are not
+listed again, so restarts are cheap. While running, the tree is kept current
+with inotify (through ctypes, no extra dependency).
+"""
+import difflib
+import logging
+import os
+import re
+import select
+import sqlite3
+import struct
+import threading
+import time
+
+INDEX_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant", "cache", "files.db")
+ROOTS_ENV = "AI_ASSISTANT_INDEX_ROOTS"
+
+# Skipped in addition to hidden files and directories
+EXCLUDED_NAMES = {"node_modules", "__pycache__", "site-packages", "venv", "lost+found"}
+
+# Words that describe the request rather than the file
+STOPWORDS = {
+    "a", "all", "an", "and", "browse", "browser", "document", "documents", "file", "files",
+    "find", "for", "from", "in", "me", "my", "of", "on", "open", "please", "search", "show",
+    "that", "the", "to", "where", "with",
+}
+FOLDER_WORDS = {"dir", "directory", "folder", "folders", "directories"}
+
+WORD_RE = re.compile(r"\w+")
+SUFFIXES = ("ies", "es", "s", "ing", "ed")
+
+logger = logging.getLogger(__name__)
+
+
+def default_roots():
+    """Index roots from $AI_ASSISTANT_INDEX_ROOTS, or the home directory"""
+    roots = os.environ.get(ROOTS_ENV)
+    if roots:
+        return [os.path.expanduser(root) for root in roots.split(os.pathsep) if root]
+    return [os.path.expanduser("~")]
+
+
+def query_terms(query):
+    """Split a request into search terms; returns (terms, wants_folder)"""
+    terms, wants_folder = [], False
+    for word in WORD_RE.findall(query.lower()):
+        if word in FOLDER_WORDS:
+            wants_folder = True
+            continue
+        if word in STOPWORDS:
+            continue
+        # "invoices" should find "invoice-2024.pdf"
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                break
+        if len(word) >= 3:  # Shortest term a trigram index can match
+            terms.append(word)
+    return terms, wants_folder
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class FileIndex:
+    """SQLite store of indexed paths with a trigram full-text index on names.
+
+    Each thread gets its own connection; WAL mode lets searches run while the
+    indexer writes.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._create_schema()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        db = self._connection()
+        with db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    parent TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    folder TEXT NOT NULL,   -- basename of parent, searchable
+                    is_dir INTEGER NOT NULL,
+                    mtime REAL NOT NULL     -- directories only; unchanged dirs are not listed again
+                )""")
+            db.execute("CREATE INDEX IF NOT EXISTS files_parent ON files(parent)")
+            try:
+                db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5("
+                           "name, folder, content='files', content_rowid='id', tokenize='trigram')")
+            except sqlite3.OperationalError:
+                # SQLite < 3.34 has no trigram tokenizer; fall back to prefix matching
+                db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5("
+                           "name, folder, content='files', content_rowid='id')")
+            db.executescript("""
+                CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO files_fts(rowid, name, folder) VALUES (new.id, new.name, new.folder);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, name, folder) VALUES ('delete', old.id, old.name, old.folder);
+                END;
+            """)
+        sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'files_fts'").fetchone()[0]
+        self.trigram = "trigram" in sql
+
+    def apply(self, upserts=(), deletes=()):
+        """Write one batch in a single transaction.
+
+        upserts are (path, is_dir, mtime) tuples; deleting a path also
+        deletes everything below it.
+        """
+        db = self._connection()
+        with db:
+            for path in deletes:
+                db.execute("DELETE FROM files WHERE path = ? OR (path > ? AND path < ?)",
+                           (path, path + "/", path + "0"))  # "0" sorts right after "/"
+            # The FTS row only depends on the path, so existing rows are only
+            # touched when the stored mtime changes
+            db.executemany(
+                "INSERT INTO files(path, parent, name, folder, is_dir, mtime) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET mtime = excluded.mtime, is_dir = excluded.is_dir",
+                [(path, os.path.dirname(path), os.path.basename(path),
+                  os.path.basename(os.path.dirname(path)), int(is_dir), mtime)
+                 for path, is_dir, mtime in upserts]
+            )
+
+    def dir_mtime(self, path):
+        """Stored mtime of an indexed directory, or None"""
+        row = self._connection().execute(
+            "SELECT mtime FROM files WHERE path = ? AND is_dir = 1", (path,)).fetchone()
+        return row[0] if row else None
+
+    def children(self, parent):
+        """{path: is_dir} of the indexed entries directly inside a directory"""
+        rows = self._connection().execute("SELECT path, is_dir FROM files WHERE parent = ?", (parent,))
+        return {path: bool(is_dir) for path, is_dir in rows}
+
+    def __len__(self):
+        return self._connection().execute("SELECT count(*) FROM files").fetchone()[0]
+
+    def _match(self, expression, limit):
+        # No ORDER BY: ranking every match of a common term costs more than
+        # the search itself, so a bounded set of candidates is ranked here
+        return self._connection().execute(
+            "SELECT f.path, f.name, f.is_dir FROM files_fts JOIN files f ON f.id = files_fts.rowid "
+            "WHERE files_fts MATCH ? LIMIT ?", (expression, limit)
+        ).fetchall()
+
+    def search(self, query, limit=10, prefer_dirs=False, candidates=200):
+        """Return [{'path', 'name', 'is_dir', 'score'}], best match first"""
+        terms, wants_folder = query_terms(query)
+        if not terms:
+            return []
+        prefer_dirs = prefer_dirs or wants_folder
+
+        phrases = [_fts_phrase(term) if self.trigram else _fts_phrase(term) + "*" for term in terms]
+        rows = self._match(" ".join(phrases), candidates)  # every term
+        if not rows and len(phrases) > 1:
+            rows = self._match(" OR ".join(phrases), candidates)  # any term
+        if not rows and self.trigram:
+            # Typos: names sharing at least two trigrams with a term, then
+            # keep the close ones only
+            pairs = set()
+            for term in terms:
+                grams = [term[i:i + 3] for i in range(len(term) - 2)]
+                pairs.update(f"({_fts_phrase(a)} AND {_fts_phrase(b)})"
+                             for i, a in enumerate(grams) for b in grams[i + 1:])
+            if pairs:
+                matchers = [difflib.SequenceMatcher(None, b=term) for term in terms]
+                rows = [row for row in self._match(" OR ".join(sorted(pairs)), candidates)
+                        if _closeness(matchers, row[1]) >= 0.7]
+
+        results = []
+        for path, name, is_dir in rows:
+            name_lower = name.lower()
+            stem = os.path.splitext(name_lower)[0]
+            # Terms matching the name count more than terms matching the folder
+            score = sum(2.0 for term in terms if term in name_lower)
+            if stem in terms or stem == " ".join(terms):
+                score += 3.0
+            if is_dir and prefer_dirs:
+                score += 3.0
+            score -= 0.02 * len(name) + 0.05 * path.count("/")  # Prefer short names and shallow paths
+            results.append({'path': path, 'name': name, 'is_dir': bool(is_dir), 'score': score})
+
+        results.sort(key=lambda result: -result['score'])
+        return results[:limit]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class Inotify:
+    """Minimal ctypes binding of the Linux inotify API"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_DONT_FOLLOW = 0x02000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+                  | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except AttributeError:
+            raise OSError("inotify is not available on this system")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._get_errno = ctypes.get_errno
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        """Watch a directory; returns the watch descriptor"""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = self._get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self, timeout=None):
+        """Wait for events; returns [(wd, mask, name)]"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events, offset = [], 0
+        while offset < len(buffer):
+            wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class FileIndexer:
+    """Crawl roots into a FileIndex and keep it current with inotify"""
+
+    def __init__(self, index, roots=None, batch_size=2000, cpu_share=0.5, watch=True,
+                 rescan_interval=3600, include_hidden=False):
+        self.index = index
+        self.roots = [os.path.abspath(root) for root in (roots or default_roots())]
+        self.batch_size = batch_size
+        self.cpu_share = cpu_share  # Fraction of wall time spent working; 1.0 disables the throttle
+        self.watch = watch
+        self.rescan_interval = rescan_interval
+        self.include_hidden = include_hidden
+
+        self.ready = threading.Event()  # Set after the first crawl
+        self.entries_written = 0
+        self.dirs_listed = 0
+        self.dirs_skipped = 0
+        self.crawl_time = 0.0
+
+        self._upserts = []
+        self._deletes = []
+        self._busy_since = None
+        self._inotify = None
+        self._watches = {}  # wd -> directory path
+        self._watch_limit_reached = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Crawl and then watch on a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="file-indexer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._inotify is not None:
+            self._inotify.close()
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        # Lowest CPU priority for this thread only; with CFQ/BFQ the I/O
+        # priority follows the nice level
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (OSError, AttributeError):
+            pass
+
+        if self.watch:
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                logger.info(f"inotify unavailable, relying on periodic rescans: {e}")
+
+        self.crawl()
+        self.ready.set()
+
+        last_crawl = time.monotonic()
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                self.process_events(timeout=1.0)
+            else:
+                self._stop.wait(1.0)
+            if self.rescan_interval and time.monotonic() - last_crawl >= self.rescan_interval:
+                self.crawl()
+                last_crawl = time.monotonic()
+
+    def _skip(self, name):
+        return (not self.include_hidden and name.startswith(".")) or name in EXCLUDED_NAMES
+
+    def crawl(self, roots=None, force=False):
+        """Index the roots, listing only directories that changed since the last crawl"""
+        start = time.perf_counter()
+        self._busy_since = time.perf_counter()
+        stack = [os.path.abspath(root) for root in (roots or self.roots)]
+
+        while stack and not self._stop.is_set():
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory, follow_symlinks=False).st_mtime
+            except OSError:
+                self._deletes.append(directory)
+                continue
+            self._add_watch(directory)
+
+            if not force and self.index.dir_mtime(directory) == mtime:
+                # Nothing was added or removed here; only descend
+                self.dirs_skipped += 1
+                stack.extend(path for path, is_dir in self.index.children(directory).items() if is_dir)
+                continue
+
+            self.dirs_listed += 1
+            known = self.index.children(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if self._skip(entry.name) or not _storable(entry.path):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        known.pop(entry.path, None)
+                        if is_dir:
+                            stack.append(entry.path)  # Upserted with its mtime when listed
+                        else:
+                            self._upserts.append((entry.path, False, 0.0))
+            except OSError:
+                continue
+
+            self._deletes.extend(known)  # Gone since the last crawl
+            # The directory's mtime is written after its entries, so an
+            # interrupted crawl lists it again next time
+            self._upserts.append((directory, True, mtime))
+            if len(self._upserts) >= self.batch_size:
+                self.flush()
+
+        self.flush()
+        self.crawl_time = time.perf_counter() - start
+
+    def flush(self):
+        """Write pending changes, then pause to stay within the CPU share"""
+        if not self._upserts and not self._deletes:
+            return
+        self.index.apply(self._upserts, self._deletes)
+        self.entries_written += len(self._upserts)
+        self._upserts, self._deletes = [], []
+
+        if self.cpu_share < 1.0 and self._busy_since is not None:
+            busy = time.perf_counter() - self._busy_since
+            self._stop.wait(busy * (1.0 - self.cpu_share) / self.cpu_share)
+            self._busy_since = time.perf_counter()
+
+    def _add_watch(self, directory):
+        if self._inotify is None or self._watch_limit_reached:
+            return
+        try:
+            self._watches[self._inotify.add_watch(directory)] = directory
+        except OSError as e:
+            if e.errno == 28:  # ENOSPC: fs.inotify.max_user_watches exhausted
+                self._watch_limit_reached = True
+                logger.warning("inotify watch limit reached; remaining directories are "
+                               "refreshed by periodic rescans")
+
+    def process_events(self, timeout=1.0, settle=0.2):
+        """Apply one batch of inotify events; returns the number of events"""
+        events = self._inotify.read_events(timeout)
+        if not events:
+            return 0
+        # Let a burst (an unpacked archive, a copied folder) arrive first
+        deadline = time.monotonic() + settle
+        while time.monotonic() < deadline:
+            more = self._inotify.read_events(max(0.0, deadline - time.monotonic()))
+            if not more:
+                break
+            events.extend(more)
+
+        new_dirs, overflow = [], False
+        for wd, mask, name in events:
+            if mask & Inotify.IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & (Inotify.IN_IGNORED | Inotify.IN_DELETE_SELF):
+                self._watches.pop(wd, None)
+                continue
+            if mask & Inotify.IN_MOVE_SELF:
+                # The subtree's paths are stale; a move within the roots
+                # re-adds them when the new location is crawled below
+                moved = self._watches.get(wd)
+                if moved is not None:
+                    self._watches = {w: path for w, path in self._watches.items()
+                                     if path != moved and not path.startswith(moved + "/")}
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name or self._skip(name):
+                continue
+            path = os.path.join(directory, name)
+            if not _storable(path):
+                continue
+
+            if mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+                self._deletes.append(path)
+            elif mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                if mask & Inotify.IN_ISDIR:
+                    new_dirs.append(path)  # May arrive with contents (a move or copy)
+                else:
+                    self._upserts.append((path, False, 0.0))
+
+        self._busy_since = time.perf_counter()
+        self.flush()
+        if new_dirs:
+            self.crawl(new_dirs, force=True)
+        if overflow:
+            self.crawl()  # Events were lost; list the directories that changed
+        return len(events)
+
+
+def _closeness(matchers, name):
+    """Best similarity between a search term (one matcher each) and a word of a file name"""
+    best = 0.0
+    for word in WORD_RE.findall(name.lower()) or [name.lower()]:
+        for matcher in matchers:
+            matcher.set_seq1(word)
+            if matcher.real_quick_ratio() > best and matcher.quick_ratio() > best:
+                best = max(best, matcher.ratio())
+    return best
+
+
+def _storable(path):
+    # Names that are not valid UTF-8 cannot be stored as SQLite text
+    try:
+        path.encode("utf-8")
+        return True
+    except UnicodeEncodeError:
+        return False
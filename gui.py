@@ -0,0 +1,576 @@
+"""GTK4 floating window for the assistant."""
+import queue
+import threading
+
+import gi
+
+gi.require_version("Gtk", "4.0")
+from gi.repository import GLib, Gtk, Gdk
+
+from assistant import Assistant
+from result_view import ResultView
+from tool_results import ToolResult
+
+
+# Quiet time after the last keystroke before the draft is prefilled
+PREFILL_DEBOUNCE_MS = 250
+
+# Typing effect: one character per tick, or several for long responses so
+# that typing never takes much longer than TYPING_MAX_MS
+TYPING_INTERVAL_MS = 20
+TYPING_MAX_MS = 1500
+
+
+class MyApplication(Gtk.Application, Assistant):
+    def __init__(self, daemon_client=None, idle_timeout=900, engine_options=None, engine=None):
+        Gtk.Application.__init__(self, application_id="com.example.MyGtkApplication")
+        GLib.set_application_name('AI Assistant')
+
+        self.drag_start_x = 0
+        self.drag_start_y = 0
+        self.window_start_x = 0
+        self.window_start_y = 0
+        self.is_dragging = False
+        self.response_text = None
+        self.result_view = None
+        self.entry = None
+        self.status_label = None
+        self.prefill_source = None
+        self.typing_source = None
+        self.typing_interval_ms = TYPING_INTERVAL_MS
+        # Queries and daemon calls run in order on one worker thread, started on first use
+        self._calls = queue.Queue()
+        self._worker = None
+
+        Assistant.__init__(self, daemon_client=daemon_client, idle_timeout=idle_timeout,
+                           engine_options=engine_options, engine=engine)
+
+    def on_send_clicked(self, button):
+        """Handle send button click"""
+        # Get the input text from stored entry reference
+        if not self.entry:
+            return
+
+        prompt = self.entry.get_text().strip()
+
+        if not prompt:
+            return
+
+        # The query itself supersedes any draft still waiting to be prefilled
+        self.cancel_prefill()
+
+        # Store the prompt for history before clearing
+        self.sessions.default.last_user_prompt = prompt
+        self.note_user_input()
+
+        # Clear input
+        self.entry.set_text("")
+
+        # Show thinking status
+        if self.status_label:
+            self.status_label.set_text("🤖 Thinking...")
+
+        # Run the AI query off the main loop
+        def run_query():
+            result = None
+            if self.daemon_client:
+                try:
+                    reply = self.daemon_client.process(prompt, structured=True)
+                    response = reply["response"]
+                    if reply.get("result"):
+                        result = ToolResult.from_dict(reply["result"])
+                except Exception as e:
+                    self.logger.error(f"Daemon request failed: {e}")
+                    response = f"Error: {e}"
+            else:
+                response = self.process_user_input(prompt)
+                result = self.sessions.default.last_tool_result
+            GLib.idle_add(self.show_response, response, result)
+
+        self.run_in_background(run_query)
+
+    def run_in_background(self, func, *args, **kwargs):
+        """Run a call on the worker thread, after those queued before it"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._worker_loop, name="assistant-gui", daemon=True)
+            self._worker.start()
+        self._calls.put((func, args, kwargs))
+
+    def _worker_loop(self):
+        while True:
+            func, args, kwargs = self._calls.get()
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                self.logger.error(f"Background call failed: {e}")
+
+    def show_response(self, response, result=None, remember=True):
+        """Show the response (and the rows of a list or table result) and resize window"""
+        # Clear thinking status
+        if self.status_label:
+            self.status_label.set_text("")
+
+        # Create response area if it doesn't exist
+        if not self.response_text:
+            self.create_response_area()
+
+        if self.response_text:
+            # Clear any previous content
+            buffer = self.response_text.get_buffer()
+            buffer.set_text("")
+
+            # Show typing effect for better UX
+            self.simulate_typing(response)
+            self.show_result(result)
+
+            # Resize window to fit content after a short delay
+            GLib.timeout_add(100, self.resize_window_to_fit_content)
+
+            # Add to conversation history
+            session = self.sessions.default
+            if remember and session.last_user_prompt is not None:
+                self.add_to_history(session.last_user_prompt, response, session)
+
+    def on_scheduled_result(self, job, result):
+        """Show what a scheduled job did; it is not part of the conversation"""
+        Assistant.on_scheduled_result(self, job, result)
+        text = str(result) if job.tool == "notify" else f"⏰ {job.description}: {result}"
+        GLib.idle_add(self.show_response, text, result if isinstance(result, ToolResult) else None, False)
+
+    def create_response_area(self):
+        """Create the response area dynamically"""
+        # Create response area
+        self.response_scrolled = Gtk.ScrolledWindow()
+        self.response_scrolled.set_min_content_height(150)
+        self.response_scrolled.set_margin_top(5)
+        self.response_scrolled.set_margin_bottom(5)
+        self.response_scrolled.set_margin_start(5)
+        self.response_scrolled.set_margin_end(5)
+
+        self.response_text = Gtk.TextView()
+        self.response_text.set_editable(False)
+        self.response_text.set_wrap_mode(Gtk.WrapMode.WORD)
+        self.response_scrolled.set_child(self.response_text)
+
+        # Add to background panel
+        self.background_panel.append(self.response_scrolled)
+
+    def show_result(self, result):
+        """Show a structured result in the virtualized list, or hide the list"""
+        if result is None or not len(result):
+            if self.result_view:
+                self.result_view.set_visible(False)
+            return
+
+        if not self.result_view:
+            self.result_view = ResultView()
+            self.result_view.set_margin_start(5)
+            self.result_view.set_margin_end(5)
+            self.result_view.set_margin_bottom(5)
+            self.background_panel.append(self.result_view)
+        self.result_view.set_result(result)
+        self.result_view.set_visible(True)
+
+    def stream_character(self, text):
+        """Add characters to the streaming response"""
+        if self.response_text:
+            buffer = self.response_text.get_buffer()
+            end_iter = buffer.get_end_iter()
+            buffer.insert(end_iter, text)
+            # Don't resize on every character to avoid flickering
+
+    def start_streaming(self):
+        """Initialize streaming response"""
+        if self.response_text:
+            self.response_text.get_buffer().set_text("")
+
+    def simulate_typing(self, full_text):
+        """Simulate typing with one repeating timeout, replacing any typing in progress"""
+        self.stop_typing()
+        if not full_text:
+            return
+
+        ticks = max(1, TYPING_MAX_MS // self.typing_interval_ms)
+        step = max(1, -(-len(full_text) // ticks))
+        position = 0
+
+        def type_next_chunk():
+            nonlocal position
+            self.stream_character(full_text[position:position + step])
+            position += step
+            if position < len(full_text):
+                return True
+            # Typing complete
+            self.typing_source = None
+            return False
+
+        self.typing_source = GLib.timeout_add(self.typing_interval_ms, type_next_chunk)
+
+    def stop_typing(self):
+        if self.typing_source is not None:
+            GLib.source_remove(self.typing_source)
+            self.typing_source = None
+
+    def resize_window_to_fit_content(self):
+        """Resize window to fit content"""
+        if not self.response_text:
+            return
+
+        # Get the text buffer
+        buffer = self.response_text.get_buffer()
+        start_iter = buffer.get_start_iter()
+        end_iter = buffer.get_end_iter()
+        text = buffer.get_text(start_iter, end_iter, False)
+
+        # Estimate height based on text length (rough approximation)
+        # About 50 characters per line, 20 pixels per line
+        lines = max(1, len(text) // 50)
+        estimated_height = lines * 25 + 50  # Add some padding
+        if self.result_view and self.result_view.get_visible():
+            # The list scrolls; it asks for at most its max content height
+            estimated_height += 350
+
+        # Get current window and resize
+        window = self.response_text.get_root()
+        if window:
+            current_width = window.get_width()
+            # Height = title bar (20) + input area (60) + estimated content + margins (20)
+            new_height = 20 + 60 + estimated_height + 20
+            new_height = min(new_height, 600)  # Cap at 600px
+            new_height = max(new_height, 200)  # Minimum 200px
+
+            print(f"[DEBUG] Resizing window: {current_width}x{new_height}")
+
+            # For GTK4, try to resize the window surface directly
+            try:
+                # Try setting default size first
+                window.set_default_size(current_width, new_height)
+
+                # Try to get the surface and resize it
+                surface = window.get_surface()
+                if surface:
+                    # Try to resize the surface directly
+                    try:
+                        surface.set_size_request(current_width, new_height)
+                    except:
+                        pass
+
+                # Force layout update
+                window.queue_resize()
+
+            except Exception as e:
+                print(f"[DEBUG] Window resize failed: {e}")
+                # Fallback: just set default size
+                try:
+                    window.set_default_size(current_width, new_height)
+                except:
+                    pass
+
+    def on_button_press(self, controller, n_press, x, y):
+        """Handle mouse button press for dragging"""
+        if n_press == 1:  # Left mouse button
+            title_bar = controller.get_widget()
+            # Get the window from the title bar's root
+            window = title_bar.get_root()
+            self.drag_start_x = x
+            self.drag_start_y = y
+            self.is_dragging = True
+
+            # Get initial window position
+            try:
+                surface = window.get_surface()
+                if surface and hasattr(surface, 'get_position'):
+                    self.window_start_x, self.window_start_y = surface.get_position()
+                else:
+                    # Fallback
+                    self.window_start_x, self.window_start_y = 100, 100
+            except:
+                self.window_start_x, self.window_start_y = 100, 100
+
+    def on_motion(self, controller, x, y):
+        """Handle mouse motion for dragging"""
+        if self.is_dragging:
+            title_bar = controller.get_widget()
+            window = title_bar.get_root()
+
+            # Calculate new position
+            delta_x = x - self.drag_start_x
+            delta_y = y - self.drag_start_y
+
+            new_x = self.window_start_x + int(delta_x)
+            new_y = self.window_start_y + int(delta_y)
+
+            # Try to move the window
+            try:
+                surface = window.get_surface()
+                if surface and hasattr(surface, 'set_position'):
+                    surface.set_position(new_x, new_y)
+                elif hasattr(window, 'move'):
+                    window.move(new_x, new_y)
+            except Exception:
+                pass  # Silently fail if move doesn't work
+
+    def on_button_release(self, controller, n_press, x, y):
+        """Handle mouse button release"""
+        if n_press == 1:  # Left mouse button
+            self.is_dragging = False
+
+    def on_entry_changed(self, entry):
+        """Prefill the draft once typing pauses"""
+        self.cancel_prefill()
+        if entry.get_text().strip():
+            self.prefill_source = GLib.timeout_add(PREFILL_DEBOUNCE_MS, self.prefill_entry_text)
+
+    def cancel_prefill(self):
+        if self.prefill_source is not None:
+            GLib.source_remove(self.prefill_source)
+            self.prefill_source = None
+
+    def prefill_entry_text(self):
+        """Hand the current draft to the engine (or the daemon) for speculative prefill"""
+        self.prefill_source = None
+        draft = self.entry.get_text() if self.entry else ""
+        if self.daemon_client:
+            self.run_in_background(self.daemon_client.call, "prefill", prompt=draft)
+        else:
+            # Only enqueues; the engine worker evaluates it
+            self.prefill_draft(draft)
+        return False
+
+    def on_entry_focus(self, controller):
+        """Preload the model ahead of the first request"""
+        if self.daemon_client:
+            self.run_in_background(self.daemon_client.call, "preload")
+        elif self.ai_engine and not self.ai_engine.is_loaded:
+            if self.status_label:
+                self.status_label.set_text("⚡ Waking up...")
+                GLib.timeout_add(1000, self.clear_waking_status)
+            self.ai_engine.preload_async()
+
+    def clear_waking_status(self):
+        """Clear the preload status unless a request replaced it"""
+        if self.status_label and self.status_label.get_text() == "⚡ Waking up...":
+            self.status_label.set_text("")
+        return False
+
+    def on_key_pressed(self, controller, keyval, keycode, state):
+        """Handle keyboard shortcuts"""
+        # Enter key to send message
+        if keyval == Gdk.KEY_Return or keyval == Gdk.KEY_KP_Enter:
+            self.on_send_clicked(None)
+            return True
+
+        # Escape key to clear input
+        elif keyval == Gdk.KEY_Escape:
+            if self.entry:
+                self.entry.set_text("")
+            return True
+
+        return False
+
+    def do_shutdown(self):
+        """Stop typing and the scheduler timer before the application exits"""
+        self.stop_typing()
+        self.cancel_prefill()
+        if self._job_scheduler is not None:
+            self._job_scheduler.stop()
+        Gtk.Application.do_shutdown(self)
+
+    def do_activate(self):
+        print("Application activating...")
+
+        window = Gtk.ApplicationWindow(application=self, title="AI Assistant")
+
+        # Make window transparent with minimal decorations
+        window.set_decorated(True)  # Keep basic window decorations for moving
+        window.set_default_size(500, 100)  # Start very small, just for title + input
+
+        # Create CSS provider for styling
+        css_provider = Gtk.CssProvider()
+        css = """
+        window {
+            background-color: rgba(0, 0, 0, 0.1);
+            border: 1px solid rgba(0, 100, 255, 0.3);
+            border-radius: 15px;
+            box-shadow: 0 0 5px rgba(0, 100, 255, 0.2);
+        }
+        .title-bar {
+            background-color: rgba(0, 100, 255, 0.2);
+            border-top-left-radius: 15px;
+            border-top-right-radius: 15px;
+            border-bottom: 1px solid rgba(0, 100, 255, 0.3);
+        }
+        .title-bar:hover {
+            background-color: rgba(0, 100, 255, 0.3);
+        }
+        .title-label {
+            color: rgba(0, 150, 255, 0.8);
+            font-size: 12px;
+            font-weight: bold;
+            margin: 0 10px;
+        }
+        .background-panel {
+            background-color: rgba(20, 20, 20, 0.6);
+            border-bottom-left-radius: 10px;
+            border-bottom-right-radius: 10px;
+            margin: 0 5px 5px 5px;
+        }
+        textview {
+            background-color: transparent;
+            color: #ffffff;
+            font-size: 14px;
+            padding: 5px;
+        }
+        textview text {
+            background-color: transparent;
+        }
+        entry {
+            background-color: transparent;
+            color: #ffffff;
+            border: 1px solid rgba(0, 100, 255, 0.4);
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 14px;
+            margin: 10px;
+            box-shadow: 0 0 3px rgba(0, 100, 255, 0.2);
+        }
+        entry:focus {
+            border-color: rgba(0, 150, 255, 0.6);
+            box-shadow: 0 0 5px rgba(0, 150, 255, 0.3);
+        }
+        button {
+            background-color: transparent;
+            color: #ffffff;
+            border: 1px solid rgba(0, 100, 255, 0.4);
+            border-radius: 8px;
+            padding: 8px 16px;
+            font-size: 14px;
+            font-weight: bold;
+            margin: 10px;
+            box-shadow: 0 0 3px rgba(0, 100, 255, 0.2);
+            transition: all 0.2s ease;
+        }
+        button:hover {
+            border-color: rgba(0, 150, 255, 0.6);
+            box-shadow: 0 0 5px rgba(0, 150, 255, 0.3);
+            color: rgba(0, 150, 255, 1.0);
+        }
+        listview {
+            background-color: transparent;
+            color: #ffffff;
+        }
+        .result-title, .result-columns {
+            color: rgba(0, 200, 255, 0.8);
+            font-size: 12px;
+        }
+        .result-table label, .result-columns {
+            font-family: monospace;
+        }
+        .status-label {
+            color: rgba(0, 200, 255, 0.8);
+            font-size: 11px;
+            font-style: italic;
+            text-align: center;
+        }
+        """
+        css_provider.load_from_data(css.encode())
+
+        # Apply CSS to the default screen
+        Gtk.StyleContext.add_provider_for_display(
+            Gdk.Display.get_default(),
+            css_provider,
+            Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+        )
+
+        # Create main vertical container
+        main_vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+
+        # Create a draggable title bar
+        title_bar = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=0)
+        title_bar.set_size_request(-1, 20)  # Fixed height for dragging
+        title_bar.set_css_classes(["title-bar"])
+
+        # Add a label to make it visually distinct
+        title_label = Gtk.Label(label="AI Assistant")
+        title_label.set_css_classes(["title-label"])
+        title_bar.append(title_label)
+
+        # Create background panel
+        self.background_panel = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
+        self.background_panel.set_css_classes(["background-panel"])
+
+        # Create status label
+        self.status_label = Gtk.Label(label="")
+        self.status_label.set_css_classes(["status-label"])
+        self.status_label.set_margin_start(10)
+        self.status_label.set_margin_end(10)
+        self.status_label.set_margin_bottom(5)
+        self.background_panel.append(self.status_label)
+
+        # Create input area (horizontal box)
+        input_hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        input_hbox.set_margin_top(5)
+        input_hbox.set_margin_bottom(5)
+        input_hbox.set_margin_start(5)
+        input_hbox.set_margin_end(5)
+
+        # Create the prompt input box
+        self.entry = Gtk.Entry()
+        self.entry.set_placeholder_text("Enter your prompt here...")
+        self.entry.set_hexpand(True)
+
+        # Reload an idle-unloaded model while the user starts typing
+        focus_controller = Gtk.EventControllerFocus()
+        focus_controller.connect("enter", self.on_entry_focus)
+        self.entry.add_controller(focus_controller)
+
+        # Evaluate the prompt so far while the user is still typing
+        self.entry.connect("changed", self.on_entry_changed)
+
+        # Add keyboard shortcuts
+        key_controller = Gtk.EventControllerKey()
+        key_controller.connect("key-pressed", self.on_key_pressed)
+        self.entry.add_controller(key_controller)
+
+        input_hbox.append(self.entry)
+
+        # Create the send button
+        button = Gtk.Button(label="Send")
+        button.connect("clicked", self.on_send_clicked)
+        input_hbox.append(button)
+
+        # Initially, only add the input area
+        self.background_panel.append(input_hbox)
+
+        # Response area will be added dynamically when needed
+        self.response_scrolled = None
+        self.response_text = None
+        self.result_view = None
+        main_vbox.append(title_bar)
+        main_vbox.append(self.background_panel)
+
+        # Set the main container as the window's child
+        window.set_child(main_vbox)
+
+        # Add mouse event controllers for dragging to the title bar
+        click_controller = Gtk.GestureClick()
+        click_controller.connect("pressed", self.on_button_press)
+        click_controller.connect("released", self.on_button_release)
+        title_bar.add_controller(click_controller)
+
+        motion_controller = Gtk.EventControllerMotion()
+        motion_controller.connect("motion", self.on_motion)
+        title_bar.add_controller(motion_controller)
+
+        window.present()
+
+        # Free the model while the window sits unused
+        if self.ai_engine:
+            self.ai_engine.start_idle_monitor()
+
+        # Keep the file index current for search_files and run scheduled jobs
+        # from a main-loop timeout (the daemon does both when attached)
+        if not self.daemon_client:
+            self.start_file_indexer()
+            from scheduler import GLibTimer
+            self.start_scheduler(GLibTimer)
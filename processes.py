@@ -0,0 +1,217 @@
+"""Process-table snapshots for the running-processes and kill tools.
+
+A scan reads one /proc/<pid>/stat per process (state, CPU ticks, start time
+and RSS are all on that one line, so statm is not needed) and nothing else;
+command lines are only read when a name search finds no process name. CPU usage is the delta
+against the previous cached snapshot, so no call has to sleep, and top-N
+selection uses a heap instead of sorting the whole table.
+"""
+import heapq
+import os
+import signal
+import time
+from collections import namedtuple
+
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+PF_KTHREAD = 0x00200000
+
+ProcessInfo = namedtuple("ProcessInfo", "pid name state ppid session cpu_ticks start_ticks rss_bytes kernel_thread")
+
+# The desktop session itself: closing one of these logs the user out, kills
+# the display or silences audio. Names as in /proc/<pid>/stat, which cuts
+# them at 15 characters.
+SESSION_PROCESSES = {
+    "systemd", "init", "dbus-daemon", "dbus-broker", "dbus-broker-lau", "gdm", "gdm-session-wor",
+    "gdm-wayland-ses", "gdm-x-session", "sddm", "sddm-helper", "lightdm", "login", "sshd",
+    "Xorg", "Xwayland", "gnome-shell", "gnome-session-b", "gnome-session-c", "mutter",
+    "kwin_x11", "kwin_wayland", "plasmashell", "ksmserver", "xfce4-session", "xfwm4",
+    "cinnamon", "cinnamon-sessio", "mate-session", "marco", "sway", "Hyprland", "weston",
+    "pipewire", "wireplumber", "pulseaudio", "xdg-desktop-por",
+}
+
+
+def parse_stat(pid, line):
+    """Parse the contents of /proc/<pid>/stat into a ProcessInfo"""
+    # The command name is in parentheses and may itself contain ") "
+    head, _, rest = line.rpartition(")")
+    name = head.partition("(")[2]
+    fields = rest.split()
+    # fields[0] is field 3 of proc(5): state, ppid, ..., session (6), flags (9),
+    # utime (14), stime (15), starttime (22), rss (24)
+    return ProcessInfo(
+        pid=pid,
+        name=name,
+        state=fields[0],
+        ppid=int(fields[1]),
+        session=int(fields[3]),
+        cpu_ticks=int(fields[11]) + int(fields[12]),
+        start_ticks=int(fields[19]),
+        rss_bytes=int(fields[21]) * PAGE_SIZE,
+        kernel_thread=bool(int(fields[6]) & PF_KTHREAD),
+    )
+
+
+def read_cpu_ticks():
+    """(total, idle) jiffies across all CPUs from /proc/stat"""
+    with open('/proc/stat', 'r') as f:
+        fields = [int(x) for x in f.readline().split()[1:]]
+    # idle + iowait count as idle
+    return sum(fields), fields[3] + (fields[4] if len(fields) > 4 else 0)
+
+
+def protected_pids(processes, pid=None):
+    """Pids the kill tool must never pick from a process table (pid -> ProcessInfo).
+
+    That is init, the given process (default: this one), its ancestors (the
+    shell, terminal or IDE it runs in) and the leader of its session, and
+    the desktop session's own processes. Other session leaders are fair
+    game: every app the assistant opens runs in a session of its own.
+    """
+    pid = os.getpid() if pid is None else pid
+    protected = {1}
+    own = processes.get(pid)
+    while pid > 1 and pid not in protected:
+        protected.add(pid)
+        process = processes.get(pid)
+        pid = process.ppid if process is not None else 0
+    if own is not None and own.session > 0:
+        protected.add(own.session)
+    for process in processes.values():
+        if process.name in SESSION_PROCESSES:
+            protected.add(process.pid)
+    return protected
+
+
+class ProcessSnapshot:
+    """All processes at one moment, with CPU usage relative to an earlier snapshot"""
+
+    def __init__(self, processes, cpu_total, cpu_idle, timestamp, previous=None):
+        self.processes = processes  # pid -> ProcessInfo
+        self.cpu_total = cpu_total
+        self.cpu_idle = cpu_idle
+        self.timestamp = timestamp
+        self.cpu_percent = {}  # pid -> % of one CPU since the previous snapshot
+        self.system_cpu_percent = None
+
+        if previous is not None:
+            self._diff(previous)
+
+    def _diff(self, previous):
+        elapsed_ticks = (self.timestamp - previous.timestamp) * CLK_TCK
+        total_diff = self.cpu_total - previous.cpu_total
+        if total_diff > 0:
+            self.system_cpu_percent = 100.0 * (total_diff - (self.cpu_idle - previous.cpu_idle)) / total_diff
+        if elapsed_ticks <= 0:
+            return
+
+        before = previous.processes
+        for pid, process in self.processes.items():
+            old = before.get(pid)
+            # A reused pid has a different start time
+            if old is not None and old.start_ticks == process.start_ticks:
+                self.cpu_percent[pid] = 100.0 * (process.cpu_ticks - old.cpu_ticks) / elapsed_ticks
+
+    def __len__(self):
+        return len(self.processes)
+
+
+class ProcessTable:
+    """Scan /proc and keep the last snapshot for CPU deltas"""
+
+    def __init__(self, proc_path='/proc', max_age=1.0, min_interval=0.1):
+        self.proc_path = proc_path
+        self.max_age = max_age  # Reuse a snapshot younger than this
+        self.min_interval = min_interval  # Shortest window CPU usage is measured over
+        self.snapshot = None
+        self._baseline = None
+
+    def _scan_processes(self):
+        processes = {}
+        with os.scandir(self.proc_path) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                pid = int(entry.name)
+                try:
+                    fd = os.open(f"{self.proc_path}/{pid}/stat", os.O_RDONLY)
+                    try:
+                        data = os.read(fd, 1024)
+                    finally:
+                        os.close(fd)
+                    processes[pid] = parse_stat(pid, data.decode("utf-8", "replace"))
+                except (OSError, ValueError, IndexError):
+                    continue  # Exited during the scan
+        return processes
+
+    def scan(self):
+        """Take a new snapshot, with CPU usage since the previous one"""
+        previous = self.snapshot or self._baseline
+        if previous is None:
+            # First call: take a baseline now; CPU usage needs two samples
+            self._baseline = self._take(None)
+            previous = self._baseline
+        wait = self.min_interval - (time.monotonic() - previous.timestamp)
+        if wait > 0:
+            time.sleep(wait)
+
+        self.snapshot = self._take(previous)
+        return self.snapshot
+
+    def _take(self, previous):
+        processes = self._scan_processes()
+        cpu_total, cpu_idle = read_cpu_ticks()
+        return ProcessSnapshot(processes, cpu_total, cpu_idle, time.monotonic(), previous)
+
+    def current(self):
+        """The cached snapshot if it is fresh enough, else a new one"""
+        if self.snapshot is None or time.monotonic() - self.snapshot.timestamp > self.max_age:
+            return self.scan()
+        return self.snapshot
+
+    def top(self, n=10, sort_by="cpu", include_kernel=False):
+        """The n processes using the most CPU or memory, as (ProcessInfo, cpu_percent)"""
+        snapshot = self.current()
+        candidates = (p for p in snapshot.processes.values() if include_kernel or not p.kernel_thread)
+        if sort_by == "memory":
+            key = lambda p: p.rss_bytes
+        elif sort_by == "cpu":
+            key = lambda p: (snapshot.cpu_percent.get(p.pid, 0.0), p.rss_bytes)
+        else:
+            raise ValueError(f"Unknown sort key: {sort_by} (use 'cpu' or 'memory')")
+        return [(p, snapshot.cpu_percent.get(p.pid, 0.0)) for p in heapq.nlargest(n, candidates, key=key)]
+
+    def find(self, name):
+        """Processes whose name contains name (case-insensitive), else whose command line does"""
+        name = name.lower()
+        own = {os.getpid(), os.getppid()}  # Our own command line may well contain the name
+        processes = [p for p in self.current().processes.values()
+                     if not p.kernel_thread and p.pid not in own]
+        matches = [p for p in processes if name in p.name.lower()]
+        if not matches:
+            matches = [p for p in processes if name in self.command_line(p.pid).lower()]
+        return matches
+
+    def protected_pids(self):
+        """protected_pids() for the current snapshot"""
+        return protected_pids(self.current().processes)
+
+    def command_line(self, pid):
+        """The full command line of a process, or "" if unavailable"""
+        try:
+            with open(f"{self.proc_path}/{pid}/cmdline", "rb") as f:
+                return f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+        except OSError:
+            return ""
+
+
+def terminate(process, sig=signal.SIGTERM):
+    """Send a signal to a process, refusing targets that must not be killed"""
+    if process.pid in (1, os.getpid()) or process.kernel_thread:
+        raise PermissionError(f"Refusing to signal {process.name} (pid {process.pid})")
+    try:
+        if os.stat(f"/proc/{process.pid}").st_uid != os.getuid():
+            raise PermissionError(f"{process.name} (pid {process.pid}) belongs to another user")
+    except FileNotFoundError:
+        raise ProcessLookupError(f"{process.name} (pid {process.pid}) is no longer running")
+    os.kill(process.pid, sig)
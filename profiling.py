@@ -0,0 +1,218 @@
+"""On-demand profiling of individual requests.
+
+While armed, a RequestProfiler wraps the next N requests and records, per
+request:
+
+- a cProfile of the requesting thread (``.pstats``, for snakeviz/pstats),
+- sampled stacks of the requesting thread and the engine threads as
+  collapsed stacks (``.collapsed``, ready for flamegraph.pl or speedscope),
+- Python allocations from tracemalloc and llama.cpp's own timing counters
+  (``.json``),
+
+under ~/.ai_assistant/profiles/, and prints a short top-N summary. Arm it
+with ``main.py --profile N`` or by typing ``/profile N`` in the entry box.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".ai_assistant", "profiles")
+
+# cProfile and tracemalloc are process-wide: one profiled request at a time,
+# across all profilers; requests running meanwhile are not profiled
+_PROFILE_LOCK = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler:
+    """Sample the stacks of selected threads on a background thread"""
+
+    def __init__(self, thread_ids, interval=0.005, thread_prefixes=("llm-",)):
+        self.thread_ids = set(thread_ids)
+        self.interval = interval
+        self.thread_prefixes = thread_prefixes
+        self.stacks = Counter()  # "thread;outer;...;inner" -> samples
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sampled_threads(self):
+        names = {}
+        for thread in threading.enumerate():
+            if thread.ident in self.thread_ids or thread.name.startswith(self.thread_prefixes):
+                names[thread.ident] = thread.name
+        return names
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = self._sampled_threads()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in names:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names[thread_id])
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self):
+        """Collapsed-stack text: one "frame;frame;frame count" line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Profile the next N requests, then disarm"""
+
+    def __init__(self, requests=1, engine=None, output_dir=PROFILE_DIR, top=10, sample_interval=0.005):
+        self.remaining = requests
+        self.total = requests
+        self.engine = engine
+        self.output_dir = output_dir
+        self.top = top
+        self.sample_interval = sample_interval
+        self.written = []  # Paths of all files written
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.remaining > 0
+
+    def _claim(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+            return self.total - self.remaining
+
+    def _perf_counters(self):
+        if self.engine is None or not hasattr(self.engine, "perf_counters"):
+            return {}
+        return self.engine.perf_counters()
+
+    def run(self, label, function, *args, **kwargs):
+        """Call function(*args, **kwargs), profiling it if requests remain.
+
+        While another request is being profiled, this one runs unprofiled
+        and does not count against the remaining requests.
+        """
+        if not self.active or not _PROFILE_LOCK.acquire(blocking=False):
+            return function(*args, **kwargs)
+        try:
+            number = self._claim()
+            if number is None:
+                return function(*args, **kwargs)
+            return self._profile(number, label, function, *args, **kwargs)
+        finally:
+            _PROFILE_LOCK.release()
+
+    def _profile(self, number, label, function, *args, **kwargs):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        counters_before = self._perf_counters()
+
+        sampler = StackSampler([threading.get_ident()], self.sample_interval)
+        profile = cProfile.Profile()
+        sampler.start()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            wall_ms = (time.perf_counter() - start) * 1000
+            sampler.stop()
+
+            _, peak = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("lineno")
+            if started_tracing:
+                tracemalloc.stop()
+
+            counters_after = self._perf_counters()
+            llama = {key: round(counters_after[key] - counters_before.get(key, 0), 3)
+                     for key in counters_after if key != "load_ms"}
+
+            try:
+                self._write(number, label, profile, sampler, wall_ms, peak, allocations, llama)
+            except OSError as e:
+                print(f"⚠️ Could not write profile: {e}")
+
+    def _write(self, number, label, profile, sampler, wall_ms, peak, allocations, llama):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = "".join(c if c.isalnum() else "-" for c in label.lower())[:40].strip("-") or "request"
+        base = os.path.join(self.output_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{number}-{slug}")
+
+        profile.dump_stats(base + ".pstats")
+        with open(base + ".collapsed", "w") as f:
+            f.write(sampler.collapsed())
+
+        stats = pstats.Stats(profile, stream=io.StringIO())
+
+        summary = {
+            "label": label,
+            "wall_ms": round(wall_ms, 3),
+            "python_peak_bytes": peak,
+            "top_allocations": [
+                {"where": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+                for stat in allocations[:self.top]
+            ],
+            "llama_cpp": llama,
+            "samples": sum(sampler.stacks.values()),
+        }
+        with open(base + ".json", "w") as f:
+            json.dump(summary, f, indent=2)
+        self.written.extend(base + suffix for suffix in (".pstats", ".collapsed", ".json"))
+
+        self._print_summary(number, summary, stats, sampler, base)
+
+    def _print_summary(self, number, summary, stats, sampler, base):
+        print(f"📊 Profile {number}/{self.total} '{summary['label'][:60]}': {summary['wall_ms']:.1f} ms, "
+              f"peak Python memory {summary['python_peak_bytes'] / 1024:.0f} KB")
+
+        llama = summary["llama_cpp"]
+        if llama:
+            print(f"   llama.cpp: {llama.get('prompt_tokens', 0):.0f} prompt tokens in "
+                  f"{llama.get('prompt_eval_ms', 0):.1f} ms, {llama.get('eval_tokens', 0):.0f} tokens "
+                  f"generated in {llama.get('eval_ms', 0):.1f} ms")
+
+        print("   Top functions (cumulative):")
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:self.top]
+        for (filename, line, name), (_, calls, _, cumulative, _) in rows:
+            print(f"     {cumulative * 1000:9.1f} ms  {calls:6d}x  {name} ({os.path.basename(filename)}:{line})")
+
+        # Innermost frames of the sampled stacks: where threads actually were
+        leaves = Counter()
+        for stack, count in sampler.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values())
+        if total:
+            print("   Hottest frames (sampled):")
+            for frame, count in leaves.most_common(min(self.top, 5)):
+                print(f"     {100.0 * count / total:5.1f}%  {frame}")
+
+        for allocation in summary["top_allocations"][:3]:
+            print(f"   Allocated {allocation['bytes'] / 1024:.0f} KB at {allocation['where']}")
+        print(f"   Written to {base}.{{pstats,collapsed,json}}")
@@ -0,0 +1,90 @@
+"""Virtualized GTK4 view of structured tool results.
+
+The rows live in a Gtk.StringList behind a Gtk.ListView, which only creates
+widgets for the rows on screen (plus a few for scrolling) and rebinds them
+as the list scrolls, so a result with thousands of rows costs about as much
+to show as one with ten. A search entry filters the rows as you type; the
+filter runs incrementally so large lists never block the main loop.
+"""
+import gi
+
+gi.require_version("Gtk", "4.0")
+gi.require_version("Pango", "1.0")
+from gi.repository import Gtk, Pango
+
+# Lists shorter than this are shown without the filter entry
+FILTER_MIN_ROWS = 10
+
+
+class ResultView(Gtk.Box):
+    """Title, filter entry and virtualized list for one ToolResult"""
+
+    def __init__(self, min_height=150, max_height=350):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+        self.set_css_classes(["result-view"])
+        self.rows_created = 0  # Row widgets made by the factory, for benchmarks
+
+        self.title = Gtk.Label(xalign=0)
+        self.title.set_css_classes(["result-title"])
+        self.title.set_ellipsize(Pango.EllipsizeMode.END)
+        self.append(self.title)
+
+        self.search = Gtk.SearchEntry()
+        self.search.set_placeholder_text("Filter...")
+        self.search.connect("search-changed", self.on_search_changed)
+        self.append(self.search)
+
+        self.columns = Gtk.Label(xalign=0)
+        self.columns.set_css_classes(["result-columns"])
+        self.append(self.columns)
+
+        self.store = Gtk.StringList()
+        self.filter = Gtk.StringFilter.new(Gtk.PropertyExpression.new(Gtk.StringObject, None, "string"))
+        self.filter.set_ignore_case(True)
+        self.filter.set_match_mode(Gtk.StringFilterMatchMode.SUBSTRING)
+        self.filtered = Gtk.FilterListModel.new(self.store, self.filter)
+        self.filtered.set_incremental(True)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_setup_row)
+        factory.connect("bind", self.on_bind_row)
+        self.list_view = Gtk.ListView.new(Gtk.NoSelection.new(self.filtered), factory)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scrolled.set_min_content_height(min_height)
+        scrolled.set_max_content_height(max_height)
+        scrolled.set_propagate_natural_height(True)
+        scrolled.set_child(self.list_view)
+        self.append(scrolled)
+
+    def on_setup_row(self, factory, list_item):
+        label = Gtk.Label(xalign=0)
+        label.set_ellipsize(Pango.EllipsizeMode.END)
+        list_item.set_child(label)
+        self.rows_created += 1
+
+    def on_bind_row(self, factory, list_item):
+        list_item.get_child().set_text(list_item.get_item().get_string())
+
+    def on_search_changed(self, entry):
+        self.filter.set_search(entry.get_text())
+
+    def set_result(self, result):
+        """Show a ToolResult, replacing the previous one"""
+        lines = result.lines()
+        self.search.set_text("")
+        self.filter.set_search("")
+        self.store.splice(0, self.store.get_n_items(), lines)
+
+        self.title.set_text(result.title)
+        header = result.header_line()
+        self.columns.set_text(header or "")
+        self.columns.set_visible(bool(header))
+        self.list_view.set_css_classes(["result-table"] if result.is_table else [])
+        self.search.set_visible(len(lines) >= FILTER_MIN_ROWS)
+
+    @property
+    def visible_rows(self):
+        """Rows passing the current filter"""
+        return self.filtered.get_n_items()
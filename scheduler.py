@@ -0,0 +1,550 @@
+"""Deferred and recurring tool calls ("open Slack at 9", "remind me every hour").
+
+Pending jobs sit in a heap ordered by due time and are saved to
+~/.ai_assistant/jobs.json, so they survive restarts. Nothing polls: one
+timer is armed for the earliest job only, either a GLib timeout on the GUI's
+main loop or, in the terminal and daemon modes, one sleeping thread. Idle
+cost therefore does not depend on the number of pending jobs.
+
+Due jobs run through the normal tool path (Assistant.execute_tool).
+Recurring jobs that were due several times while the assistant was not
+running run once, then continue on their schedule.
+
+The GUI, the daemon, the terminal and one-shot --prompt runs share the
+file. Every change is made under an flock on jobs.json.lock, on the jobs
+as last saved by any process, so ids stay unique and no process overwrites
+another's jobs. Only one started scheduler runs due jobs: the one holding
+the lock on jobs.json.owner. It watches the file with inotify to pick up
+jobs added elsewhere; the others try to take over every RETRY_SECONDS.
+"""
+import contextlib
+import fcntl
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+
+JOBS_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant", "jobs.json")
+
+# The timer is re-armed at least this often, so wall-clock changes and
+# suspend are noticed (timers count monotonic time)
+MAX_SLEEP_SECONDS = 3600
+
+# How often a started scheduler that does not run jobs checks whether it
+# can take over, and how often the one that does re-reads the file when
+# inotify is unavailable
+RETRY_SECONDS = 60
+
+DURATION_UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+    "w": 604800, "week": 604800, "weeks": 604800,
+}
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)?\s*([a-z]+)")
+TIME_OF_DAY_RE = re.compile(r"^(?:(today|tomorrow)\s+)?(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_duration(value):
+    """Seconds in "90s", "10m", "1h30m", "2 hours" or "hour"; a bare number is minutes"""
+    if isinstance(value, (int, float)):
+        seconds = float(value) * 60
+    else:
+        text = str(value).strip().lower()
+        text = text[len("every "):] if text.startswith("every ") else text
+        if re.fullmatch(r"\d+(?:\.\d+)?", text):
+            seconds = float(text) * 60
+        else:
+            seconds = 0.0
+            pos = 0
+            for match in DURATION_RE.finditer(text):
+                if text[pos:match.start()].strip(" ,and") or match.group(2) not in DURATION_UNITS:
+                    raise ValueError(f"Unrecognized duration: {value!r}")
+                seconds += float(match.group(1) or 1) * DURATION_UNITS[match.group(2)]
+                pos = match.end()
+            if pos == 0 or text[pos:].strip():
+                raise ValueError(f"Unrecognized duration: {value!r}")
+    if seconds <= 0:
+        raise ValueError(f"Duration must be positive: {value!r}")
+    return seconds
+
+
+def parse_time(value, now=None):
+    """Epoch time of "09:00", "9pm", "tomorrow 7:30am" or an ISO date and time.
+
+    A time of day without a date is its next occurrence.
+    """
+    now = time.time() if now is None else now
+    text = str(value).strip().lower()
+    match = TIME_OF_DAY_RE.match(text)
+    if not match:
+        try:
+            return datetime.fromisoformat(str(value).strip()).timestamp()
+        except ValueError:
+            raise ValueError(f"Unrecognized time: {value!r}") from None
+
+    day, hour, minute, meridiem = match.groups()
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Unrecognized time: {value!r}")
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Unrecognized time: {value!r}")
+
+    current = datetime.fromtimestamp(now)
+    due = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day == "tomorrow":
+        due += timedelta(days=1)
+    elif due.timestamp() <= now and day != "today":
+        due += timedelta(days=1)
+    return due.timestamp()
+
+
+def resolve_schedule(at=None, delay=None, every=None, now=None):
+    """(first due time, repeat interval or None) for the schedule_task parameters"""
+    now = time.time() if now is None else now
+    interval = parse_duration(every) if every not in (None, "") else None
+    if at not in (None, ""):
+        due = parse_time(at, now)
+    elif delay not in (None, ""):
+        due = now + parse_duration(delay)
+    elif interval is not None:
+        due = now + interval
+    else:
+        raise ValueError("Say when: give 'at', 'in' or 'every'")
+    return due, interval
+
+
+def format_interval(seconds):
+    for unit, size in (("week", 604800), ("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size and seconds % size == 0:
+            count = int(seconds // size)
+            return f"every {unit}" if count == 1 else f"every {count} {unit}s"
+    return f"every {seconds:g} seconds"
+
+
+class Job:
+    """One pending tool call"""
+
+    __slots__ = ("id", "due", "tool", "parameters", "interval", "description")
+
+    def __init__(self, job_id, due, tool, parameters=None, interval=None, description=""):
+        self.id = job_id
+        self.due = due
+        self.tool = tool
+        self.parameters = dict(parameters or {})
+        self.interval = interval
+        self.description = description or f"{tool}({json.dumps(self.parameters, sort_keys=True)})"
+
+    def to_dict(self):
+        return {"id": self.id, "due": self.due, "tool": self.tool, "parameters": self.parameters,
+                "interval": self.interval, "description": self.description}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["due"], data["tool"], data.get("parameters"),
+                   data.get("interval"), data.get("description", ""))
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.description!r})"
+
+
+class ThreadTimer:
+    """One daemon thread sleeping until the armed deadline; started on the first arm"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+
+    def arm(self, delay):
+        with self._cond:
+            self._deadline = time.monotonic() + max(0.0, delay)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="job-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._deadline = None
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if self._deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._deadline = None
+                self._cond.release()
+                try:
+                    self.callback()
+                finally:
+                    self._cond.acquire()
+
+
+class GLibTimer:
+    """A single GLib timeout on the default main context, replaced on every arm"""
+
+    def __init__(self, callback):
+        from gi.repository import GLib
+        self._GLib = GLib
+        self.callback = callback
+        self._source = None
+        self._generation = 0  # Tells a replaced timeout that is already dispatching to do nothing
+        self._lock = threading.Lock()
+
+    def arm(self, delay):
+        with self._lock:
+            self._remove()
+            self._generation += 1
+            self._source = self._GLib.timeout_add(max(0, math.ceil(delay * 1000)), self._fire,
+                                                  self._generation)
+
+    def cancel(self):
+        with self._lock:
+            self._remove()
+            self._generation += 1
+
+    close = cancel
+
+    def _remove(self):
+        if self._source is not None:
+            self._GLib.source_remove(self._source)
+            self._source = None
+
+    def _fire(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._source = None
+        self.callback()
+        return False
+
+
+class FileWatcher:
+    """Calls `callback` from a daemon thread whenever `path` is replaced; raises OSError without inotify"""
+
+    def __init__(self, path, callback):
+        from file_index import Inotify
+
+        self.callback = callback
+        self._name = os.path.basename(path)
+        self._inotify = Inotify()
+        try:
+            self._inotify.add_watch(os.path.dirname(path) or ".", Inotify.IN_MOVED_TO | Inotify.IN_ONLYDIR)
+        except OSError:
+            self._inotify.close()
+            raise
+        self._wake_read, self._wake_write = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="job-file-watcher", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        os.write(self._wake_write, b"\0")
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+        self._inotify.close()
+
+    def _run(self):
+        while True:
+            readable, _, _ = select.select([self._inotify.fd, self._wake_read], [], [])
+            if self._wake_read in readable:
+                return
+            if any(name == self._name for _, _, name in self._inotify.read_events(0)):
+                try:
+                    self.callback()
+                except Exception as e:
+                    logger.error(f"Reloading scheduled jobs failed: {e}")
+
+
+class JobScheduler:
+    """Pending jobs in a heap, persisted to `path`, run by `runner(job)` when due.
+
+    Without a timer the scheduler only stores jobs (e.g. for a one-shot
+    --prompt); start() attaches a timer (ThreadTimer unless a factory such as
+    GLibTimer is given) and arms it for the earliest job, if this process
+    owns running them.
+    """
+
+    def __init__(self, runner=None, path=JOBS_PATH, clock=time.time):
+        self.runner = runner
+        self.path = path
+        self.clock = clock
+        self._jobs = {}
+        self._heap = []  # (due, seq, job id); entries of cancelled jobs are skipped when popped
+        self._seq = itertools.count()
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._timer = None
+        self._armed_for = None
+        self._owner_file = None  # Holds the jobs.json.owner lock while this scheduler runs jobs
+        self._watcher = None
+        self._file_state = None  # (inode, mtime, size) of the file as last read or written
+        self.load()
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._jobs)
+
+    def __contains__(self, job_id):
+        with self._lock:
+            self._refresh()
+            return job_id in self._jobs
+
+    def get(self, job_id):
+        with self._lock:
+            self._refresh()
+            return self._jobs.get(job_id)
+
+    def pending(self):
+        """Pending jobs, earliest first"""
+        with self._lock:
+            self._refresh()
+            return sorted(self._jobs.values(), key=lambda job: (job.due, job.id))
+
+    def next_due(self):
+        """Due time of the earliest pending job, or None"""
+        with self._lock:
+            self._refresh()
+            self._drop_stale_head()
+            return self._heap[0][0] if self._heap else None
+
+    def start(self, timer_factory=ThreadTimer):
+        """Begin running due jobs, or waiting to take over from the process that does"""
+        with self._lock:
+            if self._timer is None:
+                self._timer = timer_factory(self.run_due)
+            self._claim()
+            self._refresh()
+            self._rearm(force=True)
+        return self
+
+    def stop(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+            watcher, self._watcher = self._watcher, None
+            owner_file, self._owner_file = self._owner_file, None
+            self._armed_for = None
+        if watcher is not None:
+            watcher.close()
+        if timer is not None:
+            timer.close()
+        if owner_file is not None:
+            owner_file.close()
+
+    def has_runner(self):
+        """Whether a started scheduler, in this or another process, runs the due jobs of this file"""
+        with self._lock:
+            if self._owner_file is not None:
+                return self._timer is not None
+            try:
+                with open(self.path + ".owner", "a") as owner_file:
+                    fcntl.flock(owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            return False
+
+    def add(self, tool, parameters=None, due=None, interval=None, description=""):
+        """Schedule a tool call; returns the Job"""
+        with self._locked():
+            job = Job(self._next_id, self.clock() if due is None else due, tool, parameters,
+                      interval, description)
+            self._next_id += 1
+            self._push(job)
+            self.save()
+            self._rearm()
+        return job
+
+    def cancel(self, job_id):
+        """Remove a pending job; returns it, or None if there is none with this id"""
+        with self._locked():
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                # Compact once most of the heap is cancelled entries
+                if len(self._heap) > 64 and len(self._heap) > 2 * len(self._jobs):
+                    self._heap = [(j.due, next(self._seq), j.id) for j in self._jobs.values()]
+                    heapq.heapify(self._heap)
+                self.save()
+                self._rearm()
+            return job
+
+    def run_due(self):
+        """Run every job that is due, reschedule recurring ones and re-arm; returns the jobs run.
+
+        Does nothing (but re-arm) while another scheduler runs this file's jobs.
+        """
+        with self._lock:
+            if not self._claim():
+                self._rearm(force=True)
+                return []
+        with self._locked():
+            now = self.clock()
+            due_jobs = []
+            while self._heap and self._heap[0][0] <= now:
+                due, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                if job is None or job.due != due:
+                    continue
+                due_jobs.append(job)
+                if job.interval:
+                    # Runs missed while the assistant was closed collapse into this one
+                    job.due += job.interval * max(1, math.ceil((now - job.due) / job.interval))
+                    if job.due <= now:
+                        job.due += job.interval
+                    heapq.heappush(self._heap, (job.due, next(self._seq), job.id))
+                else:
+                    del self._jobs[job_id]
+            if due_jobs:
+                self.save()
+            self._rearm(force=True)
+
+        for job in due_jobs:
+            try:
+                if self.runner is not None:
+                    self.runner(job)
+            except Exception as e:
+                logger.error(f"Scheduled job {job.id} ({job.description}) failed: {e}")
+        return due_jobs
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the file lock, with the jobs as last saved by any process"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._refresh()
+                yield
+
+    def _claim(self):
+        """Become the scheduler that runs due jobs; False while another one is"""
+        if self._owner_file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            owner_file = open(self.path + ".owner", "a")
+            try:
+                fcntl.flock(owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                owner_file.close()
+                return False
+            self._owner_file = owner_file
+        if self._timer is not None and self._watcher is None:
+            try:
+                self._watcher = FileWatcher(self.path, self._on_file_replaced)
+            except OSError as e:
+                logger.info(f"inotify unavailable, re-reading {self.path} every {RETRY_SECONDS} s: {e}")
+        return True
+
+    def _on_file_replaced(self):
+        with self._lock:
+            if self._refresh():
+                self._rearm()
+
+    def _refresh(self):
+        """Re-read the file if another process replaced it; True if it did"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._file_state:
+            return False
+        self.load()
+        return True
+
+    def _push(self, job):
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (job.due, next(self._seq), job.id))
+
+    def _drop_stale_head(self):
+        while self._heap:
+            due, _, job_id = self._heap[0]
+            job = self._jobs.get(job_id)
+            if job is not None and job.due == due:
+                return
+            heapq.heappop(self._heap)
+
+    def _rearm(self, force=False):
+        """Point the timer at the earliest job; a no-op while it already is, unless forced.
+
+        A scheduler that does not run jobs, or cannot watch the file, wakes
+        every RETRY_SECONDS instead.
+        """
+        if self._timer is None:
+            return
+        self._drop_stale_head()
+        due = self._heap[0][0] if self._heap and self._owner_file is not None else None
+        if due == self._armed_for and not force:
+            return
+        self._armed_for = due
+        if self._watcher is None:
+            delay = RETRY_SECONDS if due is None else min(max(0.0, due - self.clock()), RETRY_SECONDS)
+            self._timer.arm(delay)
+        elif due is None:
+            self._timer.cancel()
+        else:
+            self._timer.arm(min(max(0.0, due - self.clock()), MAX_SLEEP_SECONDS))
+
+    def load(self):
+        """Read the saved jobs (a missing or damaged file is an empty schedule)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stat = os.fstat(f.fileno())
+                data = json.load(f)
+            jobs = [Job.from_dict(item) for item in data.get("jobs", [])]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable job file {self.path}: {e}")
+            return
+        with self._lock:
+            self._file_state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._jobs.clear()
+            for job in jobs:
+                self._jobs[job.id] = job
+            self._heap = [(job.due, next(self._seq), job.id) for job in jobs]
+            heapq.heapify(self._heap)
+            self._next_id = max([data.get("next_id", 1)] + [job.id + 1 for job in jobs])
+
+    def save(self):
+        """Write all jobs atomically (callers hold the file lock)"""
+        with self._lock:
+            data = {"version": 1, "next_id": self._next_id,
+                    "jobs": [job.to_dict() for job in self._jobs.values()]}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(data))
+                f.flush()
+                stat = os.fstat(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._file_state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,223 @@
+"""Semantic fallback resolver for descriptive application requests.
+
+"open the browser" or "something to edit photos" has no lexical match in an
+app name, but it does overlap with the GenericName, Comment and Keywords of
+the right desktop entry. Every app is embedded once into rows of a NumPy
+matrix; a query costs one matrix-vector product.
+
+The default embedder hashes words and character trigrams into a fixed-size
+vector, so no model has to be loaded. NumPy is optional: without it the
+fallback is simply unavailable.
+"""
+import hashlib
+import os
+import re
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+INDEX_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant", "cache", "app_index.npz")
+
+# Calibrated on benchmarks/bench_semantic_apps.py: right matches lead the best
+# app of another kind by at least 0.27, wrong ones by at most 0.19, so the
+# score alone does not separate them
+MIN_SCORE = 0.3
+MIN_MARGIN = 0.23
+
+# Words that describe the request rather than the application
+STOPWORDS = {
+    "a", "an", "and", "app", "application", "can", "for", "i", "launch", "me", "my",
+    "of", "open", "please", "program", "run", "some", "something", "start", "that",
+    "the", "thing", "to", "tool", "up", "use", "want", "with",
+}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+SUFFIXES = ("ations", "ation", "ions", "ion", "ings", "ing", "ers", "er", "ors", "or", "es", "ed", "s")
+
+
+def stem(word):
+    """Strip one common English suffix so calculations meets calculator"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def is_available():
+    """Whether the semantic resolver can be used in this environment"""
+    return np is not None
+
+
+class HashingEmbedder:
+    """Embed text by hashing words and character trigrams into a fixed vector"""
+
+    def __init__(self, dimensions=1024):
+        self.dimensions = dimensions
+        self.name = f"hashing-v2-{dimensions}"
+
+    def _features(self, text):
+        for word in WORD_RE.findall(text.lower()):
+            if word in STOPWORDS:
+                continue
+            word = stem(word)
+            yield word, 1.0
+            # Trigrams make "photos" close to "photographs" and "browse" close to "browser"
+            padded = f"#{word}#"
+            grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            for gram in grams:
+                yield "#" + gram, 1.5 / len(grams)
+
+    def embed(self, text):
+        """Return the L2-normalized embedding of a text"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dimensions] += sign * weight
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+def app_fields(app):
+    """Texts describing an app, one embedding row each.
+
+    Embedding fields separately keeps a long Comment from diluting a short
+    GenericName match.
+    """
+    return (
+        f"{app.get('name', '')} {os.path.basename(app.get('exec', ''))}",
+        app.get('generic_name', ''),
+        app.get('keywords', '').replace(";", " "),
+        app.get('comment', ''),
+    )
+
+
+FIELDS_PER_APP = 4
+
+
+class SemanticAppIndex:
+    """Embedding matrix over installed applications, updated incrementally"""
+
+    def __init__(self, embedder=None, path=INDEX_PATH):
+        if np is None:
+            raise RuntimeError("numpy is required for semantic app resolution")
+        self.embedder = embedder or HashingEmbedder()
+        self.path = path
+        self.keys = []
+        self.digests = []
+        self.matrix = np.zeros((0, FIELDS_PER_APP, self.embedder.dimensions), dtype=np.float32)
+        self.apps = []
+
+    @classmethod
+    def load_or_create(cls, embedder=None, path=INDEX_PATH):
+        """Load a persisted index, or start an empty one"""
+        index = cls(embedder, path)
+        if path and os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    if str(data["embedder"]) == index.embedder.name and data["matrix"].ndim == 3:
+                        index.keys = [str(k) for k in data["keys"]]
+                        index.digests = [str(d) for d in data["digests"]]
+                        index.matrix = data["matrix"].astype(np.float32, copy=False)
+            except (OSError, KeyError, ValueError):
+                pass  # Corrupt or foreign file; it is rebuilt by update()
+        return index
+
+    @staticmethod
+    def _key(app):
+        return app.get('desktop_file') or app.get('name', '')
+
+    def update(self, apps):
+        """Sync the matrix with the app list, embedding only new or changed apps.
+
+        Returns the number of apps that had to be embedded.
+        """
+        rows = {key: i for i, key in enumerate(self.keys)}
+        keys, digests, vectors = [], [], []
+        embedded = 0
+
+        for app in apps:
+            key = self._key(app)
+            fields = app_fields(app)
+            digest = hashlib.blake2b("\0".join(fields).encode("utf-8"), digest_size=8).hexdigest()
+
+            row = rows.get(key)
+            if row is not None and self.digests[row] == digest:
+                vectors.append(self.matrix[row])
+            else:
+                vectors.append(np.stack([self.embedder.embed(field) for field in fields]))
+                embedded += 1
+            keys.append(key)
+            digests.append(digest)
+
+        changed = embedded > 0 or keys != self.keys
+        self.keys = keys
+        self.digests = digests
+        self.apps = list(apps)
+        if vectors:
+            self.matrix = np.stack(vectors).astype(np.float32, copy=False)
+        else:
+            self.matrix = np.zeros((0, FIELDS_PER_APP, self.embedder.dimensions), dtype=np.float32)
+
+        if changed and self.path:
+            self.save()
+        return embedded
+
+    def save(self):
+        """Persist the index atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, embedder=self.embedder.name, keys=np.array(self.keys),
+                 digests=np.array(self.digests), matrix=self.matrix)
+        os.replace(tmp_path, self.path)
+
+    def _scores(self, query):
+        # Best field per app, plus a little credit for matching several fields
+        field_scores = self.matrix @ self.embedder.embed(query)
+        return field_scores.max(axis=1) + 0.25 * field_scores.mean(axis=1)
+
+    def search(self, query, top_k=3):
+        """Return [(app, score)] for the best matching apps"""
+        if not self.apps:
+            return []
+
+        scores = self._scores(query)
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.apps[i], float(scores[i])) for i in best]
+
+    @staticmethod
+    def _kind(app):
+        return (app.get('generic_name') or app.get('name', '')).lower()
+
+    def resolve(self, query, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+        """Return the best matching app if it is a confident match, else None.
+
+        Confident means a score of at least min_score and a lead of at least
+        min_margin over the best app of another kind. Two web browsers may
+        tie; a text editor and an image editor may not.
+        """
+        if not self.apps:
+            return None
+
+        scores = self._scores(query)
+        order = np.argsort(-scores)
+        best = self.apps[order[0]]
+        if scores[order[0]] < min_score:
+            return None
+        kind = self._kind(best)
+        runner_up = next((scores[i] for i in order[1:] if self._kind(self.apps[i]) != kind), 0.0)
+        if scores[order[0]] - runner_up < min_margin:
+            return None
+        return best
+
+    def suggest(self, query, limit=2, min_score=MIN_SCORE):
+        """Apps worth asking about when resolve() was not confident"""
+        return [app for app, score in self.search(query, top_k=limit) if score >= min_score]
@@ -0,0 +1,85 @@
+"""Conversation sessions sharing one assistant and one loaded model.
+
+Each session owns its chat history and last tool call and result; the engine keys its
+per-session KV-cache slot by the session id.
+"""
+import itertools
+import threading
+from datetime import datetime
+
+
+class Session:
+    """One conversation with its own history"""
+
+    def __init__(self, session_id, max_history_length=10):
+        self.id = session_id
+        self.chat_history = []
+        self.max_history_length = max_history_length  # Keep last N exchanges
+        self.last_user_prompt = None
+        self.last_tool_call = None
+        self.last_tool_result = None
+        self.created = datetime.now()
+
+    def add_to_history(self, user_message, ai_response):
+        """Add a conversation exchange to history"""
+        self.chat_history.append({
+            'user': user_message,
+            'ai': ai_response,
+            'timestamp': datetime.now()
+        })
+
+        # Keep only the most recent exchanges
+        if len(self.chat_history) > self.max_history_length:
+            self.chat_history = self.chat_history[-self.max_history_length:]
+
+    def get_formatted_history(self):
+        """Get formatted conversation history for context"""
+        if not self.chat_history:
+            return ""
+
+        history_lines = ["CONVERSATION HISTORY:"]
+        for i, exchange in enumerate(self.chat_history[-5:], 1):  # Last 5 exchanges
+            history_lines.append(f"Exchange {i}:")
+            history_lines.append(f"User: {exchange['user']}")
+            history_lines.append(f"AI: {exchange['ai']}")
+            history_lines.append("")
+
+        return "\n".join(history_lines)
+
+
+class SessionManager:
+    """Create, look up and close sessions by id"""
+
+    DEFAULT_SESSION_ID = "default"
+
+    def __init__(self, max_history_length=10):
+        self.max_history_length = max_history_length
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.default = self.get(self.DEFAULT_SESSION_ID)
+
+    def get(self, session_id=None):
+        """Return the session with this id, creating it if needed"""
+        with self._lock:
+            if session_id is None:
+                session_id = f"session-{next(self._ids)}"
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, self.max_history_length)
+                self._sessions[session_id] = session
+            return session
+
+    def close(self, session_id):
+        """Forget a session; the default session is only cleared"""
+        with self._lock:
+            if session_id == self.DEFAULT_SESSION_ID:
+                self._sessions[session_id].chat_history = []
+                return
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
@@ -0,0 +1,86 @@
+"""
+Tests for batch prompt mode.
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the parent directory to the path so we can import the batch module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import run_batch, score_tool_call
+
+
+class FakeEngine:
+    """Engine stub reporting fixed token usage."""
+
+    def __init__(self):
+        self.last_usage = {}
+
+
+class FakeAssistant:
+    """Routes 'open X' prompts to open_app and everything else to chat."""
+
+    def __init__(self):
+        self.ai_engine = FakeEngine()
+        self.last_tool_call = None
+
+    def process_user_input(self, prompt):
+        self.ai_engine.last_usage = {"prompt_tokens": 50, "completion_tokens": 10}
+        if prompt.startswith("open "):
+            self.last_tool_call = {"tool": "open_app", "parameters": {"app_name": prompt[5:]}}
+            return "✅ [dry run] open_app"
+        self.last_tool_call = None
+        return "Hello!"
+
+
+class TestBatch(unittest.TestCase):
+    """Test cases for batch runs."""
+
+    def test_score_tool_call(self):
+        """Test labelled scoring of tool and parameters."""
+        call = {"tool": "open_app", "parameters": {"app_name": "Firefox"}}
+        self.assertEqual(score_tool_call(call, {"prompt": "x"}), (None, None))
+        self.assertEqual(score_tool_call(call, {"expected_tool": "open_app",
+                                                "expected_parameters": {"app_name": "firefox"}}), (True, True))
+        self.assertEqual(score_tool_call(call, {"expected_tool": "open_app",
+                                                "expected_parameters": {"app_name": "gimp"}}), (True, False))
+        self.assertEqual(score_tool_call(None, {"expected_tool": None}), (True, True))
+
+    def test_run_batch_streams_results(self):
+        """Test that every input line produces a result line and stats add up."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "in.jsonl")
+            output_path = os.path.join(tmpdir, "out.jsonl")
+            with open(input_path, "w") as f:
+                f.write(json.dumps({"prompt": "open firefox", "expected_tool": "open_app",
+                                    "expected_parameters": {"app_name": "firefox"}}) + "\n")
+                f.write("\n")
+                f.write(json.dumps({"prompt": "tell me a joke", "expected_tool": "open_app"}) + "\n")
+                f.write(json.dumps("hello") + "\n")
+                f.write('{"prompt": "open gimp"\n')
+                f.write(json.dumps({"prompt": "open inkscape"}) + "\n")
+
+            stats, wall_time = run_batch(FakeAssistant(), input_path, output_path)
+
+            with open(output_path) as f:
+                records = [json.loads(line) for line in f]
+
+        # The malformed line gets an error record and the run goes on
+        self.assertEqual([r["prompt"] for r in records], ["open firefox", "tell me a joke", "hello", None, "open inkscape"])
+        self.assertEqual(records[3]["id"], 5)
+        self.assertIn("Line 5: invalid JSON", records[3]["error"])
+        self.assertEqual(records[0]["tool_call"]["tool"], "open_app")
+        self.assertEqual(records[0]["completion_tokens"], 10)
+        self.assertEqual(stats.prompts, 5)
+        self.assertEqual(stats.errors, 1)
+        self.assertEqual(stats.labelled, 2)
+        self.assertEqual(stats.tool_correct, 1)
+        self.assertEqual(stats.completion_tokens, 40)
+        self.assertIn("Tool accuracy: 1/2", stats.summary(wall_time))
+
+
+if __name__ == '__main__':
+    unittest.main()
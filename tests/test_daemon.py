@@ -0,0 +1,110 @@
+"""
+Tests for the resident daemon and its socket client.
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the path so we can import the daemon module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daemon import AssistantDaemon, DaemonClient, DaemonError, is_daemon_running
+from sessions import SessionManager
+
+
+class FakeAssistant:
+    """Stand-in for Assistant that echoes prompts."""
+
+    def __init__(self):
+        self.sessions = SessionManager()
+        self.history = []
+
+    def process_user_input(self, prompt, session=None):
+        return f"echo: {prompt} ({len(session.chat_history)} earlier)"
+
+    def add_to_history(self, user_message, ai_response, session=None):
+        session.add_to_history(user_message, ai_response)
+        self.history.append((user_message, ai_response))
+
+    def close_session(self, session_id):
+        self.sessions.close(session_id)
+
+
+class TestDaemon(unittest.TestCase):
+    """Test cases for the daemon socket API."""
+
+    def setUp(self):
+        """Start a daemon on a temporary socket."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "test.sock")
+        self.app = FakeAssistant()
+        self.daemon = AssistantDaemon(self.app, self.socket_path)
+        self.thread = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+        self.thread.start()
+
+        deadline = time.time() + 5
+        while not is_daemon_running(self.socket_path):
+            self.assertLess(time.time(), deadline, "daemon did not start")
+            time.sleep(0.01)
+
+    def tearDown(self):
+        """Stop the daemon."""
+        with DaemonClient(self.socket_path) as client:
+            client.call("shutdown")
+        self.thread.join(timeout=5)
+        self.tmpdir.cleanup()
+
+    def test_process_round_trip(self):
+        """Test that prompts are processed and recorded in history."""
+        with DaemonClient(self.socket_path) as client:
+            self.assertEqual(client.process("open firefox"), "echo: open firefox (0 earlier)")
+            self.assertEqual(client.process("hello"), "echo: hello (1 earlier)")
+        self.assertEqual(self.app.history[0], ("open firefox", "echo: open firefox (0 earlier)"))
+
+    def test_structured_process(self):
+        """Test that structured replies carry the rows of a list result."""
+        from tool_results import ToolResult
+
+        def process_user_input(prompt, session=None):
+            session.last_tool_result = ToolResult.listing("Apps", ["a", "b"])
+            return "✅ Apps (2 total): a, b"
+
+        self.app.process_user_input = process_user_input
+        with DaemonClient(self.socket_path) as client:
+            reply = client.process("list apps", structured=True)
+        self.assertEqual(reply["response"], "✅ Apps (2 total): a, b")
+        self.assertEqual(ToolResult.from_dict(reply["result"]).rows, ["a", "b"])
+
+    def test_sessions_are_per_connection(self):
+        """Test that each connection has its own history unless a session is named."""
+        with DaemonClient(self.socket_path) as first, DaemonClient(self.socket_path) as second:
+            first.process("one")
+            self.assertEqual(second.process("two"), "echo: two (0 earlier)")
+
+        for _ in range(2):
+            with DaemonClient(self.socket_path, session="scripted") as client:
+                last = client.process("again")
+        self.assertEqual(last, "echo: again (1 earlier)")
+        self.assertIn("scripted", self.app.sessions)
+
+    def test_errors_are_reported(self):
+        """Test that unknown methods and empty prompts raise DaemonError."""
+        with DaemonClient(self.socket_path) as client:
+            with self.assertRaises(DaemonError):
+                client.call("no_such_method")
+            with self.assertRaises(DaemonError):
+                client.process("   ")
+            # The connection stays usable after an error
+            self.assertEqual(client.call("ping"), "pong")
+
+    def test_refuses_second_daemon(self):
+        """Test that a live socket is not replaced by a second daemon."""
+        with self.assertRaises(RuntimeError):
+            AssistantDaemon(FakeAssistant(), self.socket_path).serve_forever()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests for desktop-entry parsing and application discovery.
+"""
+import unittest
+import pickle
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from desktop_entries import AppRecord, discover_applications, locale_variants, split_exec
+
+FIREFOX = """# A comment before the group
+[Desktop Entry]
+Version=1.0
+Name=Firefox Web Browser
+Name[de]=Firefox-Webbrowser
+Name[fr]=Navigateur Web Firefox
+GenericName=Web Browser
+Keywords=Internet;WWW;Browser;
+Exec=firefox %u
+Type=Application
+Actions=new-private-window;
+
+[Desktop Action new-private-window]
+Name=Open a New Private Window
+Exec=firefox --private-window %u
+"""
+
+
+class TestDesktopEntries(unittest.TestCase):
+    """Test the parser and the precedence of application directories"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.user_dir = self.make_dir("user")
+        self.system_dir = self.make_dir("system")
+        self.write(self.system_dir, "firefox.desktop", FIREFOX)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_dir(self, name):
+        path = os.path.join(self.tmp_dir.name, name, "applications")
+        os.makedirs(path)
+        return path
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def discover(self, **kwargs):
+        kwargs.setdefault("locales", ())
+        kwargs.setdefault("desktops", ("GNOME",))
+        apps, errors = discover_applications([self.user_dir, self.system_dir], **kwargs)
+        self.assertEqual(errors, [])
+        return {app.desktop_file: app for app in apps}
+
+    def test_actions_do_not_leak_into_the_entry(self):
+        app = self.discover()["firefox.desktop"]
+        self.assertEqual(app["name"], "Firefox Web Browser")
+        self.assertEqual(app["argv"], ("firefox",))
+        self.assertEqual(app.get("generic_name"), "Web Browser")
+
+    def test_localized_name(self):
+        apps = self.discover(locales=locale_variants("de_AT.UTF-8"))
+        self.assertEqual(apps["firefox.desktop"].name, "Firefox-Webbrowser")
+
+    def test_user_entry_overrides_and_hides(self):
+        self.write(self.system_dir, "gimp.desktop", "[Desktop Entry]\nType=Application\nName=GIMP\nExec=gimp\n")
+        self.write(self.user_dir, "gimp.desktop", "[Desktop Entry]\nHidden=true\n")
+        self.write(self.user_dir, "firefox.desktop", FIREFOX.replace("Exec=firefox %u", "Exec=firefox -P work"))
+        apps = self.discover()
+        self.assertNotIn("gimp.desktop", apps)
+        self.assertEqual(apps["firefox.desktop"].argv, ("firefox", "-P", "work"))
+
+    def test_only_show_in_and_try_exec(self):
+        self.write(self.system_dir, "kde/dolphin.desktop",
+                   "[Desktop Entry]\nType=Application\nName=Dolphin\nExec=dolphin\nOnlyShowIn=KDE;\n")
+        self.write(self.system_dir, "missing.desktop",
+                   "[Desktop Entry]\nType=Application\nName=Missing\nExec=missing\nTryExec=/nonexistent/bin\n")
+        self.assertEqual(set(self.discover()), {"firefox.desktop"})
+        self.assertEqual(set(self.discover(desktops=("KDE",))), {"firefox.desktop", "kde-dolphin.desktop"})
+
+    def test_no_display_apps_are_kept_but_flagged(self):
+        self.write(self.system_dir, "helper.desktop",
+                   "[Desktop Entry]\nType=Application\nName=Helper\nExec=helper\nNoDisplay=true\n")
+        apps = self.discover()
+        self.assertTrue(apps["helper.desktop"].no_display)
+        self.assertFalse(apps["firefox.desktop"].no_display)
+
+    def test_symlink_loops_are_not_followed(self):
+        self.write(self.system_dir, "kde/dolphin.desktop", "[Desktop Entry]\nType=Application\nName=Dolphin\nExec=dolphin\n")
+        os.symlink("..", os.path.join(self.system_dir, "kde", "loop"))
+        os.symlink(self.system_dir, os.path.join(self.system_dir, "self"))
+        self.assertEqual(set(self.discover()), {"firefox.desktop", "kde-dolphin.desktop"})
+
+    def test_exec_quoting_and_field_codes(self):
+        self.assertEqual(split_exec('"/opt/My App/run" --title "a \\"b\\"" %F --pct=100%%'),
+                         ["/opt/My App/run", "--title", 'a "b"', "--pct=100%"])
+        self.assertEqual(split_exec("/usr/bin/flatpak run org.gnome.Maps @@u %U @@"),
+                         ["/usr/bin/flatpak", "run", "org.gnome.Maps"])
+
+    def test_records_are_compact_and_picklable(self):
+        app = self.discover()["firefox.desktop"]
+        self.assertFalse(hasattr(app, "__dict__"))
+        self.assertEqual(pickle.loads(pickle.dumps(app)).argv, app.argv)
+        with self.assertRaises(KeyError):
+            app["no_such_field"]
+        self.assertIsInstance(app, AppRecord)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests for the resumable model downloader against a local stand-in server.
+"""
+import unittest
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path so we can import the download module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_model import DownloadError, ModelDownloader
+
+PAYLOAD = os.urandom(300 * 1024 + 17)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serve PAYLOAD with Range support, redirecting like the Hub does."""
+
+    ranges_served = []
+    truncate_once = set()  # Range starts whose first response stops halfway
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body):
+        if self.path == "/resolve/model.gguf":
+            self.send_response(302)
+            self.send_header("Location", "/cdn/model.gguf")
+            self.send_header("X-Linked-Etag", f'"{PAYLOAD_SHA256}"')
+            self.end_headers()
+            return
+
+        data = PAYLOAD
+        range_header = self.headers.get("Range")
+        if range_header:
+            start, end = (int(x) for x in range_header.split("=")[1].split("-"))
+            RangeHandler.ranges_served.append(start)
+            data = PAYLOAD[start:end + 1]
+            if start in RangeHandler.truncate_once:
+                RangeHandler.truncate_once.discard(start)
+                data = data[:len(data) // 2]
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+
+
+class TestModelDownloader(unittest.TestCase):
+    """Test cases for parallel, resumable, verified downloads."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmpdir.name, "model.gguf")
+        RangeHandler.ranges_served = []
+        RangeHandler.truncate_once = set()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_downloader(self, **kwargs):
+        return ModelDownloader(f"{self.base_url}/resolve/model.gguf", self.dest,
+                               workers=4, chunk_size=64 * 1024, **kwargs)
+
+    def test_parallel_download_verifies_sha_from_redirect(self):
+        """Test that ranges are reassembled and checked against the Hub SHA-256."""
+        downloader = self.make_downloader()
+        downloader.download()
+
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(downloader.sha256, PAYLOAD_SHA256)
+        self.assertEqual(len(RangeHandler.ranges_served), 5)
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        self.assertFalse(os.path.exists(self.dest + ".part.json"))
+
+    def test_resume_fetches_only_missing_chunks(self):
+        """Test that chunks recorded as done are not fetched again."""
+        chunk = 64 * 1024
+        with open(self.dest + ".part", "wb") as f:
+            f.write(PAYLOAD[:2 * chunk])
+        with open(self.dest + ".part.json", "w") as f:
+            json.dump({"size": len(PAYLOAD), "chunk_size": chunk,
+                       "sha256": PAYLOAD_SHA256, "done": [0, 1]}, f)
+
+        downloader = self.make_downloader()
+        downloader.download()
+
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(sorted(RangeHandler.ranges_served), [2 * chunk, 3 * chunk, 4 * chunk])
+        self.assertEqual(downloader.bytes_resumed, 2 * chunk)
+
+    def test_retried_chunks_are_counted_once(self):
+        """Test that bytes of a failed attempt do not inflate the download total."""
+        RangeHandler.truncate_once = {0, 128 * 1024}
+        downloader = self.make_downloader()
+        downloader.download()
+
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(len(RangeHandler.ranges_served), 7)
+        self.assertEqual(downloader.bytes_downloaded, len(PAYLOAD))
+
+    def test_checksum_mismatch_is_rejected(self):
+        """Test that a bad checksum leaves no installed file behind."""
+        downloader = self.make_downloader(sha256="0" * 64)
+        with self.assertRaises(DownloadError):
+            downloader.download()
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+
+    def test_local_mirror(self):
+        """Test that a file:// mirror is copied and verified."""
+        source = os.path.join(self.tmpdir.name, "mirror.gguf")
+        with open(source, "wb") as f:
+            f.write(PAYLOAD)
+
+        ModelDownloader("file://" + source, self.dest, sha256=PAYLOAD_SHA256).download()
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+
+if __name__ == '__main__':
+    unittest.main()
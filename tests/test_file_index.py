@@ -0,0 +1,87 @@
+"""
+Tests for the file index behind search_files and open_file_browser.
+"""
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import the file index module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_index import FileIndex, FileIndexer, Inotify
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+
+
+class TestFileIndex(unittest.TestCase):
+    """Test crawling, fuzzy search and incremental updates"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp_dir.name, "home")
+        touch(os.path.join(self.root, "Documents", "Thesis Draft", "chapter1.tex"))
+        touch(os.path.join(self.root, "Documents", "notes.txt"))
+        touch(os.path.join(self.root, "Downloads", "invoice-2024.pdf"))
+        touch(os.path.join(self.root, ".cache", "thesis-cache.bin"))
+        self.index = FileIndex(os.path.join(self.tmp_dir.name, "files.db"))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def crawl(self):
+        indexer = FileIndexer(self.index, [self.root], cpu_share=1.0, watch=False)
+        indexer.crawl()
+        return indexer
+
+    def paths(self, query, **kwargs):
+        return [os.path.relpath(r['path'], self.root) for r in self.index.search(query, **kwargs)]
+
+    def test_descriptions_resolve_to_paths(self):
+        self.crawl()
+        self.assertEqual(self.paths("my thesis folder")[0], os.path.join("Documents", "Thesis Draft"))
+        self.assertEqual(self.paths("the downloads with the invoices")[0],
+                         os.path.join("Downloads", "invoice-2024.pdf"))
+        self.assertEqual(self.paths("invoise")[0], os.path.join("Downloads", "invoice-2024.pdf"))
+
+    def test_hidden_directories_are_skipped(self):
+        self.crawl()
+        self.assertNotIn(os.path.join(".cache", "thesis-cache.bin"), self.paths("thesis"))
+
+    def test_recrawl_only_lists_changed_directories(self):
+        first = self.crawl()
+        os.remove(os.path.join(self.root, "Documents", "notes.txt"))
+        second = self.crawl()
+
+        self.assertLess(second.dirs_listed, first.dirs_listed)
+        self.assertEqual(self.paths("notes"), [])
+        self.assertTrue(self.paths("chapter1"))
+
+    def test_inotify_keeps_index_current(self):
+        try:
+            Inotify().close()
+        except OSError:
+            self.skipTest("inotify not available")
+
+        indexer = FileIndexer(self.index, [self.root], cpu_share=1.0, rescan_interval=0).start()
+        try:
+            self.assertTrue(indexer.ready.wait(5))
+            touch(os.path.join(self.root, "Music", "Jazz", "blue-in-green.flac"))
+            os.remove(os.path.join(self.root, "Downloads", "invoice-2024.pdf"))
+
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and (not self.paths("blue green") or self.paths("invoice")):
+                time.sleep(0.05)
+            self.assertEqual(self.paths("blue green"), [os.path.join("Music", "Jazz", "blue-in-green.flac")])
+            self.assertEqual(self.paths("invoice"), [])
+        finally:
+            indexer.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Tests for the memory-capped model pool used by tiered routing.
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import the engine module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import ModelPool
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestModelPool(unittest.TestCase):
+    """Test LRU loading and eviction under the memory cap"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name in ("tool", "router", "chat"):
+            path = os.path.join(self.tmp_dir.name, f"{name}.gguf")
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1000)
+            self.paths[name] = path
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_pool(self, models_that_fit):
+        # n_ctx=0 makes the estimate exactly the 1000-byte file size
+        return ModelPool(max_bytes=1000 * models_that_fit, n_ctx=0, loader=FakeModel)
+
+    def test_loaded_models_are_reused(self):
+        pool = self.make_pool(3)
+        first = pool.get(self.paths["tool"])
+        self.assertIs(pool.get(self.paths["tool"]), first)
+        self.assertEqual(pool.loads, 1)
+        self.assertEqual(pool.used_bytes, 1000)
+
+    def test_least_recently_used_model_is_evicted(self):
+        pool = self.make_pool(2)
+        router = pool.get(self.paths["router"])
+        pool.get(self.paths["chat"])
+        pool.get(self.paths["router"])  # chat is now the least recently used
+        pool.get(self.paths["tool"])
+
+        self.assertIn(self.paths["router"], pool)
+        self.assertNotIn(self.paths["chat"], pool)
+        self.assertFalse(router.closed)
+        self.assertEqual(pool.evictions, 1)
+
+    def test_pinned_model_is_never_evicted(self):
+        pool = self.make_pool(2)
+        tool = pool.get(self.paths["tool"], pin=True)
+        pool.get(self.paths["router"])
+        pool.get(self.paths["chat"])
+
+        self.assertIn(self.paths["tool"], pool)
+        self.assertNotIn(self.paths["router"], pool)
+        self.assertFalse(tool.closed)
+
+    def test_release_all_closes_models(self):
+        pool = self.make_pool(3)
+        models = [pool.get(path, pin=True) for path in self.paths.values()]
+        pool.release_all()
+
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(all(model.closed for model in models))
+
+
+if __name__ == '__main__':
+    unittest.main()
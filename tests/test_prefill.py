@@ -0,0 +1,99 @@
+"""
+Tests for speculative prefill of drafts while the user is typing.
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add the parent directory to the path so we can import the engine module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import LocalLLMEngine, SchedulingPolicy, shared_prefix_length
+from assistant import Assistant
+
+
+class FakeLlama:
+    """Byte-level tokens and a KV cache that is just the evaluated token list"""
+
+    def __init__(self):
+        self.input_ids = []
+        self.n_tokens = 0
+        self.evaluated = []
+
+    def tokenize(self, text, add_bos=True, special=True):
+        return [-1] + list(text)
+
+    @property
+    def _input_ids(self):
+        return self.input_ids[:self.n_tokens]
+
+    def eval(self, tokens):
+        self.input_ids = self.input_ids[:self.n_tokens] + list(tokens)
+        self.n_tokens = len(self.input_ids)
+        self.evaluated.append(len(tokens))
+
+
+class TestSpeculativePrefill(unittest.TestCase):
+    """Test draft evaluation, rollback and superseding"""
+
+    def setUp(self):
+        with patch.object(LocalLLMEngine, "_model_path", return_value="/nonexistent/model.gguf"):
+            self.engine = LocalLLMEngine(preload=False, scheduling_policy=SchedulingPolicy(priority="normal"))
+        self.engine.llm = FakeLlama()
+        self.engine.load = lambda: False
+
+    def cached_text(self):
+        return bytes(self.engine.llm._input_ids[1:]).decode()
+
+    def test_prompt_prefix_is_a_prefix_of_the_prompt(self):
+        prefix = LocalLLMEngine.build_prompt_prefix("open firefox", "system")
+        self.assertTrue(LocalLLMEngine.build_prompt("open firefox", "system").startswith(prefix))
+        self.assertEqual(shared_prefix_length([1, 2, 3], [1, 2, 4, 5]), 2)
+
+    def test_edited_draft_rolls_back_to_the_shared_prefix(self):
+        self.engine._prefill("open the fil", "system")
+        self.assertTrue(self.cached_text().endswith("open the fi"))  # Last token held back
+
+        evaluated = self.engine._prefill("open the terminal", "system")
+        self.assertEqual(evaluated, len("terminal") - 1)
+        self.assertEqual(self.cached_text(), LocalLLMEngine.build_prompt_prefix("open the terminal", "system")[:-1])
+
+        # Nothing new to evaluate for the same draft
+        self.assertEqual(self.engine._prefill("open the terminal", "system"), 0)
+
+    def test_only_the_newest_draft_is_evaluated(self):
+        drafts = [self.engine.prefill(text, "system") for text in ("op", "open f", "open fire")]
+        for draft in drafts:
+            self.assertTrue(draft.done.wait(5))
+        self.assertTrue(self.cached_text().endswith("open fir"))
+
+        from ai_engine import _PendingPrefill
+        batch = [_PendingPrefill(text, "system", None) for text in ("a", "ab", "abc")]
+        self.engine.llm.evaluated.clear()
+        self.engine.run_prefills(batch)
+        self.assertEqual([draft.done.is_set() for draft in batch], [True, True, True])
+        self.assertEqual([draft.evaluated > 0 for draft in batch], [False, False, True])
+        self.assertEqual(len(self.engine.llm.evaluated), 1)
+
+    def test_assistant_prefills_with_the_query_system_prompt(self):
+        app = Assistant(preload_model=False)
+        app.ai_engine = Mock()
+        app.ai_engine.query.return_value = "Sure."
+        app.add_to_history("hello", "Hi!")
+
+        app.prefill_draft("what time is")
+        app.process_user_input("what time is it")
+        draft, draft_system, draft_session = app.ai_engine.prefill.call_args[0]
+        query_system = app.ai_engine.query.call_args[0][1]
+        self.assertEqual(draft, "what time is")
+        self.assertEqual(draft_system, query_system)
+        self.assertEqual(draft_session, "default")
+
+        app.ai_engine.prefill.reset_mock()
+        app.prefill_draft("/profile 3")
+        app.ai_engine.prefill.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for process-table snapshots and the process tools.
+"""
+import unittest
+import sys
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import the processes module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processes import ProcessInfo, ProcessTable, parse_stat, protected_pids, PAGE_SIZE
+
+
+class TestProcessTable(unittest.TestCase):
+    """Test /proc parsing, CPU deltas and top-N selection"""
+
+    def test_parse_stat_with_parentheses_in_name(self):
+        fields = ["S", "1", "100", "100", "0", "-1", "4194560", "10", "0", "0", "0",
+                  "250", "50", "0", "0", "20", "0", "1", "0", "12345", "1000000", "300"]
+        process = parse_stat(42, "42 (web (content)) " + " ".join(fields))
+
+        self.assertEqual(process.name, "web (content)")
+        self.assertEqual(process.session, 100)
+        self.assertEqual(process.cpu_ticks, 300)
+        self.assertEqual(process.start_ticks, 12345)
+        self.assertEqual(process.rss_bytes, 300 * PAGE_SIZE)
+        self.assertFalse(process.kernel_thread)
+
+    def test_snapshot_contains_this_process(self):
+        snapshot = ProcessTable().scan()
+        self.assertIn(os.getpid(), snapshot.processes)
+        self.assertGreater(snapshot.processes[os.getpid()].rss_bytes, 0)
+
+    def test_cpu_usage_is_measured_between_snapshots(self):
+        table = ProcessTable(min_interval=0.0)
+        table.scan()
+        end = time.process_time() + 0.2
+        while time.process_time() < end:
+            pass
+        snapshot = table.scan()
+
+        self.assertGreater(snapshot.cpu_percent[os.getpid()], 10.0)
+        self.assertIsNotNone(snapshot.system_cpu_percent)
+
+    def test_top_matches_full_sort(self):
+        table = ProcessTable()
+        top = [p.pid for p, _ in table.top(5, sort_by="memory")]
+        ordered = sorted((p for p in table.snapshot.processes.values() if not p.kernel_thread),
+                         key=lambda p: p.rss_bytes, reverse=True)
+        self.assertEqual([p.rss_bytes for p in ordered[:5]],
+                         [table.snapshot.processes[pid].rss_bytes for pid in top])
+
+    def test_session_and_ancestors_are_protected(self):
+        def process(pid, name, ppid, session):
+            return ProcessInfo(pid, name, "S", ppid, session, 0, 0, 0, False)
+
+        processes = {p.pid: p for p in [
+            process(1, "systemd", 0, 1),
+            process(900, "gnome-shell", 1, 800),
+            process(1000, "code", 1, 1000),         # IDE, session leader
+            process(1100, "bash", 1000, 1100),      # Its terminal's shell
+            process(1200, "python3", 1100, 1100),   # The assistant
+            process(1300, "firefox", 1, 800),
+            process(1400, "bash", 1300, 1100),
+            process(1500, "slack", 1, 1500),        # Opened by the assistant, own session
+        ]}
+        self.assertEqual(protected_pids(processes, pid=1200), {1, 900, 1000, 1100, 1200})
+        # Only our own session's leader is protected, even when it is not an ancestor
+        self.assertEqual(protected_pids(processes, pid=1400), {1, 900, 1100, 1300, 1400})
+        self.assertIn(os.getpid(), ProcessTable().protected_pids())
+
+    def test_launched_apps_can_be_closed(self):
+        from assistant import Assistant
+
+        # A uniquely named stand-in for an app: the name comes from the path run
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        sleeper = os.path.join(temp_dir, "ai-test-app")
+        os.symlink(shutil.which("sleep"), sleeper)
+
+        app = Assistant(preload_model=False)
+        self.assertEqual(app.launch_app({'name': 'Test App', 'argv': [sleeper, '300']}), "Opened Test App")
+        deadline = time.monotonic() + 5
+        while not ProcessTable(max_age=0).find("ai-test-app") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        launched = ProcessTable(max_age=0).find("ai-test-app")
+        self.assertEqual(len(launched), 1)
+        pid = launched[0].pid
+        self.assertEqual(launched[0].session, pid)  # A session leader
+
+        app.process_table.max_age = 0
+        self.assertEqual(app.kill_process(name="ai-test-app"), f"Closed ai-test-app (pid {pid})")
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WTERMSIG(status), signal.SIGTERM)
+
+    def test_find_by_name(self):
+        child = subprocess.Popen(["sleep", "30"])
+        try:
+            matches = ProcessTable().find("sleep")
+            self.assertIn(child.pid, [p.pid for p in matches])
+        finally:
+            child.kill()
+            child.wait()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for on-demand request profiling.
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+# Add the parent directory to the path so we can import the profiling module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import RequestProfiler
+
+
+def busy_engine_work(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def request_through_worker():
+    # Like LocalLLMEngine.query: the work happens on an "llm-" thread
+    worker = threading.Thread(target=busy_engine_work, args=(0.1,), name="llm-worker")
+    worker.start()
+    worker.join()
+    return "done"
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def perf_counters(self):
+        self.calls += 1
+        return {"prompt_eval_ms": 10.0 * self.calls, "prompt_tokens": 5 * self.calls,
+                "eval_ms": 0.0, "eval_tokens": 0}
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test capture files and disarming after N requests"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_profiles_next_requests_then_disarms(self):
+        profiler = RequestProfiler(2, engine=FakeEngine(), output_dir=self.tmp_dir.name, sample_interval=0.001)
+        with redirect_stdout(StringIO()) as output:
+            results = [profiler.run(f"request {i}", request_through_worker) for i in range(3)]
+
+        self.assertEqual(results, ["done"] * 3)
+        self.assertFalse(profiler.active)
+        self.assertEqual(len(profiler.written), 6)  # pstats, collapsed and json for two requests
+        self.assertIn("Profile 2/2", output.getvalue())
+
+        collapsed = [path for path in profiler.written if path.endswith(".collapsed")][0]
+        with open(collapsed) as f:
+            self.assertIn("llm-worker;", f.read())
+        summary = [path for path in profiler.written if path.endswith(".json")][0]
+        with open(summary) as f:
+            self.assertEqual(json.load(f)["llama_cpp"]["prompt_tokens"], 5)
+
+    def test_concurrent_requests_are_profiled_one_at_a_time(self):
+        profiler = RequestProfiler(2, output_dir=self.tmp_dir.name, sample_interval=0.001)
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_request():
+            entered.set()
+            release.wait(5)
+            return "slow"
+
+        with redirect_stdout(StringIO()):
+            thread = threading.Thread(target=profiler.run, args=("slow", slow_request))
+            thread.start()
+            self.assertTrue(entered.wait(5))
+            # Runs unprofiled while the first one holds the profiler
+            self.assertEqual(profiler.run("other", request_through_worker), "done")
+            self.assertEqual(profiler.remaining, 1)
+            release.set()
+            thread.join()
+
+        self.assertEqual(len(profiler.written), 3)
+
+    def test_profile_command_arms_the_assistant(self):
+        from assistant import Assistant
+
+        app = Assistant(preload_model=False)
+        self.assertIn("next 3 requests", app.process_user_input("/profile 3"))
+        self.assertEqual(app.profiler.remaining, 3)
+        self.assertEqual(app.process_user_input("/profile off"), "Profiling stopped")
+        self.assertIsNone(app.profiler)
+
+
+if __name__ == '__main__':
+    unittest.main()
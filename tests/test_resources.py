@@ -0,0 +1,115 @@
+"""
+Tests for resources that must not grow over a long session.
+"""
+import logging
+import logging.handlers
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import OrderedDict
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the assistant module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import LocalLLMEngine, SchedulingPolicy, prune_snapshots
+from assistant import Assistant
+
+
+class TestLogFiles(unittest.TestCase):
+    """Test that launches share one rotating log file"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = logging.getLogger()
+        self.saved_handlers = self.root.handlers[:]
+        self.root.handlers = []
+
+    def tearDown(self):
+        for handler in self.root.handlers:
+            handler.close()
+        self.root.handlers = self.saved_handlers
+        shutil.rmtree(self.temp_dir)
+
+    def test_instances_reuse_one_log_file(self):
+        log_path = os.path.join(self.temp_dir, "logs", "ai_assistant.log")
+        with patch("assistant.LOG_PATH", log_path):
+            for _ in range(3):
+                Assistant(preload_model=False)
+
+        self.assertEqual(os.listdir(os.path.dirname(log_path)), ["ai_assistant.log"])
+        file_handlers = [h for h in self.root.handlers if isinstance(h, logging.FileHandler)]
+        self.assertEqual(len(file_handlers), 1)
+        self.assertIsInstance(file_handlers[0], logging.handlers.RotatingFileHandler)
+
+
+class TestCacheStats(unittest.TestCase):
+    """Test the KV-cache figures the soak harness watches"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_snapshot(self, name, size, mtime):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(bytes(size))
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_cache_stats_count_session_slots(self):
+        with patch.object(LocalLLMEngine, "_model_path", return_value="/nonexistent/model.gguf"):
+            engine = LocalLLMEngine(preload=False, snapshot_dir=self.temp_dir,
+                                    scheduling_policy=SchedulingPolicy(priority="normal"))
+        self.assertEqual(engine.cache_stats(), {"session_slots": 0, "slot_bytes": 0, "context_tokens": 0,
+                                                "snapshot_disk_bytes": 0})
+
+        engine._session_slots = OrderedDict(a=SimpleNamespace(llama_state_size=1000),
+                                            b=SimpleNamespace(llama_state_size=500))
+        engine.llm = SimpleNamespace(n_tokens=42)
+        self.write_snapshot("model-prompt.kvstate", 300, 1000)
+        self.assertEqual(engine.cache_stats(), {"session_slots": 2, "slot_bytes": 1500, "context_tokens": 42,
+                                                "snapshot_disk_bytes": 300})
+
+        engine.drop_session("a")
+        self.assertEqual(engine.cache_stats()["session_slots"], 1)
+
+    def test_session_slots_are_capped_by_bytes(self):
+        with patch.object(LocalLLMEngine, "_model_path", return_value="/nonexistent/model.gguf"):
+            engine = LocalLLMEngine(preload=False, max_session_bytes=2500,
+                                    scheduling_policy=SchedulingPolicy(priority="normal"))
+        # Each saved state holds 400 bytes of KV cache and 600 of logits
+        engine.llm = SimpleNamespace(save_state=lambda: SimpleNamespace(llama_state_size=400,
+                                                                        scores=memoryview(bytes(600))),
+                                     load_state=lambda state: None, n_tokens=0)
+        for session_id in ("a", "b", "c", "d"):
+            engine._switch_session(session_id)
+        engine._switch_session(None)
+
+        # Only the two most recently used slots fit in 2500 bytes
+        self.assertEqual(list(engine._session_slots), ["c", "d"])
+        self.assertEqual(engine.cache_stats()["slot_bytes"], 2000)
+
+    def test_snapshots_are_evicted_least_recently_used_first(self):
+        old = self.write_snapshot("old.kvstate", 400, 1000)
+        used = self.write_snapshot("used.kvstate", 400, 3000)
+        new = self.write_snapshot("new.kvstate", 400, 2000)
+        other = self.write_snapshot("notes.txt", 400, 500)
+
+        prune_snapshots(self.temp_dir, keep=new, max_bytes=1000)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["new.kvstate", "notes.txt", "used.kvstate"])
+
+        # The snapshot just written stays even when it alone is over the cap
+        prune_snapshots(self.temp_dir, keep=new, max_bytes=100)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["new.kvstate", "notes.txt"])
+        self.assertFalse(os.path.exists(old) or os.path.exists(used))
+        self.assertTrue(os.path.exists(other))
+
+
+if __name__ == "__main__":
+    unittest.main()
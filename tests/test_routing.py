@@ -0,0 +1,148 @@
+"""
+Tests for tiered routing between the tool model and the chat model.
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the engine module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_engine import CHAT_GRAMMAR, ROUTER_SYSTEM_PROMPT, LocalLLMEngine, ModelPool, SchedulingPolicy, _PendingQuery
+from assistant import SYSTEM_PROMPT, Assistant
+from batch import run_batch
+from tool_catalog import tool_names
+
+
+class FakeModel:
+    """Answers every completion with the next of `outputs` and records the prompts"""
+
+    def __init__(self, *outputs):
+        self.outputs = list(outputs)
+        self.prompts = []
+        self.calls = []  # Keyword arguments of every call
+
+    def __call__(self, prompt, max_tokens=16, **kwargs):
+        self.prompts.append(prompt)
+        self.calls.append(dict(kwargs, max_tokens=max_tokens))
+        text = self.outputs.pop(0) if len(self.outputs) > 1 else self.outputs[0]
+        return {"choices": [{"text": text}], "usage": {"prompt_tokens": 10, "completion_tokens": 2}}
+
+
+class TestRouting(unittest.TestCase):
+    """Test routing a request to the tool or the chat model, and where the route is reported"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        for name in ("tool", "router", "chat"):
+            with open(os.path.join(self.tmp_dir.name, f"{name}.gguf"), "wb") as f:
+                f.write(b"\0" * 1000)
+        self.timer_patcher = patch.object(LocalLLMEngine, "_first_token_timer",
+                                          staticmethod(lambda queued_at, timing: []))
+        self.timer_patcher.start()
+
+    def tearDown(self):
+        self.timer_patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def make_engine(self, tool, router=None, chat=None):
+        models = {"tool.gguf": tool, "router.gguf": router, "chat.gguf": chat}
+        with patch("ai_engine.MODELS_DIR", self.tmp_dir.name):
+            engine = LocalLLMEngine("tool.gguf", preload=False, chat_model_filename="chat.gguf",
+                                    router_model_filename="router.gguf" if router else None,
+                                    scheduling_policy=SchedulingPolicy(priority="normal"))
+        engine.pool = ModelPool(max_bytes=10 ** 6, n_ctx=0, loader=lambda path: models[os.path.basename(path)])
+        engine.llm = tool
+        engine.load = lambda: False
+        # Stand-ins for the compiled grammars, told apart by identity
+        engine.tool_grammar, engine.route_grammar, engine.chat_grammar = object(), object(), object()
+        return engine
+
+    def run_query(self, engine, prompt):
+        request = _PendingQuery(prompt, "system", None)
+        engine.run_batch([request])
+        if request.error is not None:
+            raise request.error
+        return request
+
+    def test_router_prompt_lists_every_tool(self):
+        for name in tool_names():
+            self.assertIn(name, ROUTER_SYSTEM_PROMPT)
+            self.assertIn(name, SYSTEM_PROMPT)
+        self.assertIn('"remind me every hour to stretch" → tool', ROUTER_SYSTEM_PROMPT)
+
+    def test_scheduling_prompt_routes_to_the_tool_model(self):
+        reminder = '{"tool": "create_reminder", "parameters": {"message": "stretch", "every": "1h"}}'
+        tool, router, chat = FakeModel(reminder), FakeModel("tool"), FakeModel("Sure!")
+        engine = self.make_engine(tool, router, chat)
+
+        request = self.run_query(engine, "remind me every hour to stretch")
+        self.assertIn(ROUTER_SYSTEM_PROMPT, router.prompts[0])
+        self.assertTrue(router.prompts[0].endswith(
+            "user<|end_header_id|>\n\nremind me every hour to stretch<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"))
+        self.assertEqual(request.text, reminder)
+        self.assertEqual(request.usage["route"], "tool")
+        self.assertEqual(chat.prompts, [])
+
+    def test_router_model_classifies_tool_and_chat(self):
+        tool = FakeModel('{"tool": "open_app", "parameters": {"app_name": "firefox"}}')
+        router, chat = FakeModel("tool", "chat"), FakeModel("Why did the chicken cross the road?")
+        engine = self.make_engine(tool, router, chat)
+
+        opened = self.run_query(engine, "open firefox")
+        joke = self.run_query(engine, "tell me a joke")
+        self.assertEqual((opened.usage["route"], joke.usage["route"]), ("tool", "chat"))
+        self.assertEqual(len(tool.prompts), 1)
+        self.assertEqual(chat.prompts, [joke.full_prompt])
+        self.assertTrue(all(call["grammar"] is engine.route_grammar for call in router.calls))
+
+    def test_one_token_decode_routes_without_a_router_model(self):
+        # Route decode, then the tool call; then a route decode that is not "{"
+        tool = FakeModel("{", '{"tool": "system_info", "parameters": {}}', "Hi")
+        chat = FakeModel("Hello! How can I help?")
+        engine = self.make_engine(tool, chat=chat)
+
+        info = self.run_query(engine, "show system info")
+        hello = self.run_query(engine, "good morning")
+        self.assertEqual((info.usage["route"], info.text), ("tool", '{"tool": "system_info", "parameters": {}}'))
+        self.assertEqual((hello.usage["route"], hello.text), ("chat", "Hello! How can I help?"))
+        route_calls = [tool.calls[0], tool.calls[2]]
+        self.assertTrue(all(call["max_tokens"] == 1 and call["grammar"] is engine.tool_grammar
+                            for call in route_calls))
+
+    def test_chat_route_never_produces_a_tool_call(self):
+        self.assertEqual(CHAT_GRAMMAR.split(), ["root", "::=", "[^{}]*"])
+
+        chat = FakeModel("Sure, I could open firefox for you.")
+        engine = self.make_engine(FakeModel("tool"), FakeModel("chat"), chat)
+        app = Assistant(engine=engine)
+        response = app.process_user_input("what do you think about firefox?")
+
+        self.assertIs(chat.calls[0]["grammar"], engine.chat_grammar)
+        self.assertEqual(response, "Sure, I could open firefox for you.")
+        self.assertIsNone(app.last_tool_call)
+
+    def test_route_is_reported_in_batch_output(self):
+        tool = FakeModel('{"tool": "open_app", "parameters": {"app_name": "firefox"}}')
+        engine = self.make_engine(tool, FakeModel("tool", "chat"), FakeModel("Hello!"))
+        app = Assistant(engine=engine)
+        app.dry_run_tools = True
+
+        input_path = os.path.join(self.tmp_dir.name, "in.jsonl")
+        output_path = os.path.join(self.tmp_dir.name, "out.jsonl")
+        with open(input_path, "w") as f:
+            f.write('"open firefox"\n"how are you today"\n')
+        run_batch(app, input_path, output_path)
+
+        with open(output_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record["route"] for record in records], ["tool", "chat"])
+        self.assertEqual(records[0]["tool_call"]["tool"], "open_app")
+        self.assertIsNone(records[1]["tool_call"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+"""
+Tests for deferred and recurring tool calls.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# Add the parent directory to the path so we can import the scheduler module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant import Assistant
+from scheduler import RETRY_SECONDS, JobScheduler, ThreadTimer, parse_duration, parse_time, resolve_schedule
+
+NOW = datetime(2026, 3, 2, 10, 30).timestamp()  # A Monday, 10:30 local time
+
+
+class FakeClock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTimer:
+    """Records arm() delays instead of sleeping"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.delays = []
+
+    def arm(self, delay):
+        self.delays.append(delay)
+
+    def cancel(self):
+        self.delays.append(None)
+
+    def close(self):
+        pass
+
+
+class TestScheduleParsing(unittest.TestCase):
+    """Test durations and times as the model writes them"""
+
+    def test_durations(self):
+        self.assertEqual(parse_duration("10m"), 600)
+        self.assertEqual(parse_duration("1h30m"), 5400)
+        self.assertEqual(parse_duration("2 hours"), 7200)
+        self.assertEqual(parse_duration("every hour"), 3600)
+        self.assertEqual(parse_duration("15"), 900)
+        for bad in ("soon", "10 parsecs", "0m"):
+            with self.assertRaises(ValueError):
+                parse_duration(bad)
+
+    def test_times_of_day_are_the_next_occurrence(self):
+        self.assertEqual(parse_time("11:00", NOW), datetime(2026, 3, 2, 11, 0).timestamp())
+        self.assertEqual(parse_time("9", NOW), datetime(2026, 3, 3, 9, 0).timestamp())
+        self.assertEqual(parse_time("9:15pm", NOW), datetime(2026, 3, 2, 21, 15).timestamp())
+        self.assertEqual(parse_time("tomorrow 7am", NOW), datetime(2026, 3, 3, 7, 0).timestamp())
+        self.assertEqual(parse_time("2026-03-05T08:00", NOW), datetime(2026, 3, 5, 8, 0).timestamp())
+
+        due, interval = resolve_schedule(every="1h", now=NOW)
+        self.assertEqual((due, interval), (NOW + 3600, 3600))
+        with self.assertRaises(ValueError):
+            resolve_schedule(now=NOW)
+
+
+class TestJobScheduler(unittest.TestCase):
+    """Test the heap, recurrence, persistence and timer arming"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "jobs.json")
+        self.clock = FakeClock()
+        self.ran = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def make_scheduler(self):
+        scheduler = JobScheduler(runner=self.ran.append, path=self.path, clock=self.clock)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_due_jobs_run_in_order_and_recurring_ones_stay(self):
+        scheduler = self.make_scheduler()
+        later = scheduler.add("open_app", {"app_name": "slack"}, due=NOW + 120)
+        soon = scheduler.add("notify", {"message": "stretch"}, due=NOW + 60, interval=3600)
+        scheduler.add("system_info", due=NOW + 7200)
+
+        self.clock.now = NOW + 150
+        self.assertEqual(scheduler.run_due(), [soon, later])
+        self.assertNotIn(later.id, scheduler)
+        self.assertEqual(scheduler.get(soon.id).due, NOW + 60 + 3600)
+
+        # Asleep for a day: the missed hourly runs collapse into one
+        self.clock.now = NOW + 86400
+        self.assertEqual([job.tool for job in scheduler.run_due()], ["notify", "system_info"])
+        self.assertGreater(scheduler.get(soon.id).due, self.clock.now)
+        self.assertEqual(len(scheduler), 1)
+
+    def test_jobs_survive_a_restart(self):
+        scheduler = self.make_scheduler()
+        job = scheduler.add("open_app", {"app_name": "slack"}, due=NOW + 60, description="open slack")
+        cancelled = scheduler.add("system_info", due=NOW + 30)
+        scheduler.cancel(cancelled.id)
+
+        restored = self.make_scheduler()
+        self.assertEqual([(j.id, j.tool, j.parameters, j.description) for j in restored.pending()],
+                         [(job.id, "open_app", {"app_name": "slack"}, "open slack")])
+        self.assertEqual(restored.next_due(), NOW + 60)
+        self.assertGreater(restored.add("system_info").id, cancelled.id)
+
+    def test_timer_is_armed_for_the_earliest_job_only(self):
+        scheduler = self.make_scheduler()
+        scheduler.add("notify", {"message": "first"}, due=NOW + 10)
+        timer = scheduler.start(FakeTimer)._timer
+        self.assertEqual(timer.delays, [10])
+
+        # Later jobs do not touch the timer, an earlier one re-arms it
+        for i in range(500):
+            scheduler.add("notify", {"message": str(i)}, due=NOW + 100 + i)
+        scheduler.add("notify", {"message": "sooner"}, due=NOW + 5)
+        self.assertEqual(timer.delays, [10, 5])
+
+        # Once nothing is pending the timer is cancelled
+        self.clock.now = NOW + 700
+        scheduler.run_due()
+        self.assertEqual(len(scheduler), 0)
+        self.assertEqual(timer.delays[-1], None)
+
+    def test_processes_share_one_schedule(self):
+        gui, prompt = self.make_scheduler(), self.make_scheduler()
+        first = gui.add("open_app", {"app_name": "slack"}, due=NOW + 60)
+        second = prompt.add("notify", {"message": "stretch"}, due=NOW + 120)
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual([job.id for job in gui.pending()], [first.id, second.id])
+
+        prompt.cancel(first.id)
+        gui.add("system_info", due=NOW + 180)
+        self.assertEqual([job.tool for job in self.make_scheduler().pending()], ["notify", "system_info"])
+
+    def test_only_one_scheduler_runs_due_jobs(self):
+        owner = self.make_scheduler().start(FakeTimer)
+        other = self.make_scheduler().start(FakeTimer)
+        self.assertTrue(other.has_runner())
+        self.assertEqual(other._timer.delays, [RETRY_SECONDS])
+
+        # The owner picks up a job added elsewhere without being asked
+        job = other.add("notify", {"message": "stretch"}, due=NOW + 60)
+        deadline = time.monotonic() + 5
+        while 60 not in owner._timer.delays and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(owner._timer.delays[-1], 60)
+
+        self.clock.now = NOW + 60
+        self.assertEqual(other.run_due(), [])
+        self.assertEqual([ran.id for ran in owner.run_due()], [job.id])
+        self.assertEqual(len(self.ran), 1)
+
+        # Once the owner stops, the other one takes over
+        owner.stop()
+        other.add("notify", {"message": "again"}, due=NOW + 30)
+        self.assertEqual([ran.tool for ran in other.run_due()], ["notify"])
+
+    def test_thread_timer_runs_due_jobs(self):
+        done = threading.Event()
+        scheduler = JobScheduler(runner=lambda job: done.set(), path=self.path)
+        self.addCleanup(scheduler.stop)
+        scheduler.add("notify", {"message": "now"}, due=scheduler.clock() + 0.05)
+        scheduler.start(ThreadTimer)
+        try:
+            self.assertTrue(done.wait(5))
+        finally:
+            scheduler.stop()
+        self.assertEqual(len(scheduler), 0)
+
+
+class TestSchedulerTools(unittest.TestCase):
+    """Test schedule_task and create_reminder through execute_tool"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.app = Assistant(preload_model=False)
+        self.clock = FakeClock()
+        self.app._job_scheduler = JobScheduler(runner=self.app.run_scheduled_job,
+                                               path=os.path.join(self.temp_dir, "jobs.json"), clock=self.clock)
+
+    def tearDown(self):
+        self.app.job_scheduler.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_one_shot_scheduling_warns(self):
+        reply = self.app.execute_tool("create_reminder", message="stretch", **{"in": "10m"})
+        self.assertIn("not running", reply)
+        self.app.start_scheduler(FakeTimer)
+        self.assertNotIn("not running", self.app.execute_tool("create_reminder", message="drink", **{"in": "20m"}))
+
+    def test_reminder_runs_through_the_tool_path(self):
+        reply = self.app.execute_tool("create_reminder", message="stretch", every="1h")
+        self.assertIn("every hour", reply)
+        self.assertIn("scheduled", str(self.app.execute_tool("list_scheduled")))
+
+        self.clock.now = NOW + 3600
+        with patch("assistant.subprocess.Popen") as popen:
+            self.app.job_scheduler.run_due()
+        self.assertEqual(popen.call_args[0][0][-1], "stretch")
+
+    def test_scheduled_actions(self):
+        reply = self.app.execute_tool("schedule_task", tool="open_app", parameters={"app_name": "slack"},
+                                      **{"in": "10m"})
+        self.assertIn("job 1", reply)
+        self.assertIn("cannot be scheduled",
+                      self.app.execute_tool("schedule_task", tool="create_reminder", every="1h"))
+        self.assertIn("Error", self.app.execute_tool("schedule_task", tool="open_app", at="whenever"))
+
+        with patch.object(Assistant, "open_application", return_value="Opened Slack") as open_application:
+            self.clock.now = NOW + 600
+            self.app.job_scheduler.run_due()
+        open_application.assert_called_once_with("slack")
+        self.assertEqual(self.app.execute_tool("cancel_scheduled", job_id=1), "No scheduled task with id 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for load-aware inference scheduling.
+"""
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest import mock
+
+# Add the parent directory to the path so we can import the engine module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_engine
+from ai_engine import SchedulingPolicy
+
+
+class TestSchedulingPolicy(unittest.TestCase):
+    """Test thread counts, the interactive boost and background priority"""
+
+    CPUS = set(range(8))
+
+    def plan_with_load(self, policy, busy_per_cpu, own_ticks=0):
+        """Plan after a window of 100 ticks per CPU in which CPU i was busy busy_per_cpu[i] ticks"""
+        before = {cpu: (0, 0) for cpu in self.CPUS}
+        after = {cpu: (busy_per_cpu[cpu], 100) for cpu in self.CPUS}
+        policy.sample_window = 0.0
+        policy._sample = None
+        with mock.patch.object(ai_engine, "read_cpu_times", side_effect=[before, after]), \
+                mock.patch.object(ai_engine, "read_own_cpu_ticks", side_effect=[0, own_ticks]), \
+                mock.patch("os.sched_getaffinity", return_value=self.CPUS):
+            return policy.plan()
+
+    def test_threads_follow_foreground_load(self):
+        policy = SchedulingPolicy(max_threads=8, reserve_cores=1)
+        threads, boosted, cpus = self.plan_with_load(policy, [0] * 8)
+        self.assertEqual((threads, boosted, cpus), (7, False, None))
+
+        # Three CPUs fully busy with other work leave four threads
+        threads, _, _ = self.plan_with_load(policy, [100, 100, 100, 0, 0, 0, 0, 0])
+        self.assertEqual(threads, 4)
+
+        # Everything busy still leaves min_threads
+        threads, _, _ = self.plan_with_load(policy, [100] * 8)
+        self.assertEqual(threads, 1)
+
+    def test_load_is_measured_over_a_recent_window(self):
+        policy = SchedulingPolicy(max_threads=8, reserve_cores=1, sample_window=0.05)
+        idle = {cpu: (0, 100) for cpu in self.CPUS}
+        # The previous batch was an hour ago, with everything idle since...
+        policy._sample = (time.monotonic() - 3600, {cpu: (0, 0) for cpu in self.CPUS}, 0)
+        # ...but the last 50 ms had three CPUs fully busy
+        now = {cpu: (100 if cpu < 3 else 0, 200) for cpu in self.CPUS}
+        with mock.patch.object(ai_engine, "read_cpu_times", side_effect=[idle, now]), \
+                mock.patch.object(ai_engine, "read_own_cpu_ticks", side_effect=[0, 0]), \
+                mock.patch("os.sched_getaffinity", return_value=self.CPUS):
+            start = time.monotonic()
+            threads, _, _ = policy.plan()
+        self.assertEqual(threads, 4)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_own_inference_is_not_foreground_load(self):
+        policy = SchedulingPolicy(max_threads=8, reserve_cores=0)
+        # Four CPUs busy, all of it this process's own threads
+        threads, _, _ = self.plan_with_load(policy, [100] * 4 + [0] * 4, own_ticks=400)
+        self.assertEqual(threads, 8)
+
+    def test_affinity_picks_least_busy_cpus(self):
+        policy = SchedulingPolicy(max_threads=2, affinity=True)
+        _, _, cpus = self.plan_with_load(policy, [50, 0, 50, 50, 5, 50, 50, 50])
+        self.assertEqual(cpus, [1, 4])
+
+    def test_boost_applies_to_one_batch(self):
+        policy = SchedulingPolicy(max_threads=4, affinity=True)
+        policy.note_user_input()
+        threads, boosted, cpus = self.plan_with_load(policy, [100] * 8)
+        self.assertEqual((threads, boosted, cpus), (4, True, None))
+
+        _, boosted, _ = self.plan_with_load(policy, [100] * 8)
+        self.assertFalse(boosted)
+
+    def test_background_priority_only_affects_its_thread(self):
+        policy = SchedulingPolicy(priority="nice", nice=10)
+        before = os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+        seen = []
+
+        def background():
+            policy.apply_background()
+            seen.append(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+
+        thread = threading.Thread(target=background)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [max(before, 10)])
+        self.assertEqual(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()), before)
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            SchedulingPolicy(priority="realtime")
+
+
+if __name__ == "__main__":
+    unittest.main()
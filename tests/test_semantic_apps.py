@@ -0,0 +1,95 @@
+"""
+Tests for the semantic application resolver.
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import semantic_apps
+
+APPS = [
+    {"name": "Firefox", "generic_name": "Web Browser", "comment": "Browse the World Wide Web",
+     "keywords": "Internet;WWW;Browser;Web", "exec": "firefox", "desktop_file": "firefox.desktop"},
+    {"name": "GNU Image Manipulation Program", "generic_name": "Image Editor",
+     "comment": "Create images and edit photographs", "keywords": "GIMP;graphic;design",
+     "exec": "gimp", "desktop_file": "gimp.desktop"},
+    {"name": "Rhythmbox", "generic_name": "Music Player", "comment": "Play and organize your music collection",
+     "keywords": "Audio;Song;MP3;Playlist", "exec": "rhythmbox", "desktop_file": "rhythmbox.desktop"},
+]
+
+# Apps whose descriptions overlap the ones above: "edit", "player", "process"
+LOOKALIKES = [
+    {"name": "Text Editor", "generic_name": "Text Editor", "comment": "Edit text files",
+     "keywords": "Text;Editor;Plaintext;Write", "exec": "gnome-text-editor",
+     "desktop_file": "org.gnome.TextEditor.desktop"},
+    {"name": "LibreOffice Writer", "generic_name": "Word Processor",
+     "comment": "Create and edit text and graphics in letters, reports, documents and Web pages",
+     "keywords": "Text;Letter;Fax;Document;OpenDocument;Doc;Docx;Rtf", "exec": "libreoffice",
+     "desktop_file": "libreoffice-writer.desktop"},
+    {"name": "System Monitor", "generic_name": "Task Manager",
+     "comment": "View current processes and monitor system state",
+     "keywords": "Monitor;System;Process;CPU;Memory;Network;Usage;Task;Manager",
+     "exec": "gnome-system-monitor", "desktop_file": "gnome-system-monitor.desktop"},
+    {"name": "VLC media player", "generic_name": "Media player",
+     "comment": "Read, capture, broadcast your multimedia streams",
+     "keywords": "Player;Capture;DVD;Audio;Video;Server;Broadcast", "exec": "vlc", "desktop_file": "vlc.desktop"},
+    {"name": "Chromium", "generic_name": "Web Browser", "comment": "Access the Internet",
+     "keywords": "browser", "exec": "chromium", "desktop_file": "chromium.desktop"},
+]
+
+
+@unittest.skipUnless(semantic_apps.is_available(), "numpy not installed")
+class TestSemanticAppIndex(unittest.TestCase):
+    """Test cases for semantic app resolution."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "index.npz")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_resolves_descriptive_requests(self):
+        """Test that descriptions resolve to the right app and nonsense does not."""
+        index = semantic_apps.SemanticAppIndex(path=self.path)
+        index.update(APPS)
+
+        self.assertEqual(index.resolve("the browser")["name"], "Firefox")
+        self.assertEqual(index.resolve("an image editor")["name"], "GNU Image Manipulation Program")
+        self.assertEqual(index.resolve("my music player")["name"], "Rhythmbox")
+        self.assertIsNone(index.resolve("the pod bay doors"))
+
+    def test_ambiguous_or_unrelated_requests_do_not_resolve(self):
+        """Test that close calls between different kinds of apps are declined, not guessed."""
+        index = semantic_apps.SemanticAppIndex(path=None)
+        index.update(APPS + LOOKALIKES)
+
+        for query in ("something to edit photos", "see running processes", "play some songs",
+                      "write a letter", "order a pizza", "turn off the lights", "my bank account"):
+            self.assertIsNone(index.resolve(query), query)
+        self.assertIn("GNU Image Manipulation Program",
+                      [app["name"] for app in index.suggest("something to edit photos")])
+
+        # Two apps of the same kind may tie; either one is right
+        self.assertIn(index.resolve("something to browse the web")["name"], ("Firefox", "Chromium"))
+        self.assertEqual(index.resolve("the task manager")["name"], "System Monitor")
+
+    def test_incremental_update_and_persistence(self):
+        """Test that only changed apps are embedded again after a reload."""
+        index = semantic_apps.SemanticAppIndex(path=self.path)
+        self.assertEqual(index.update(APPS), 3)
+
+        reloaded = semantic_apps.SemanticAppIndex.load_or_create(path=self.path)
+        changed = [dict(APPS[0], comment="Fast private browsing")] + APPS[1:]
+        self.assertEqual(reloaded.update(changed), 1)
+        self.assertEqual(reloaded.update(changed[1:]), 0)
+        self.assertEqual(reloaded.matrix.shape[0], 2)
+        self.assertEqual(reloaded.resolve("my music player")["name"], "Rhythmbox")
+
+
+if __name__ == '__main__':
+    unittest.main()
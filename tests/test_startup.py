@@ -0,0 +1,34 @@
+"""
+Tests that the CLI path stays free of GTK and other heavy imports.
+"""
+import unittest
+import sys
+import os
+import json
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("gi", "llama_cpp", "toon", "numpy")
+
+PROBE = f"""
+import json, sys
+from assistant import Assistant
+import main
+app = Assistant(preload_model=False)
+app.process_user_input("help")
+print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    """Test cases for lazy imports on the CLI path."""
+
+    def test_cli_path_imports_no_heavy_modules(self):
+        """Test that importing main and answering a fast-path prompt stays light."""
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,10 @@ from unittest.mock import Mock, patch
 import sys
 import os
 
-# Add the parent directory to the path so we can import the main module
+# Add the parent directory to the path so we can import the assistant module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import MyApplication
+from assistant import Assistant
 
 
 class TestToolParsing(unittest.TestCase):
@@ -27,8 +27,11 @@ class TestToolParsing(unittest.TestCase):
         self.mock_run = self.run_patcher.start()
         self.mock_run.return_value = Mock(returncode=0, stdout="0x12345678  0 myhost Terminal\n")
 
-        # Create app instance after mocking is set up
-        self.app = MyApplication()
+        # Create app instance after mocking is set up; no GTK or model needed
+        self.app = Assistant(preload_model=False)
+        self.app.installed_apps = [
+            {'name': 'Firefox Web Browser', 'exec': 'firefox', 'desktop_file': 'firefox.desktop'}
+        ]
 
     def tearDown(self):
         """Clean up test fixtures."""
@@ -58,9 +61,59 @@ class TestToolParsing(unittest.TestCase):
         with patch.object(self.app, 'ai_engine') as mock_engine:
             mock_engine.query.return_value = conversational_response
 
-            result = self.app.process_user_input("how are you")
+            result = self.app.process_user_input("how is your day going")
             self.assertEqual(result, conversational_response)
 
+    def test_kill_process_using_most_memory(self):
+        """Test that "the process using the most memory" goes through the process table."""
+        from processes import ProcessInfo
+
+        hog = ProcessInfo(pid=4321, name="hog", state="S", ppid=1, session=1000, cpu_ticks=0,
+                          start_ticks=0, rss_bytes=8 << 30, kernel_thread=False)
+        json_response = '{"tool": "kill_process", "parameters": {"sort_by": "memory"}}'
+
+        with patch.object(self.app, 'ai_engine') as mock_engine, \
+                patch.object(type(self.app), 'process_table') as mock_table, \
+                patch('processes.terminate') as mock_terminate:
+            mock_engine.query.return_value = json_response
+            mock_table.top.return_value = [(hog._replace(pid=1000, name="gnome-shell"), 0.0), (hog, 0.0)]
+            mock_table.protected_pids.return_value = {1, 1000}
+
+            result = self.app.process_user_input("kill the process using the most memory")
+            mock_table.top.assert_called_once_with(20, sort_by="memory")
+            mock_terminate.assert_called_once_with(hog)
+            self.assertIn("Closed hog (pid 4321)", result)
+
+    def test_kill_process_reports_partial_failures(self):
+        """Test that a process that could not be closed is reported next to the ones that were."""
+        from processes import ProcessInfo
+
+        workers = [ProcessInfo(pid=pid, name="worker", state="S", ppid=1, session=1000, cpu_ticks=0,
+                               start_ticks=0, rss_bytes=0, kernel_thread=False) for pid in (11, 12)]
+
+        with patch.object(type(self.app), 'process_table') as mock_table, \
+                patch('processes.terminate', side_effect=[None, PermissionError("denied")]):
+            mock_table.find.return_value = workers
+            mock_table.protected_pids.return_value = {1}
+            result = self.app.kill_process(name="worker")
+
+        self.assertIn("Closed worker (pid 11)", result)
+        self.assertIn("Could not close worker (pid 12): denied", result)
+
+    def test_list_apps_keeps_only_a_summary_in_history(self):
+        """Test that a long app list is summarized for the model and kept whole for the views."""
+        self.app.installed_apps = [{'name': f'App {i:04d}', 'exec': 'true'} for i in range(5000)]
+
+        with patch.object(self.app, 'ai_engine') as mock_engine:
+            mock_engine.query.return_value = '{"tool": "list_apps", "parameters": {}}'
+            response = self.app.process_user_input("list my apps")
+
+        self.assertTrue(response.startswith("✅ Installed applications (5000 total): App 0000,"))
+        self.assertIn("and 4992 more", response)
+        self.assertLess(len(response), 200)
+        self.assertEqual(len(self.app.last_tool_result), 5000)
+        self.assertIs(self.app.sessions.default.last_tool_result, self.app.last_tool_result)
+
 
 if __name__ == '__main__':
     unittest.main()
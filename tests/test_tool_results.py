@@ -0,0 +1,39 @@
+"""
+Tests for structured tool results.
+"""
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tool_results import ToolResult
+
+
+class TestToolResult(unittest.TestCase):
+    """Test summaries, table layout and serialization"""
+
+    def test_listing_summary_names_the_first_items(self):
+        result = ToolResult.listing("Installed applications", ["Firefox", "GIMP", "Terminal"], preview=2)
+        self.assertEqual(str(result), "Installed applications (3 total): Firefox, GIMP and 1 more")
+        self.assertEqual(result.lines(), ["Firefox", "GIMP", "Terminal"])
+        self.assertIsNone(result.header_line())
+
+    def test_table_cells_are_aligned(self):
+        result = ToolResult("2 processes", [("firefox", "812"), ("sh", "7")], columns=("Process", "PID"))
+        self.assertEqual(result.header_line(), "Process  PID")
+        self.assertEqual(result.lines(), ["firefox  812", "sh       7"])
+        self.assertEqual(result.to_text().splitlines()[1:],
+                         ["  Process  PID", "• firefox  812", "• sh       7"])
+
+    def test_dict_round_trip(self):
+        for result in (ToolResult.listing("Files", ["/a", "/b"]),
+                       ToolResult("table", [("x", "1")], columns=("Name", "N"), title="Table")):
+            copy = ToolResult.from_dict(result.to_dict())
+            self.assertEqual((copy.summary, copy.rows, copy.columns, copy.title),
+                             (result.summary, result.rows, result.columns, result.title))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""The assistant's actions as the models are told about them.
+
+The main system prompt (assistant.SYSTEM_PROMPT) and the router's
+classification prompt (ai_engine.ROUTER_SYSTEM_PROMPT) are both built from
+these lists, so a new tool cannot reach one model and not the other.
+"""
+
+# (signature, description) of every tool the model may call
+ACTIONS = [
+    ("open_app(app_name)", "Opens an application by name"),
+    ("list_apps()", "Shows all installed applications"),
+    ("system_info()", "Shows CPU, memory, and disk usage"),
+    ("close_window(title)", "Closes a window by title"),
+    ("open_file_browser(path)", "Opens file browser at optional path (or a described folder)"),
+    ("search_files(query)", "Finds files and folders by name"),
+    ("get_running_processes(sort_by, limit)", 'Lists top processes by "cpu" or "memory"'),
+    ("kill_process(name | pid | sort_by)", 'Closes a process by name, pid, or the top "cpu"/"memory" user'),
+    ("schedule_task(tool, parameters, at | in | every)",
+     'Runs another action later ("at": "09:00", "in": "10m") or repeatedly ("every": "1h")'),
+    ("create_reminder(message, at | in | every)", "Shows a reminder later or repeatedly"),
+    ("list_scheduled()", "Shows scheduled tasks and reminders"),
+    ("cancel_scheduled(job_id)", "Cancels a scheduled task or reminder"),
+]
+
+# (user message, answer): a JSON tool call for actions, plain text otherwise
+EXAMPLES = [
+    ("open firefox", '{"tool": "open_app", "parameters": {"app_name": "firefox"}}'),
+    ("hello", "Hi there! How can I help you?"),
+    ("tell me a joke", "Why don't scientists trust atoms? Because they make up everything!"),
+    ("show system info", '{"tool": "system_info", "parameters": {}}'),
+    ("where is my tax return", '{"tool": "search_files", "parameters": {"query": "tax return"}}'),
+    ("kill the process using the most memory", '{"tool": "kill_process", "parameters": {"sort_by": "memory"}}'),
+    ("open slack at 9",
+     '{"tool": "schedule_task", "parameters": {"tool": "open_app", "parameters": {"app_name": "slack"}, "at": "09:00"}}'),
+    ("remind me every hour to stretch",
+     '{"tool": "create_reminder", "parameters": {"message": "stretch", "every": "1h"}}'),
+]
+
+
+def tool_names():
+    """Names of all tools, in the order they are listed"""
+    return [signature.partition("(")[0] for signature, _ in ACTIONS]
+
+
+def format_actions():
+    return "\n".join(f"- {signature}: {description}" for signature, description in ACTIONS)
+
+
+def format_examples(route=False):
+    """The examples as prompt lines; with route, answered "tool" or "chat" instead"""
+    lines = []
+    for message, answer in EXAMPLES:
+        if route:
+            answer = "tool" if answer.startswith("{") else "chat"
+        lines.append(f'- User: "{message}" → {answer}')
+    return "\n".join(lines)
@@ -0,0 +1,77 @@
+"""Structured tool results.
+
+Tools that produce lists or tables return a ToolResult instead of a string.
+The model and the conversation history only ever see its compact summary
+(``str(result)``); the full rows go to the views: the GUI's virtualized
+result list, the terminal, and daemon clients asking for structured replies.
+"""
+
+
+class ToolResult:
+    """A tool's output: a one-line summary plus the rows behind it"""
+
+    __slots__ = ("summary", "rows", "columns", "title")
+
+    def __init__(self, summary, rows=(), columns=None, title=None):
+        self.summary = summary
+        self.rows = list(rows)  # Strings, or one tuple of cell strings per row for tables
+        self.columns = tuple(columns) if columns else None
+        self.title = title or summary
+
+    @classmethod
+    def listing(cls, label, items, preview=8, note=""):
+        """A list whose summary names the first `preview` items and counts the rest"""
+        items = [str(item) for item in items]
+        shown = ", ".join(items[:preview])
+        more = f" and {len(items) - preview} more" if len(items) > preview else ""
+        return cls(f"{label} ({len(items)} total){note}: {shown}{more}", items,
+                   title=f"{label} ({len(items)}){note}")
+
+    def __str__(self):
+        return self.summary
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def is_table(self):
+        return self.columns is not None
+
+    def _widths(self):
+        widths = [len(column) for column in self.columns]
+        for row in self.rows:
+            for i, cell in enumerate(row):
+                widths[i] = max(widths[i], len(cell))
+        return widths
+
+    def header_line(self):
+        """Column headings aligned with lines(), or None for plain lists"""
+        if not self.is_table:
+            return None
+        return "  ".join(column.ljust(width) for column, width in zip(self.columns, self._widths())).rstrip()
+
+    def lines(self):
+        """One display string per row; table cells are padded into columns"""
+        if not self.is_table:
+            return [str(row) for row in self.rows]
+        widths = self._widths()
+        return ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in self.rows]
+
+    def to_text(self, include_summary=True):
+        """Every row (after the summary), for terminal output"""
+        lines = [self.summary] if include_summary else []
+        header = self.header_line()
+        if header:
+            lines.append("  " + header)
+        lines.extend(f"• {line}" for line in self.lines())
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"summary": self.summary, "rows": [list(row) if self.is_table else row for row in self.rows],
+                "columns": list(self.columns) if self.columns else None, "title": self.title}
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = data.get("columns")
+        rows = [tuple(row) for row in data["rows"]] if columns else data["rows"]
+        return cls(data["summary"], rows, columns, data.get("title"))